@@ -0,0 +1,80 @@
+"""
+Tartalom kódolás mérése: content_codec kontra a korábbi láncolt str.replace út
+
+Használat: python bench_content_codec.py [sorok_száma ...]
+"""
+import sys
+import time
+
+import content_codec
+
+LEGACY_ESCAPES = {
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+    '<': '&lt;',
+    '>': '&gt;',
+    '&': '&amp;',
+    '"': '&quot;',
+    "'": '&apos;',
+}
+
+
+def make_contents(count):
+    """Szintetikus oldal tartalmak (egy oldal content oszlopa)"""
+    return [
+        f"VanDoor Doku Kezelő, {i}. próba sor;\nez hosszabb, \"idézett\" <b>szöveg</b> & 'egyéb'."
+        for i in range(count)
+    ]
+
+
+def legacy_escape(content):
+    """A korábbi DocumentManager.escape_content"""
+    if not content:
+        return content
+    result = content
+    for original, escaped in LEGACY_ESCAPES.items():
+        result = result.replace(original, escaped)
+    return result
+
+
+def legacy_unescape(content):
+    """A korábbi DocumentManager.unescape_content"""
+    if not content:
+        return content
+    result = content
+    for original, escaped in list(LEGACY_ESCAPES.items())[3:]:
+        result = result.replace(escaped, original)
+    for original, escaped in list(LEGACY_ESCAPES.items())[:3]:
+        result = result.replace(escaped, original)
+    return result
+
+
+def measure(func, repeat):
+    """Legjobb futási idő ezredmásodpercben"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000]
+    print(f"{'sorok':>8} {'régi kódolás':>13} {'encode_many':>12} {'régi vissza':>12} {'decode_many':>12}  (ms/oldal)")
+    for size in sizes:
+        contents = make_contents(size)
+        encoded = content_codec.encode_many(contents)
+        repeat = max(3, min(200, 20000 // size))
+
+        legacy_encode_ms = measure(lambda: [legacy_escape(content) for content in contents], repeat)
+        encode_ms = measure(lambda: content_codec.encode_many(contents), repeat)
+        legacy_decode_ms = measure(lambda: [legacy_unescape(content) for content in encoded], repeat)
+        decode_ms = measure(lambda: content_codec.decode_many(encoded), repeat)
+        print(f"{size:>8} {legacy_encode_ms:>13.3f} {encode_ms:>12.3f} {legacy_decode_ms:>12.3f} {decode_ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Dokumentum elemek betöltésének mérése: a __slots__ alapú DocumentElement kontra a korábbi osztály
+
+Egy szintetikus webhely sorait (alapértelmezés szerint 1 000 000 elem)
+alakítja elemekké, ahogy a Document.from_rows teszi, és méri a betöltési
+időt és az elemenkénti memóriát (a sorok közben eldobódnak, mint a
+folyamatos olvasásnál).
+
+Használat: python bench_elements.py [elemek_száma]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+import uuid
+
+from models import DocumentElement, DocumentElementStatus, DocumentElementType
+
+TYPES = ['TITLE', 'TEXT', 'TEXT', 'TEXT', 'SUBTITLE', 'LINK', 'PAGE', 'PATH']
+STATUSES = ['PUBLIC', 'PUBLIC', 'PUBLIC', 'NEW', 'EDIT']
+NAMES = ['MAIN TEXT', 'MAIN TEXT', 'SIDE NOTE', 'FOOTER']
+
+
+class LegacyDocumentElement:
+    """A korábbi, példányszótáras DocumentElement (képkezelés nélkül)"""
+
+    def __init__(self, name, content, element_type, status=DocumentElementStatus.NEW, pid=None, position=0):
+        self.oid = str(uuid.uuid4())
+        self.name = name
+        self.content = content
+        self.type = element_type
+        self.status = status
+        self.pid = pid
+        self.position = position
+        self.type_geometry = None
+
+
+def legacy_from_row(row):
+    """A korábbi Document.from_csv elem létrehozása: UUID, majd az oid felülírása"""
+    element = LegacyDocumentElement(
+        name=row['name'].strip('"'),
+        content=row['content'].strip('"'),
+        element_type=DocumentElementType.get(row['type']) if row['type'] else None,
+        status=DocumentElementStatus[row['status']] if row['status'] else None,
+        pid=row['pid'].strip('"'),
+        position=int(row['position'])
+    )
+    element.oid = row['oid'].strip('"')
+    return element
+
+
+def iter_rows(count, page_size=200):
+    """Szintetikus oldal sorok; a szöveg értékek soronként külön objektumok, mint a CSV olvasásnál"""
+    for i in range(count):
+        yield {
+            'oid': str(1000 + i),
+            'name': "".join([NAMES[i % len(NAMES)]]),
+            'content': f"VanDoor próba tartalom, {i}. elem",
+            'type': "".join([TYPES[i % len(TYPES)]]),
+            'status': "".join([STATUSES[i % len(STATUSES)]]),
+            'pid': str(1 + i // page_size),
+            'position': str(1 + i % page_size)
+        }
+
+
+def measure_time(factory, count):
+    """Betöltési idő másodpercben"""
+    gc.collect()
+    start = time.perf_counter()
+    elements = [factory(row) for row in iter_rows(count)]
+    elapsed = time.perf_counter() - start
+    del elements
+    return elapsed
+
+
+def measure_memory(factory, count):
+    """Az elemek által lefoglalt memória bájtban (a sorok már eldobva)"""
+    gc.collect()
+    tracemalloc.start()
+    elements = [factory(row) for row in iter_rows(count)]
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del elements
+    return current
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{count} elem")
+    print(f"{'':>10} {'betöltés (s)':>13} {'memória (MB)':>13} {'bájt/elem':>10}")
+    for label, factory in (("korábbi", legacy_from_row), ("slots", DocumentElement.from_row)):
+        elapsed = measure_time(factory, count)
+        memory = measure_memory(factory, count)
+        print(f"{label:>10} {elapsed:>13.2f} {memory / 1e6:>13.1f} {memory / count:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Oldal olvasás/írás mérése: page_codec (CSV), page_columnar (oszlopos) és a korábbi pandas alapú út
+
+Használat: python bench_page_codec.py [sorok_száma ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from page_codec import read_page_rows, write_page_rows
+from page_columnar import read_columnar_rows, write_columnar_rows
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+def make_rows(count):
+    """Szintetikus oldal sorok előállítása"""
+    return [
+        {
+            'oid': 1000 + i,
+            'name': "MAIN TEXT",
+            'content': f"VanDoor Doku Kezelő, {i}. próba sor; ez hosszabb, &quot;idézett&quot; szöveg.",
+            'type': "TEXT",
+            'status': "PUBLIC",
+            'pid': 1,
+            'position': i + 1
+        }
+        for i in range(count)
+    ]
+
+
+def pandas_read(filename):
+    """A korábbi DocumentManager.read_document olvasási útja"""
+    df = pd.read_csv(filename, dtype=str)
+    return [row.to_dict() for _, row in df.iterrows()]
+
+
+def pandas_write(filename, rows):
+    """A korábbi DocumentManager.write_document írási útja"""
+    df = pd.DataFrame(rows)
+    df['oid'] = df['oid'].astype(int)
+    df['position'] = df['position'].astype(int)
+    df.to_csv(filename, index=False, quoting=1, quotechar='"', header=True)
+
+
+def measure(func, repeat):
+    """Legjobb futási idő ezredmásodpercben"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000]
+    if pd is None:
+        print("A pandas nincs telepítve, csak a page_codec mérése fut.")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, "doc1.csv")
+        columnar_filename = os.path.join(temp_dir, "doc1.vdc")
+        print(f"{'sorok':>8} {'codec olvasás':>14} {'oszlopos olv.':>14} {'pandas olvasás':>15} "
+              f"{'codec írás':>11} {'oszlopos írás':>14} {'pandas írás':>12}  (ms/oldal)")
+        for size in sizes:
+            rows = make_rows(size)
+            repeat = max(3, min(200, 20000 // size))
+
+            codec_write = measure(lambda: write_page_rows(filename, rows), repeat)
+            codec_read = measure(lambda: read_page_rows(filename), repeat)
+            columnar_write = measure(lambda: write_columnar_rows(columnar_filename, rows), repeat)
+            columnar_read = measure(lambda: read_columnar_rows(columnar_filename), repeat)
+            if pd is not None:
+                pandas_write_ms = measure(lambda: pandas_write(filename, rows), repeat)
+                pandas_read_ms = measure(lambda: pandas_read(filename), repeat)
+                print(f"{size:>8} {codec_read:>14.3f} {columnar_read:>14.3f} {pandas_read_ms:>15.3f} "
+                      f"{codec_write:>11.3f} {columnar_write:>14.3f} {pandas_write_ms:>12.3f}")
+            else:
+                print(f"{size:>8} {codec_read:>14.3f} {columnar_read:>14.3f} {'-':>15} "
+                      f"{codec_write:>11.3f} {columnar_write:>14.3f} {'-':>12}")
+
+
+if __name__ == "__main__":
+    main()
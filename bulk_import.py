@@ -0,0 +1,384 @@
+"""
+Oldalak tömeges importálása JSON leírásokból
+
+Egy könyvtár (vagy zip archívum) minden .json fájlja egy oldal leírást,
+vagy oldal leírások listáját tartalmazza:
+
+    {
+        "key": "bevezeto",          (opcionális, az importon belüli hivatkozáshoz)
+        "title": "Bevezető",
+        "parent": "1",              (meglévő oldal oid, vagy egy importált oldal key értéke)
+        "status": "NEW",            (opcionális)
+        "elements": [
+            {"type": "TEXT", "content": "Első bekezdés", "name": "MAIN TEXT", "status": "PUBLIC"}
+        ]
+    }
+
+A fájlok feldolgozása és ellenőrzése párhuzamosan, folyamatkészletben fut.
+Az összes szükséges OID egyetlen foglalással érkezik; a TITLE, PATH és a
+szülő oldal PAGE hivatkozásai az AddSubPage párbeszédablakkal azonos
+szerkezetben jönnek létre. Az új oldalak és a meglévő szülő oldalakhoz
+fűzött PAGE hivatkozások egyetlen kötegben (DocumentManager.batch) kerülnek
+mentésre, így hiba esetén nem marad elérhetetlen (szülő nélküli) oldal.
+
+Használat: python bulk_import.py <könyvtár|archívum.zip> [--workers N]
+"""
+import glob
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+from models import DocumentElementStatus, DocumentElementType
+import ordering
+
+# Az importáló által előállított, leírásban nem megadható típusok
+GENERATED_TYPES = ('TITLE', 'PATH', 'PAGE')
+
+STATUSES = tuple(status.name for status in DocumentElementStatus)
+
+
+def _validate_page(page, index: int, source: str, element_types: Tuple[str, ...]) -> Tuple[Optional[Dict], List[str]]:
+    """
+    Egy oldal leírás ellenőrzése és egységes formára hozása
+
+    :return: (normalizált oldal vagy None, hibaüzenetek)
+    """
+    where = f"{source}[{index}]"
+    if not isinstance(page, dict):
+        return None, [f"{where}: az oldal leírás nem objektum"]
+
+    errors = []
+    title = page.get('title')
+    if not isinstance(title, str) or not title.strip():
+        errors.append(f"{where}: hiányzó cím")
+    parent = page.get('parent')
+    if parent is None or isinstance(parent, bool) or not isinstance(parent, (str, int)):
+        errors.append(f"{where}: hiányzó vagy hibás szülő")
+    status = page.get('status', "NEW")
+    if status not in STATUSES:
+        errors.append(f"{where}: ismeretlen státusz: {status}")
+
+    elements = []
+    raw_elements = page.get('elements', [])
+    if not isinstance(raw_elements, list):
+        errors.append(f"{where}: az elements nem lista")
+        raw_elements = []
+    for position, element in enumerate(raw_elements, start=1):
+        if not isinstance(element, dict):
+            errors.append(f"{where}.elements[{position}]: az elem nem objektum")
+            continue
+        element_type = element.get('type')
+        if element_type not in element_types or element_type in GENERATED_TYPES:
+            errors.append(f"{where}.elements[{position}]: nem importálható típus: {element_type}")
+        content = element.get('content', "")
+        if not isinstance(content, str):
+            errors.append(f"{where}.elements[{position}]: a tartalom nem szöveg")
+        element_status = element.get('status', status)
+        if element_status not in STATUSES:
+            errors.append(f"{where}.elements[{position}]: ismeretlen státusz: {element_status}")
+        elements.append({
+            'name': str(element.get('name') or f"MAIN {element_type}"),
+            'content': content,
+            'type': element_type,
+            'status': element_status
+        })
+
+    if errors:
+        return None, errors
+
+    default_key = source if index == 0 else f"{source}#{index}"
+    return {
+        'key': str(page.get('key') or default_key),
+        'title': title.strip(),
+        'parent': str(parent),
+        'status': status,
+        'elements': elements
+    }, []
+
+
+def _parse_source(source: Tuple[str, Optional[bytes]], element_types: Tuple[str, ...]) -> Tuple[List[Dict], List[str]]:
+    """
+    Egy JSON fájl beolvasása és ellenőrzése (a folyamatkészlet munkafolyamata)
+
+    :param source: (név, tartalom) pár; könyvtárból olvasásnál a tartalom None és a név a fájl útvonala
+    :param element_types: Az ismert elem típusok
+    :return: (oldalak, hibaüzenetek)
+    """
+    name, data = source
+    try:
+        if data is None:
+            with open(name, 'rb') as f:
+                data = f.read()
+        document = json.loads(data.decode('utf-8'))
+    except Exception as e:
+        return [], [f"{name}: {e}"]
+
+    label = os.path.splitext(os.path.basename(name))[0]
+    pages = []
+    errors = []
+    for index, page in enumerate(document if isinstance(document, list) else [document]):
+        page, page_errors = _validate_page(page, index, label, element_types)
+        if page is not None:
+            pages.append(page)
+        errors.extend(page_errors)
+    return pages, errors
+
+
+def _iter_sources(path: str):
+    """A forrás könyvtár vagy zip archívum JSON fájljai (név, tartalom) párokként"""
+    if os.path.isdir(path):
+        for filename in sorted(glob.glob(os.path.join(path, "**", "*.json"), recursive=True)):
+            yield filename, None
+    else:
+        with zipfile.ZipFile(path) as archive:
+            for member in sorted(archive.namelist()):
+                if member.lower().endswith(".json"):
+                    yield member, archive.read(member)
+
+
+class BulkImporter:
+    """Oldalak tömeges importálása a DocumentManager kötegelt mentésével"""
+
+    def __init__(self, doc_manager, config_manager):
+        """
+        :param doc_manager: DocumentManager példány
+        :param config_manager: ConfigManager példány (az OID foglaláshoz)
+        """
+        self.doc_manager = doc_manager
+        self.config_manager = config_manager
+
+    def parse(self, path: str, workers: Optional[int] = None) -> Tuple[List[Dict], List[str]]:
+        """
+        A forrás fájlok párhuzamos beolvasása és ellenőrzése
+
+        :param path: Könyvtár vagy zip archívum
+        :param workers: A munkafolyamatok száma (alapértelmezett: CPU magok száma)
+        :return: (oldalak, hibaüzenetek)
+        """
+        element_types = tuple(element_type.type_id for element_type in self.doc_manager.type_geometries)
+        pages = []
+        errors = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for source_pages, source_errors in executor.map(
+                partial(_parse_source, element_types=element_types), _iter_sources(path), chunksize=32
+            ):
+                pages.extend(source_pages)
+                errors.extend(source_errors)
+        return pages, errors
+
+    def _order_pages(self, pages: List[Dict]) -> Tuple[List[Dict], List[str]]:
+        """
+        A szülő hivatkozások feloldása; az oldalak sorrendje: szülő a gyerekei előtt
+
+        :return: (rendezett oldalak, hibaüzenetek)
+        """
+        by_key = {}
+        errors = []
+        for page in pages:
+            if page['key'] in by_key:
+                errors.append(f"{page['key']}: ismétlődő kulcs")
+            by_key[page['key']] = page
+        existing_pages = set(self.doc_manager.list_pages())
+        for page in pages:
+            if page['parent'] not in by_key and page['parent'] not in existing_pages:
+                errors.append(f"{page['key']}: ismeretlen szülő: {page['parent']}")
+        if errors:
+            return [], errors
+
+        ordered = []
+        state = {}  # kulcs -> 1: feldolgozás alatt, 2: kész
+        for page in pages:
+            stack = [page]
+            while stack:
+                current = stack[-1]
+                key = current['key']
+                if state.get(key) == 2:
+                    stack.pop()
+                    continue
+                parent = by_key.get(current['parent'])
+                if parent is not None and state.get(parent['key']) != 2:
+                    if state.get(parent['key']) == 1:
+                        return [], [f"{key}: körkörös szülő hivatkozás"]
+                    state[key] = 1
+                    stack.append(parent)
+                    continue
+                state[key] = 2
+                ordered.append(current)
+                stack.pop()
+        return ordered, []
+
+    def build(self, pages: List[Dict]) -> Tuple[List[Tuple[str, List[Dict]]], Dict[str, List[Dict]]]:
+        """
+        Az oldalak mentési formátumú sorainak összeállítása
+
+        :param pages: Szülő szerint rendezett oldalak
+        :return: (új oldalak (oid, sorok) párjai, meglévő szülőkhöz adandó PAGE hivatkozások)
+        """
+        dm = self.doc_manager
+        geometries = dm.type_geometries
+
+        # Oldalanként: oldal (TITLE), elemek, PATH elemek és a szülő PAGE hivatkozása;
+        # az útvonalak címei visszaalakított (nem escape-elt) formában vannak
+        breadcrumbs = {}
+        depths = {}
+        for page in pages:
+            parent = page['parent']
+            if parent not in depths and parent not in breadcrumbs:
+                breadcrumbs[parent] = self._breadcrumb(parent)
+            depths[page['key']] = depths.get(parent, len(breadcrumbs.get(parent, []))) + 1
+        total = sum(len(page['elements']) + 2 + depths[page['key']] for page in pages)
+        oids = iter(self.config_manager.allocate_oids(total))
+
+        page_oids = {}
+        new_pages = []
+        rows_by_oid = {}
+        existing_links = {}
+        for page in pages:
+            page_oid = next(oids)
+            page_oids[page['key']] = page_oid
+            parent = page_oids.get(page['parent'], page['parent'])
+            status = page['status']
+            title = page['title']
+            breadcrumbs[page['key']] = breadcrumbs[page['parent']] + [(page_oid, title)]
+
+            rows = [{
+                'oid': page_oid,
+                'name': f"TITLE{page_oid}",
+                'content': dm.escape_content(title),
+                'type': "TITLE",
+                'status': status,
+                'pid': parent,
+                'position': ordering.position_at(0)
+            }]
+            for element in page['elements']:
+                is_active = geometries[DocumentElementType.get(element['type'])].isactive == '1'
+                rows.append({
+                    'oid': next(oids),
+                    'name': element['name'],
+                    'content': element['content'] if is_active else dm.escape_content(element['content']),
+                    'type': element['type'],
+                    'status': element['status'],
+                    'pid': parent,
+                    'position': ordering.position_at(len(rows))
+                })
+            for target, target_title in breadcrumbs[page['key']]:
+                rows.append({
+                    'oid': next(oids),
+                    'name': f"PATH{target}",
+                    'content': f"{target}#>{dm.escape_page(target_title)}",
+                    'type': "PATH",
+                    'status': status,
+                    'pid': parent,
+                    'position': ordering.position_at(len(rows))
+                })
+            new_pages.append((page_oid, rows))
+            rows_by_oid[page_oid] = rows
+
+            link_oid = next(oids)
+            link = {
+                'oid': link_oid,
+                'name': f"PAGE{link_oid}",
+                'content': f"{page_oid}#>{title}",
+                'type': "PAGE",
+                'status': "NEW",
+                'pid': parent,
+                'position': None
+            }
+            if parent in rows_by_oid:
+                parent_rows = rows_by_oid[parent]
+                link['position'] = ordering.next_position(parent_rows)
+                # A store_pages mentési formátumot vár, az apply_changes maga kódol
+                link['content'] = f"{page_oid}#>{dm.escape_page(title)}"
+                parent_rows.append(link)
+            else:
+                existing_links.setdefault(parent, []).append(link)
+        return new_pages, existing_links
+
+    def _breadcrumb(self, page: str) -> List[Tuple[str, str]]:
+        """Egy meglévő oldal útvonala (oid, cím) párokként, az oldal PATH elemeiből"""
+        doc_info = self.doc_manager.read_document(page)
+        path = ordering.sort_rows(doc_info['path'])
+        breadcrumb = [tuple(row['content'].partition('#>')[::2]) for row in path]
+        if not breadcrumb:
+            titles = [row['content'] for row in doc_info['elements'] if row['type'] == 'TITLE']
+            breadcrumb = [(page, titles[0] if titles else "")]
+        return breadcrumb
+
+    def _link_existing(self, parent: str, links: List[Dict]) -> bool:
+        """A PAGE hivatkozások hozzáfűzése egy meglévő oldalhoz egyetlen naplóbejegyzéssel"""
+        dm = self.doc_manager
+        doc_info = dm.read_document(parent)
+        if not doc_info:
+            return False
+        rows = doc_info['elements'] + doc_info['path'] + doc_info['subpages']
+        position = ordering.next_position(rows)
+        for link in links:
+            link['position'] = position
+            position += ordering.POSITION_GAP
+        return dm.apply_changes(parent, 'insert', links)
+
+    def run(self, path: str, workers: Optional[int] = None) -> Dict:
+        """
+        Teljes import: feldolgozás, OID foglalás, kötegelt mentés
+
+        Az új oldalak és a meglévő szülőkhöz fűzött PAGE hivatkozások egy
+        batch blokkban mentődnek: ha egy hivatkozás nem adható hozzá, semmi
+        nem kerül mentésre.
+
+        :param path: Könyvtár vagy zip archívum
+        :param workers: A munkafolyamatok száma
+        :return: Összesítő (pages, elements, seconds, pages_per_second, errors)
+        """
+        start = time.perf_counter()
+        report = {'pages': 0, 'elements': 0, 'seconds': 0.0, 'pages_per_second': 0.0, 'errors': []}
+
+        pages, errors = self.parse(path, workers)
+        if not errors:
+            pages, errors = self._order_pages(pages)
+        if errors:
+            report['errors'] = errors
+            return report
+
+        new_pages, existing_links = self.build(pages)
+        dm = self.doc_manager
+        try:
+            with dm.batch():
+                for parent, links in existing_links.items():
+                    if not self._link_existing(parent, links):
+                        raise ValueError(f"{parent}: a hivatkozások hozzáadása sikertelen, semmi nem került mentésre")
+                for page, rows in new_pages:
+                    dm.write_rows(page, rows)
+        except ValueError as e:
+            report['errors'].append(str(e))
+            return report
+
+        elapsed = time.perf_counter() - start
+        report['pages'] = len(new_pages)
+        report['elements'] = sum(len(rows) for _, rows in new_pages)
+        report['seconds'] = elapsed
+        report['pages_per_second'] = len(new_pages) / elapsed if elapsed > 0 else 0.0
+        return report
+
+if __name__ == "__main__":
+    import argparse
+    from config_manager import ConfigManager
+    from document_manager import DocumentManager
+
+    parser = argparse.ArgumentParser(description="Oldalak tömeges importálása JSON leírásokból")
+    parser.add_argument("source", help="Könyvtár vagy zip archívum")
+    parser.add_argument("--workers", type=int, default=None, help="Munkafolyamatok száma")
+    args = parser.parse_args()
+
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    config_manager = ConfigManager(os.path.join(base_path, "config"))
+    importer = BulkImporter(DocumentManager(config_manager), config_manager)
+    report = importer.run(args.source, args.workers)
+
+    for error in report['errors']:
+        print(error)
+    print(f"{report['pages']} oldal, {report['elements']} elem importálva "
+          f"{report['seconds']:.2f} mp alatt ({report['pages_per_second']:.0f} oldal/mp)")
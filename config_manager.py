@@ -1,6 +1,40 @@
 import json
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+class _FileLock:
+    """Folyamatok közötti kizárólagos zár egy segédfájlon"""
+    
+    def __init__(self, lock_path: str):
+        self.lock_path = lock_path
+        self._file = None
+    
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        self._file = open(self.lock_path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
 
 class ConfigManager:
     def __init__(self, config_dir: str = "config"):
@@ -12,11 +46,16 @@ class ConfigManager:
         self.config_dir = config_dir
         self.config_file = os.path.join(config_dir, "config.json")
         self.state_file = os.path.join(config_dir, "state.json")
+        self.state_lock_file = self.state_file + ".lock"
         
         # Konfiguráció betöltése
         self.config = self._load_json(self.config_file)
         self.state = self._load_json(self.state_file)
         
+        # A memóriában lefoglalt, még ki nem adott OID tartomány: [_oid_next, _oid_limit)
+        self._oid_next = 0
+        self._oid_limit = 0
+        
         # Fordítások betöltése
         self.translations = {}
         self.load_translations()
@@ -37,8 +76,11 @@ class ConfigManager:
         """JSON fájl mentése"""
         try:
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, 'w', encoding='utf-8') as f:
+            # Ideiglenes fájlba írás, majd atomi csere: más folyamat sosem lát félig írt fájlt
+            temp_path = f"{file_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=4, ensure_ascii=False)
+            os.replace(temp_path, file_path)
             return True
         except Exception as e:
             print(f"Hiba a {file_path} fájl mentése közben: {e}")
@@ -104,7 +146,78 @@ class ConfigManager:
         current[keys[-1]] = value
         
         # Állapot mentése
-        return self._save_json(self.state_file, self.state)
+        return self._save_state()
+    
+    def _high_water_mark(self, state: Dict[str, Any]) -> int:
+        """A next_oid értéke számként (-1 esetén az oid_sequence_starts)"""
+        value = int(state.get('next_oid', -1))
+        if value == -1:
+            value = int(self.get_config('oid_sequence_starts', 1))
+        return value
+    
+    def _save_state(self) -> bool:
+        """
+        Állapot mentése zárolás mellett
+        
+        A next_oid értékét sosem csökkentjük: ha egy másik folyamat közben
+        nagyobb tartományt foglalt le, a lemezen lévő értéket tartjuk meg.
+        """
+        with _FileLock(self.state_lock_file):
+            disk_state = self._load_json(self.state_file) if os.path.exists(self.state_file) else {}
+            if 'next_oid' in disk_state or 'next_oid' in self.state:
+                self.state['next_oid'] = str(max(
+                    self._high_water_mark(disk_state),
+                    self._high_water_mark(self.state)
+                ))
+            return self._save_json(self.state_file, self.state)
+    
+    def _reserve_oid_block(self, size: int):
+        """
+        Új OID tartomány lefoglalása
+        
+        Zárolás alatt újraolvassa a lemezen lévő next_oid értéket, és csak
+        a megnövelt felső határt (high-water mark) írja vissza.
+        
+        :param size: A lefoglalandó azonosítók száma
+        """
+        with _FileLock(self.state_lock_file):
+            disk_state = self._load_json(self.state_file) if os.path.exists(self.state_file) else {}
+            start = self._high_water_mark(disk_state)
+            disk_state['next_oid'] = str(start + size)
+            if not self._save_json(self.state_file, disk_state):
+                raise IOError(f"Nem sikerült lefoglalni az OID tartományt: {self.state_file}")
+            
+        self.state['next_oid'] = disk_state['next_oid']
+        self._oid_next = start
+        self._oid_limit = start + size
+    
+    def allocate_oids(self, count: int = 1) -> List[str]:
+        """
+        Egymást követő új OID-k kiadása
+        
+        Az azonosítókat a memóriában lefoglalt tartományból adjuk ki; a
+        state.json csak új tartomány foglalásakor íródik. Több folyamat
+        egyidejű használata esetén sem ad ki kétszer ugyanazt az OID-t.
+        A lefoglalt, de ki nem adott maradék kilépéskor kimarad a sorozatból.
+        
+        :param count: A kért azonosítók száma
+        :return: Az azonosítók listája (string formában)
+        """
+        if self._oid_limit - self._oid_next < count:
+            block_size = int(self.get_config('oid_block_size', 100))
+            self._reserve_oid_block(max(block_size, count))
+        
+        start = self._oid_next
+        self._oid_next += count
+        return [str(oid) for oid in range(start, start + count)]
+    
+    def allocate_oid(self) -> str:
+        """
+        Egyetlen új OID kiadása
+        
+        :return: Az azonosító (string formában)
+        """
+        return self.allocate_oids(1)[0]
     
     def load_translations(self):
         """Fordítások betöltése"""
@@ -170,7 +283,7 @@ class ConfigManager:
             'height': height,
             'is_maximized': is_maximized
         }
-        return self._save_json(self.state_file, self.state)
+        return self._save_state()
     
     def save_bookmark(self, page: str, title: str) -> bool:
         """
@@ -182,7 +295,7 @@ class ConfigManager:
             'page': page,
             'title': title
         }
-        return self._save_json(self.state_file, self.state)
+        return self._save_state()
     
     def get_bookmark(self) -> dict:
         """
@@ -0,0 +1,173 @@
+"""
+Az elemek tartalmának tárolási kódolása
+
+A tárolt tartalomban a vezérlő karakterek (\\n, \\r, \\t) és maga a
+fordított perjel backslash-szekvenciák, a HTML szempontjából különleges
+karakterek (< > & " ') entitások. A kódolás előbb a két bevezető
+karaktert (\\ és &) kódolja, így a visszaalakítás egyértelmű és a két
+irány egymás pontos inverze: decode(encode(x)) == x minden szövegre.
+
+A *_many függvények egy oldal teljes tartalom oszlopát egy hívással
+alakítják át: az értékeket elválasztó karakterrel összefűzik, és a
+cseréket egyszer futtatják a teljes szövegen.
+
+A korábbi (FORMAT_VERSION előtti) kódolás a fordított perjelet nem
+kódolta, az & jelet a többi entitás után, így a < alakja &amp;lt; lett;
+a megjelenítés kétszer alakított vissza. Az így tárolt tartalmat a
+legacy_decode olvassa, a régi oldalak egyszeri átkódolásához.
+"""
+import re
+from typing import Iterable, List, Optional
+
+# Eredeti karakter -> tárolt alak; a sorrend a kódolás sorrendje
+# (a fordított perjel és az & először, hogy a későbbi cserék eredményét ne kódoljuk újra)
+ESCAPES = {
+    '\\': '\\\\',   # Fordított perjel (a többi backslash-szekvencia miatt)
+    '&': '&amp;',   # HTML és karakter
+    '\n': '\\n',    # Újsor
+    '\r': '\\r',    # Kocsi vissza
+    '\t': '\\t',    # Tab
+    '<': '&lt;',    # HTML tag kezdete
+    '>': '&gt;',    # HTML tag vége
+    '"': '&quot;',  # Idézőjel
+    "'": '&apos;',  # Aposztróf
+}
+
+_ENCODE_STEPS = tuple(ESCAPES.items())
+# Visszaalakításkor az &amp; az utolsó: a kódolt szövegben minden & egy entitás kezdete
+_ENTITY_STEPS = tuple(
+    (escaped, original) for original, escaped in reversed(_ENCODE_STEPS) if escaped.startswith('&')
+)
+# A backslash-szekvenciák a kódolt szövegben balról jobbra párosíthatók: a \\\\ párok
+# mentén szétvágva a darabokban csak \\n, \\r és \\t maradhat
+_BACKSLASH_STEPS = tuple(
+    (escaped, original) for original, escaped in _ENCODE_STEPS if escaped.startswith('\\') and original != '\\'
+)
+
+# A tárolt tartalom kódolásának verziója (a régi, verzió nélküli kódolás: LEGACY_VERSION)
+FORMAT_VERSION = 2
+LEGACY_VERSION = 1
+
+# A régi kódolás visszaalakítási lépései, a régi unescape_content sorrendjében
+_LEGACY_STEPS = (
+    ('&lt;', '<'),
+    ('&gt;', '>'),
+    ('&amp;', '&'),
+    ('&quot;', '"'),
+    ('&apos;', "'"),
+    ('\\n', '\n'),
+    ('\\r', '\r'),
+    ('\\t', '\t'),
+)
+
+# Az oldal címekben a sortörések minden alakja szóközzé válik
+_PAGE_ESCAPED_NEWLINE = re.compile(r"\\[nr]|[\n\r]")
+
+# A kötegelt átalakításnál az értékeket elválasztó karakter (a kódolás nem érinti)
+_SEPARATOR = '\x00'
+
+
+def _encode_text(text: str) -> str:
+    for original, escaped in _ENCODE_STEPS:
+        if original in text:
+            text = text.replace(original, escaped)
+    return text
+
+
+def _decode_backslashes(text: str) -> str:
+    for escaped, original in _BACKSLASH_STEPS:
+        text = text.replace(escaped, original)
+    return text
+
+
+def _decode_text(text: str) -> str:
+    if '&' in text:
+        for escaped, original in _ENTITY_STEPS:
+            text = text.replace(escaped, original)
+    if '\\\\' in text:
+        parts = text.split('\\\\')
+        for i, part in enumerate(parts):
+            if '\\' in part:
+                parts[i] = _decode_backslashes(part)
+        text = '\\'.join(parts)
+    elif '\\' in text:
+        text = _decode_backslashes(text)
+    return text
+
+
+def encode(content: Optional[str]) -> Optional[str]:
+    """Tartalom kódolása tároláshoz (None és üres szöveg változatlan)"""
+    if not content:
+        return content
+    return _encode_text(content)
+
+
+def decode(content: Optional[str]) -> Optional[str]:
+    """A tárolt tartalom visszaalakítása (None és üres szöveg változatlan)"""
+    if not content:
+        return content
+    return _decode_text(content)
+
+
+def _legacy_unescape(text: str) -> str:
+    for escaped, original in _LEGACY_STEPS:
+        text = text.replace(escaped, original)
+    return text
+
+
+def legacy_decode(content: Optional[str]) -> Optional[str]:
+    """
+    A régi kódolással tárolt tartalom visszaalakítása
+
+    A régi olvasás és a megjelenítés is visszaalakított, ezért a régi
+    lépések kétszer futnak: az eredmény az, amit a felhasználó látott.
+
+    :param content: A régi kódolású tárolt tartalom
+    :return: Az eredeti szöveg (None és üres szöveg változatlan)
+    """
+    if not content:
+        return content
+    return _legacy_unescape(_legacy_unescape(content))
+
+
+def encode_page(content: Optional[str]) -> Optional[str]:
+    """
+    Oldal cím kódolása PAGE és PATH elemekhez
+
+    A sortöréseket (és a korábbi tárolt \\n, \\r alakjukat) szóközre cseréli, a többi karaktert az encode szerint kódolja.
+    """
+    if not content:
+        return content
+    return _encode_text(_PAGE_ESCAPED_NEWLINE.sub(' ', content))
+
+
+def _batched(values: List[Optional[str]], convert, join_convert) -> List[Optional[str]]:
+    """Átalakítás egyetlen összefűzött szövegen; ha az elválasztó előfordul, értékenként"""
+    if not values:
+        return []
+    texts = ["" if value is None else value for value in values]
+    joined = _SEPARATOR.join(texts)
+    if joined.count(_SEPARATOR) != len(texts) - 1:
+        return [convert(value) for value in values]
+    converted = join_convert(joined).split(_SEPARATOR)
+    return [None if value is None else result for value, result in zip(values, converted)]
+
+
+def encode_many(values: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """
+    Több tartalom kódolása egy hívással
+
+    :param values: Tartalmak (pl. egy oldal content oszlopa)
+    :return: A kódolt tartalmak azonos sorrendben
+    """
+    return _batched(list(values), encode, _encode_text)
+
+
+def decode_many(values: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """
+    Több tárolt tartalom visszaalakítása egy hívással
+
+    :param values: Tárolt tartalmak
+    :return: A visszaalakított tartalmak azonos sorrendben
+    """
+    return _batched(list(values), decode, _decode_text)
@@ -0,0 +1,163 @@
+import os
+import sqlite3
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Más oldalra mutató elem típusok; a tartalom első értéke a cél oldal azonosítója
+LINK_TYPES = ('LINK', 'PAGE', 'PATH')
+
+
+def page_dependencies(rows: Iterable[Dict], decode: Callable[[str], str]) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+    """
+    Az oldal címe és a hivatkozott oldalak kinyerése az oldal soraiból
+
+    :param rows: Az oldal mentési formátumú sorai
+    :param decode: A tárolt tartalom visszaalakítása (pl. DocumentManager.unescape_content)
+    :return: (nyers cím, (cél oldal, elem típus) párok)
+    """
+    title = None
+    targets = set()
+    for row in rows:
+        if row['status'] == 'DEL':
+            continue
+        if row['type'] == 'TITLE' and title is None:
+            title = row['content']
+        elif row['type'] in LINK_TYPES:
+            target = decode(row['content'] or "").partition('#>')[0].strip()
+            if target:
+                targets.add((target, row['type']))
+    return title, sorted(targets)
+
+
+class DependencyGraph:
+    """Az oldalak közötti függőségek: melyik oldal megjelenítése melyik másik oldal címétől függ.
+
+    Egy oldal a LINK elemeinek céljaitól, a PAGE elemekben szereplő gyerek
+    oldalak és a PATH elemekben szereplő ős oldalak címétől függ. Mentéskor
+    az oldal maga, és ha a címe megváltozott, a tőle függő oldalak is a
+    változott (dirty) halmazba kerülnek; a növekményes újraépítés csak ezeket
+    állítja elő újra."""
+
+    def __init__(self, db_path: str, decode: Optional[Callable[[str], str]] = None):
+        """
+        :param db_path: Az adatbázis elérési útja (az oldal indexszel közös lehet)
+        :param decode: A tárolt tartalom visszaalakítása (pl. DocumentManager.unescape_content)
+        """
+        self.db_path = db_path
+        self.decode = decode or (lambda text: text)
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS dependency_pages (
+                    page TEXT PRIMARY KEY,
+                    title TEXT
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS dependency_edges (
+                    page TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    PRIMARY KEY (page, target, kind)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_dependency_edges_target ON dependency_edges(target, page);
+                CREATE TABLE IF NOT EXISTS dirty_pages (
+                    page TEXT PRIMARY KEY
+                ) WITHOUT ROWID;
+            """)
+
+    def close(self):
+        """Adatbázis kapcsolat lezárása"""
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM dependency_pages").fetchone()[0]
+
+    def _update_page(self, page: str, rows: Iterable[Dict]):
+        """Egy oldal függőségeinek cseréje a folyamatban lévő tranzakción belül"""
+        title, targets = page_dependencies(rows, self.decode)
+        previous = self.connection.execute(
+            "SELECT title FROM dependency_pages WHERE page = ?", (page,)
+        ).fetchone()
+        if previous is None or previous[0] != title:
+            # Új oldal vagy új cím: a rá hivatkozó oldalak kimenete is változik
+            self.connection.execute(
+                "INSERT OR IGNORE INTO dirty_pages (page) SELECT DISTINCT page FROM dependency_edges WHERE target = ?",
+                (page,)
+            )
+        self.connection.execute(
+            "INSERT OR REPLACE INTO dependency_pages (page, title) VALUES (?, ?)", (page, title)
+        )
+        self.connection.execute("DELETE FROM dependency_edges WHERE page = ?", (page,))
+        self.connection.executemany(
+            "INSERT INTO dependency_edges (page, target, kind) VALUES (?, ?, ?)",
+            [(page, target, kind) for target, kind in targets]
+        )
+        self.connection.execute("INSERT OR IGNORE INTO dirty_pages (page) VALUES (?)", (page,))
+
+    def update_pages(self, pages: Iterable[Tuple[str, Iterable[Dict]]]):
+        """
+        A mentett oldalak függőségeinek frissítése egy tranzakcióban
+
+        :param pages: (oldal azonosító, mentési formátumú sorok) párok
+        """
+        with self.connection:
+            for page, rows in pages:
+                self._update_page(str(page), rows)
+
+    def update_page(self, page: str, rows: Iterable[Dict]):
+        """Egy oldal függőségeinek frissítése"""
+        self.update_pages([(page, rows)])
+
+    def rebuild(self, pages: Iterable[Tuple[str, Iterable[Dict]]]) -> int:
+        """
+        A gráf teljes újraépítése; minden oldal a változott halmazba kerül
+
+        :param pages: (oldal azonosító, sorok) párok
+        :return: A feldolgozott oldalak száma
+        """
+        count = 0
+        with self.connection:
+            self.connection.execute("DELETE FROM dependency_pages")
+            self.connection.execute("DELETE FROM dependency_edges")
+            for page, rows in pages:
+                self._update_page(str(page), rows)
+                count += 1
+        return count
+
+    def dependencies(self, page: str) -> List[Tuple[str, str]]:
+        """Az oldal által hivatkozott oldalak (cél oldal, elem típus) párokként"""
+        return self.connection.execute(
+            "SELECT target, kind FROM dependency_edges WHERE page = ? ORDER BY target, kind", (str(page),)
+        ).fetchall()
+
+    def dependents(self, page: str) -> List[str]:
+        """Az oldalra hivatkozó (a címétől függő) oldalak"""
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT page FROM dependency_edges WHERE target = ? ORDER BY page", (str(page),)
+        )]
+
+    def mark_dirty(self, pages: Iterable[str]):
+        """Oldalak felvétele a változott halmazba (pl. a címet nem érintő módosításkor)"""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO dirty_pages (page) VALUES (?)", [(str(page),) for page in pages]
+            )
+
+    def dirty_pages(self) -> Set[str]:
+        """Az utolsó újraépítés óta változott kimenetű oldalak"""
+        return {row[0] for row in self.connection.execute("SELECT page FROM dirty_pages")}
+
+    def clear_dirty(self, pages: Optional[Iterable[str]] = None):
+        """
+        Az újra előállított oldalak törlése a változott halmazból
+
+        :param pages: Az oldalak azonosítói (None: az összes)
+        """
+        with self.connection:
+            if pages is None:
+                self.connection.execute("DELETE FROM dirty_pages")
+            else:
+                self.connection.executemany(
+                    "DELETE FROM dirty_pages WHERE page = ?", [(str(page),) for page in pages]
+                )
@@ -1,24 +1,103 @@
 from models import DocumentElement, DocumentElementType, TypeGeometry
+from page_store import CSVPageStore, documents_dir_from_config, page_store_from_config
+from page_journal import PageJournal
+from page_cache import PageCache
+from site_index import SiteIndex, page_entry, site_index_path_from_config
+from search_index import INDEXED_TYPES, SearchIndex, search_index_path_from_config
+from hierarchy import HierarchyService
+from dependency_graph import LINK_TYPES, DependencyGraph
+from picture_store import picture_store_from_config, set_default_store
+import content_codec
+import ordering
+import csv
+from contextlib import contextmanager
+import glob
 import os
-import pandas as pd
 
 class DocumentManager:
-    def __init__(self):
+    def __init__(self, config_manager=None):
         self.current_document = None
+        self._batch = None  # A batch blokkban gyűjtött, még nem mentett módosítások (oldal -> függő állapot)
         self.base_path = os.path.dirname(os.path.abspath(__file__))
+        self.config_manager = config_manager
         self.type_geometries = {}  # TypeGeometry objektumok cache-elése
         self.list_elements = []    # Lista elemek tárolása
         self.load_type_geometries()  # Típusok betöltése inicializáláskor
         self.load_list_elements()  # Lista elemek betöltése inicializáláskor
         
+        # Oldal tároló a storage.mode szerint: "csv" (pages/doc{oid}.csv),
+        # "columnar" (pages/doc{oid}.vdc) vagy "sqlite" (egyetlen adatbázis)
+        self.pages_dir = documents_dir_from_config(self.base_path, config_manager)
+        self.page_store = page_store_from_config(self.base_path, config_manager)
+        self.storage_mode = self.page_store.mode
+        
+        # Oldalankénti módosítási napló a kis változtatásokhoz
+        self.journal = PageJournal(self.pages_dir)
+        
+        # Beolvasott oldalak LRU gyorsítótára (oid -> mentési formátumú sorok)
+        cache_size = 128
+        if config_manager is not None:
+            cache_size = config_manager.get_config('storage.page_cache_size', cache_size)
+        self.page_cache = PageCache(int(cache_size))
+        
+        # Webhely szintű oldal index (cím, szülő, gyerekek, útvonal)
+        self.site_index = SiteIndex(
+            site_index_path_from_config(self.base_path, config_manager),
+            decode=self.unescape_content
+        )
+        
+        # Oldal hierarchia lezárt (closure) táblája, az oldal index adatbázisában
+        self.hierarchy = HierarchyService(self.site_index.db_path)
+        
+        # Oldalak közötti függőségek a növekményes HTML újraépítéshez
+        self.dependency_graph = DependencyGraph(self.site_index.db_path, decode=self.unescape_content)
+        
+        # Teljes szöveges keresési index
+        self.search_index = SearchIndex(
+            search_index_path_from_config(self.base_path, config_manager),
+            decode=self.unescape_content
+        )
+        
+        # Tartalom szerint címzett képtár, oldalankénti hivatkozás számlálással
+        self.picture_store = picture_store_from_config(self.base_path, config_manager)
+        set_default_store(self.picture_store)
+        
+        # A régi tartalom kódolással mentett webhelyen az indexek csak az átkódolás
+        # (migrate_content_format) után épülnek fel; az üres webhely már az új kódolással íródik
+        self.content_migration_pending = False
+        if self._content_format() < content_codec.FORMAT_VERSION:
+            if self.list_pages():
+                self.content_migration_pending = True
+                print("A tárolt oldalak a régi tartalom kódolással készültek, átkódolás: python migrate.py")
+            else:
+                self._write_content_format()
+        if not self.content_migration_pending:
+            self.build_missing_indexes()
+        
+    def build_missing_indexes(self):
+        """
+        A még el nem készült indexek felépítése (meglévő webhely első megnyitásakor)
+        
+        Az oldal index újraépítése a hierarchiát is felépíti.
+        """
+        if not self.site_index.built:
+            self.rebuild_site_index()
+        elif len(self.site_index) and not len(self.hierarchy):
+            self.rebuild_hierarchy()
+        if not len(self.dependency_graph) and self.list_pages():
+            self.rebuild_dependencies()
+        if not self.search_index.built:
+            self.rebuild_search_index()
+        
     def load_type_geometries(self):
         """TypeGeometry objektumok betöltése az elementtypes.csv fájlból"""
         try:
             csv_path = os.path.join(self.base_path, "elementtypes.csv")
-            df = pd.read_csv(csv_path)
+            with open(csv_path, 'r', encoding='utf-8', newline='') as csvfile:
+                rows = list(csv.DictReader(csvfile))
             
-            # Típusok betöltése a DataFrame-ből
-            for _, row in df.iterrows():
+            # Típusok betöltése a CSV sorokból
+            for row in rows:
                 type_id = row['type_id']               
                 # TypeGeometry objektum létrehozása
                 geometry = TypeGeometry(
@@ -29,9 +108,11 @@ class DocumentManager:
                     slot_ids=row['slot_ids'],
                     slot_names=row['slot_names'],
                     slot_types=row['slot_types'],
-                    slot_defaults=row['slot_defaults'] if pd.notna(row['slot_defaults']) else "",
-                    isactive=str(row['isactive']) if pd.notna(row['isactive']) else "0"
+                    slot_defaults=row['slot_defaults'] or "",
+                    isactive=row['isactive'] or "0"
                 )
+                # Slot leírás és wrap sablon lefordítása, hogy a megjelenítés ne daraboljon újra
+                geometry.compile()
                 # Megfelelő DocumentElementType objektum lekérése vagy létrehozása
                 element_type = DocumentElementType.get(type_id)
                 if element_type:
@@ -46,57 +127,25 @@ class DocumentManager:
     def get_type_geometries(self):
         """TypeGeometry objektumok visszaadása"""
         return self.type_geometries
+
+    def get_schema(self, type_id):
+        """
+        Egy elem típus lefordított slot leírása
         
-    def escape_content(self, content):
-        """Speciális karakterek escape-elése"""
-        if not content:
-            return content
-            
-        replacements = {
-            '\n': '\\n',    # Újsor
-            '\r': '\\r',    # Kocsi vissza
-            '\t': '\\t',    # Tab
-            '<': '&lt;',    # HTML tag kezdete
-            '>': '&gt;',    # HTML tag vége
-            '&': '&amp;',   # HTML és karakter
-            '"': '&quot;',  # Idézőjel
-            "'": '&apos;',  # Aposztróf
-        }
-        
-        result = content
-        for original, escaped in replacements.items():
-            result = result.replace(original, escaped)
-        return result
-        
-    def unescape_content(self, content):
-        """Escape-elt karakterek visszaalakítása az eredeti formájukra"""
-        if not content:
-            return content
-            
-        # Először a HTML karaktereket alakítjuk vissza
-        html_replacements = {
-            '&lt;': '<',    # HTML tag kezdete
-            '&gt;': '>',    # HTML tag vége
-            '&amp;': '&',   # HTML és karakter
-            '&quot;': '"',  # Idézőjel
-            '&apos;': "'"   # Aposztróf
-        }
+        :param type_id: A típus azonosítója (pl. "SIGNATURE")
+        :return: SlotSchema, vagy None ha a típus ismeretlen
+        """
+        geometry = self.type_geometries.get(DocumentElementType.get(type_id))
+        return geometry.schema if geometry else None
         
-        result = content
-        for escaped, original in html_replacements.items():
-            result = result.replace(escaped, original)
-            
-        # Majd a speciális karaktereket alakítjuk vissza
-        special_chars = {
-            '\\n': '\n',    # Újsor
-            '\\r': '\r',    # Kocsi vissza
-            '\\t': '\t',    # Tab
-        }
+    def escape_content(self, content):
+        """Speciális karakterek escape-elése (content_codec.encode)"""
+        return content_codec.encode(content)
         
-        for escaped, original in special_chars.items():
-            result = result.replace(escaped, original)
-            
-        return result
+    @staticmethod
+    def unescape_content(content):
+        """Escape-elt karakterek visszaalakítása az eredeti formájukra (content_codec.decode)"""
+        return content_codec.decode(content)
         
     def get_document_element_content(self, element):
         """Dokumentum elem tartalmának lekérése"""
@@ -142,19 +191,20 @@ class DocumentManager:
 
     def show_page(self, oid: str, name: str) -> dict:
         """
-        Oldal betöltése CSV fájlból
+        Oldal betöltése a beállított tárolóból, a napló bejegyzéseivel együtt
         
         :param oid: Az oldal egyedi azonosítója
         :param name: Az oldal neve
         :return: Az oldal adatait tartalmazó szótár
         """
         from models import Document, DocumentElementType
-        import os
         
         try:
-            # Dokumentum betöltése CSV-ből
-            filename = os.path.join(self.base_path, "pages", f"doc{oid}.csv")
-            document = Document.from_csv(filename, name)
+            # A napló alkalmazása utáni sorokból: az alapfájl magában elavult lehet
+            document = Document.from_rows(self._read_rows(oid), name)
+            document.oid = str(oid)
+            # A módosításai a DocumentManager-en át mentődjenek (napló, gyorsítótár, indexek)
+            document.store = self
             
             # Dokumentum elemek rendezése pozíció szerint
             document.elements.sort(key=lambda x: x.position)
@@ -191,9 +241,6 @@ class DocumentManager:
                 'elements': other_elements
             }
         
-        except FileNotFoundError:
-            print(f"Nem található a(z) {filename} dokumentum.")
-            return None
         except Exception as e:
             print(f"Hiba a dokumentum betöltése során: {e}")
             return None
@@ -201,9 +248,7 @@ class DocumentManager:
     def read_document(self, page="1"):
         """Dokumentum olvasása fájlból"""
         try:
-            # CSV fájl beolvasása
-            filename = os.path.join(self.base_path, "pages", f"doc{page}.csv")
-            df = pd.read_csv(filename, dtype=str)  # Minden oszlopot string típusként olvasunk be
+            rows = self._read_rows(page)
             
             # Dokumentum adatok inicializálása
             doc_info = {
@@ -214,19 +259,16 @@ class DocumentManager:
                 'subpages': []
             }
             
-            # Sorok feldolgozása
-            for _, row in df.iterrows():
-                element_dict = row.to_dict()
-                
-                # Ellenőrizzük, hogy aktív típus-e
-                element_type = DocumentElementType.get(element_dict['type'])
-                type_geometry = self.type_geometries.get(element_type)
-                is_active = type_geometry and type_geometry.isactive == '1'
-                
-                # Csak akkor unescape-eljük, ha nem aktív típus
-                if not is_active:
-                    element_dict['content'] = self.unescape_content(element_dict['content'])
-                
+            # Sorok feldolgozása (másolaton, hogy a gyorsítótárban lévő sorok ne változzanak),
+            # pozíció szerinti sorrendben: a pozíciók hézagosak, a tárolási sorrend nem kötött
+            element_dicts = ordering.sort_rows(dict(row) for row in rows)
+            
+            # Csak a nem aktív típusokat unescape-eljük, egyetlen kötegelt hívással
+            decoded = [element_dict for element_dict in element_dicts if not self._is_active_type(element_dict['type'])]
+            for element_dict, content in zip(decoded, content_codec.decode_many(row['content'] for row in decoded)):
+                element_dict['content'] = content
+            
+            for element_dict in element_dicts:
                 # PATH és PAGE típusú elemek külön kezelése
                 if element_dict['type'] == 'PATH':
                     doc_info['path'].append(element_dict)
@@ -237,102 +279,322 @@ class DocumentManager:
             
             return doc_info
             
-        except FileNotFoundError:
-            print(f"A dokumentum nem található: {filename}")
+        except FileNotFoundError as e:
+            print(f"A dokumentum nem található: {e.filename or e}")
             return None
         except Exception as e:
             print(f"Hiba a dokumentum olvasása során: {e}")
             return None
 
+    def _page_signature(self, page):
+        """
+        Az oldal aláírása a gyorsítótár érvényesítéséhez: a tároló szerinti
+        aláírás (pl. az alapfájl módosítási ideje és mérete) és a napló
+        módosítási ideje és mérete
+        
+        :param page: Az oldal azonosítója
+        :return: Aláírás, vagy None ha az oldal nem létezik
+        """
+        base_signature = self.page_store.page_signature(page)
+        if base_signature is None:
+            return None
+        
+        try:
+            stat = os.stat(self.journal.path(page))
+            journal_signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            journal_signature = None
+        return (base_signature, journal_signature)
+
+    def page_signature(self, page):
+        """
+        Az oldal aktuális aláírása; változatlan aláírás esetén az oldal
+        tartalma sem változott (pl. a származtatott adatok gyorsítótárazásához)
+        
+        :param page: Az oldal azonosítója
+        :return: Aláírás, vagy None ha az oldal nem létezik
+        """
+        return self._page_signature(str(page))
+
+    def page_signatures(self):
+        """
+        Az összes oldal aláírása egyetlen könyvtár bejárással (ugyanaz, mint a page_signature)
+        
+        :return: Oldal azonosító -> aláírás szótár
+        """
+        bases = self.page_store.page_signatures()
+        journals = {}
+        if os.path.isdir(self.journal.journal_dir):
+            with os.scandir(self.journal.journal_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith("doc") and name.endswith(".log"):
+                        stat = entry.stat()
+                        journals[name[3:-4]] = (stat.st_mtime_ns, stat.st_size)
+        return {page: (base, journals.get(page)) for page, base in bases.items()}
+
+    def get_cache_stats(self):
+        """
+        Az oldal gyorsítótár statisztikái
+        
+        :return: Szótár a hits, misses, size és max_size értékekkel
+        """
+        return self.page_cache.stats()
+
+    def _read_rows(self, page):
+        """
+        Egy oldal mentési formátumú sorainak lekérése, elsősorban a gyorsítótárból
+        
+        :param page: Az oldal azonosítója
+        :return: Elem szótárak listája
+        :raises FileNotFoundError: Ha az oldal nem létezik
+        """
+        page = str(page)
+        pending = self._batch.get(page) if self._batch is not None else None
+        if pending is not None and pending['rows'] is not None:
+            # Az oldal a kötegben teljesen újraíródik, a tárolt állapot nem számít
+            return PageJournal.merge_rows([], pending['rows'] + pending['upserts'])
+        
+        signature = self._page_signature(page)
+        rows = self.page_cache.get(page, signature)
+        if rows is None:
+            rows = self._load_rows(page)
+            self.page_cache.put(page, signature, rows)
+        if pending is not None:
+            # A köteg módosításai csak az olvasott másolatban, a gyorsítótárba nem kerülnek
+            rows = PageJournal.merge_rows(rows, pending['upserts'])
+        return rows
+
+    def get_page_rows(self, page, use_cache=True):
+        """
+        Egy oldal mentési formátumú (escape-elt) sorai
+        
+        :param page: Az oldal azonosítója
+        :param use_cache: Hamis értéknél a gyorsítótár kimarad (pl. teljes export),
+            így a gyakran használt oldalak nem szorulnak ki belőle
+        :return: Elem szótárak listája
+        :raises FileNotFoundError: Ha az oldal nem létezik
+        """
+        return self._read_rows(page) if use_cache else self._load_rows(str(page))
+
+    @staticmethod
+    def _row_filter(values):
+        """Szűrő érték normalizálása: None (nincs szűrés), egyetlen érték vagy értékek"""
+        if values is None:
+            return None
+        if isinstance(values, str):
+            return frozenset([values])
+        return frozenset(str(value) for value in values)
+
+    def _iter_rows(self, page, types=None, status=None):
+        """
+        Egy oldal mentési formátumú sorainak folyamatos olvasása a napló alkalmazásával
+        
+        A szűrés a tárolóban fut (predicate pushdown); a naplóban szereplő
+        elemek a napló szerinti állapotukkal, a tárolóbeli helyükön (az új
+        elemek a végén) jelennek meg. A sorrend a tárolási sorrend.
+        
+        :param page: Az oldal azonosítója
+        :param types: Típus vagy típusok (None: mind)
+        :param status: Státusz vagy státuszok (None: mind)
+        :return: Elem szótárak iterátora
+        :raises FileNotFoundError: Ha az oldal nem létezik
+        """
+        page = str(page)
+        types = self._row_filter(types)
+        status = self._row_filter(status)
+        
+        def matches(row):
+            return (types is None or row['type'] in types) and (status is None or row['status'] in status)
+        
+        # A gyorsítótárban lévő (vagy a kötegben módosított) oldalt nem olvassuk újra
+        if self._batch is not None and page in self._batch:
+            rows = self._read_rows(page)
+        else:
+            rows = self.page_cache.get(page, self._page_signature(page))
+        if rows is not None:
+            yield from (dict(row) for row in rows if matches(row))
+            return
+        
+        overlay = self.journal.latest_rows(page, self.page_store.page_signature(page))
+        for row in self.page_store.iter_rows(page, types, status, oids=overlay.keys() if overlay else None):
+            row = overlay.pop(row['oid'], row)
+            if matches(row):
+                yield row
+        yield from (row for row in overlay.values() if matches(row))
+
+    def iter_elements(self, oid, types=None, status=None):
+        """
+        Egy oldal elemeinek folyamatos olvasása, állandó memóriával
+        
+        Nagy oldalakhoz: a read_document-tel szemben nem épít listát, és a
+        típus és státusz szerinti szűrés már a tárolóban megtörténik.
+        
+        :param oid: Az oldal azonosítója
+        :param types: Típus vagy típusok, pl. "TEXT" vagy ("PAGE", "PATH") (None: mind)
+        :param status: Státusz vagy státuszok (None: mind)
+        :return: Elem szótárak iterátora (a read_document elemeivel azonos
+            formában, visszaalakított tartalommal) a tárolási sorrendben
+        """
+        active = {}
+        try:
+            for row in self._iter_rows(oid, types, status):
+                if row['type'] not in active:
+                    active[row['type']] = self._is_active_type(row['type'])
+                if not active[row['type']]:
+                    row['content'] = self.unescape_content(row['content'])
+                yield row
+        except FileNotFoundError as e:
+            print(f"A dokumentum nem található: {e.filename or e}")
+
+    def filter_elements(self, oid, predicate, types=None, status=None):
+        """
+        Egy oldal elemeinek folyamatos szűrése tetszőleges feltétellel
+        
+        :param oid: Az oldal azonosítója
+        :param predicate: Az elem szótárat kapó függvény; igaz értéknél kerül az elem a kimenetbe
+        :param types: Előszűrés típus szerint (a tárolóban fut)
+        :param status: Előszűrés státusz szerint (a tárolóban fut)
+        :return: Elem szótárak iterátora
+        """
+        return (element for element in self.iter_elements(oid, types, status) if predicate(element))
+
+    def count_elements(self, oid, types=None, status=None):
+        """
+        Egy oldal elemeinek száma, az elemek tartalmának visszaalakítása nélkül
+        
+        :param oid: Az oldal azonosítója
+        :param types: Csak ezen típus(ok) (None: mind)
+        :param status: Csak ezen státusz(ok) (None: mind)
+        :return: Az elemek száma (nem létező oldalnál 0)
+        """
+        try:
+            return sum(1 for _ in self._iter_rows(oid, types, status))
+        except FileNotFoundError as e:
+            print(f"A dokumentum nem található: {e.filename or e}")
+            return 0
+
+    def count_elements_by(self, oid, column='type', types=None, status=None):
+        """
+        Egy oldal elemeinek száma egy oszlop értékei szerint csoportosítva
+        
+        :param oid: Az oldal azonosítója
+        :param column: A csoportosító oszlop (pl. type vagy status)
+        :param types: Csak ezen típus(ok) (None: mind)
+        :param status: Csak ezen státusz(ok) (None: mind)
+        :return: Oszlop érték -> darabszám szótár
+        """
+        counts = {}
+        try:
+            for row in self._iter_rows(oid, types, status):
+                counts[row[column]] = counts.get(row[column], 0) + 1
+        except FileNotFoundError as e:
+            print(f"A dokumentum nem található: {e.filename or e}")
+        return counts
+
+    def _load_rows(self, page):
+        """
+        Egy oldal nyers (escape-elt) sorainak beolvasása a beállított tárolóból
+        
+        :param page: Az oldal azonosítója
+        :return: Elem szótárak listája
+        :raises FileNotFoundError: Ha az oldal nem létezik
+        """
+        rows = self.page_store.read_rows(page)
+        
+        # A napló még össze nem vont bejegyzéseinek alkalmazása
+        return self.journal.replay(page, rows, self.page_store.page_signature(page))
+
+    def _write_rows(self, page, elements_to_save):
+        """
+        Egy oldal sorainak mentése a beállított tárolóba
+        
+        :param page: Az oldal azonosítója
+        :param elements_to_save: Elem szótárak listája a mentési sorrendben
+        """
+        self.page_store.write_rows(page, elements_to_save)
+
+    def _is_active_type(self, type_id):
+        """Aktív típus-e (a tartalma escape-elés nélkül tárolódik)"""
+        type_geometry = self.type_geometries.get(DocumentElementType.get(type_id))
+        return bool(type_geometry) and type_geometry.isactive == '1'
+
+    def _escape_link(self, content):
+        """PAGE és PATH tartalom ("20#>Cím") tárolási alakja: csak a cím escape-elt"""
+        target, separator, title = (content or "").partition('#>')
+        if not separator:
+            return self.escape_page(content)
+        return f"{target}#>{self.escape_page(title)}"
+
+    def _escape_rows(self, rows):
+        """
+        Mentési formátumú sorok tartalmának escape-elése helyben
+        
+        A nem aktív típusok tartalma egyetlen kötegelt hívással kódolódik,
+        a PAGE és PATH elemeknél csak a cím.
+        
+        :param rows: A sorok, visszaalakított (unescape-elt) tartalommal
+        """
+        plain = []
+        for row in rows:
+            if self._is_active_type(row['type']):
+                continue
+            if row['type'] in ('PAGE', 'PATH'):
+                row['content'] = self._escape_link(row['content'])
+            else:
+                plain.append(row)
+        for row, content in zip(plain, content_codec.encode_many(row['content'] for row in plain)):
+            row['content'] = content
+
+    def _element_to_row(self, elem, escape=True):
+        """
+        Egy elem (DocumentElement vagy szótár) átalakítása mentési formátumú sorrá
+        
+        :param elem: A mentendő elem, visszaalakított (unescape-elt) tartalommal
+        :param escape: A tartalom escape-elése (nem aktív típusoknál)
+        :return: Mentési formátumú szótár
+        """
+        # Ha DocumentElement objektum, akkor annak attribútumait használjuk
+        if isinstance(elem, DocumentElement):
+            row = {
+                'oid': int(elem.oid),  # oid számként
+                'name': elem.name,
+                'content': elem.content,
+                'type': elem.type.name if elem.type else None,
+                'status': elem.status.name if elem.status else None,
+                'pid': elem.pid,
+                'position': int(elem.position)  # position számként
+            }
+        else:
+            # Ha szótár, akkor azt használjuk
+            row = {
+                'oid': int(elem['oid']),  # oid számként
+                'name': elem['name'],
+                'content': elem['content'],
+                'type': elem['type'],
+                'status': elem['status'],
+                'pid': elem['pid'],
+                'position': int(elem['position'])  # position számként
+            }
+        if escape:
+            self._escape_rows([row])
+        return row
+
     def write_document(self, doc_info):
         """Dokumentum írása fájlba"""
         if not doc_info or 'oid' not in doc_info:
             return False
             
-        # CSV fájl neve az oid alapján
-        filename = os.path.join(self.base_path, "pages", f"doc{doc_info['oid']}.csv")
-        
-        # Összeállítjuk a mentendő elemek listáját
-        elements_to_save = []
-        
-        # Normál elemek hozzáadása
-        for elem in doc_info['elements']:
-            # Ha DocumentElement objektum, akkor annak attribútumait használjuk
-            if isinstance(elem, DocumentElement):
-                # Ellenőrizzük, hogy aktív típus-e
-                type_geometry = self.type_geometries.get(elem.type)
-                is_active = type_geometry and type_geometry.isactive == '1'
-                elements_to_save.append({
-                    'oid': int(elem.oid),  # oid számként
-                    'name': elem.name,
-                    'content': elem.content if is_active else self.escape_content(elem.content),
-                    'type': elem.type.name if elem.type else None,
-                    'status': elem.status.name if elem.status else None,
-                    'pid': elem.pid,
-                    'position': int(elem.position)  # position számként
-                })
-            else:  # Ha szótár, akkor azt használjuk
-                # Ellenőrizzük, hogy aktív típus-e
-                element_type = DocumentElementType.get(elem['type'])
-                type_geometry = self.type_geometries.get(element_type)
-                is_active = type_geometry and type_geometry.isactive == '1'
-                element_dict = {
-                    'oid': int(elem['oid']),  # oid számként
-                    'name': elem['name'],
-                    'content': elem['content'] if is_active else self.escape_content(elem['content']),
-                    'type': elem['type'],
-                    'status': elem['status'],
-                    'pid': elem['pid'],
-                    'position': int(elem['position'])  # position számként
-                }
-                elements_to_save.append(element_dict)
-                
-        # PATH típusú elemek hozzáadása
-        if 'path' in doc_info and doc_info['path']:
-            for path_elem in doc_info['path']:
-                # Csak a szükséges mezőket mentjük, és növeljük a pozíciót
-                elements_to_save.append({
-                    'oid': int(path_elem['oid']),  # oid számként
-                    'name': path_elem['name'],
-                    'content': path_elem['content'],
-                    'type': path_elem['type'],
-                    'status': path_elem['status'],
-                    'pid': path_elem['pid'],
-                    'position': int(path_elem['position'])  # position számként
-                })
-                
-        # PAGE típusú elemek hozzáadása
-        if 'subpages' in doc_info and doc_info['subpages']:
-            for page_elem in doc_info['subpages']:
-                # Csak a szükséges mezőket mentjük, és növeljük a pozíciót
-                elements_to_save.append({
-                    'oid': int(page_elem['oid']),  # oid számként
-                    'name': page_elem['name'],
-                    'content': page_elem['content'],
-                    'type': page_elem['type'],
-                    'status': page_elem['status'],
-                    'pid': page_elem['pid'],
-                    'position': int(page_elem['position'])  # position számként
-                })
-
+        # Összeállítjuk a mentendő elemek listáját: normál, PATH, majd PAGE elemek
+        # (a read_document visszaalakított tartalmával, amit itt kódolunk újra)
+        elements_to_save = [
+            self._element_to_row(elem, escape=False)
+            for elem in doc_info['elements'] + (doc_info.get('path') or []) + (doc_info.get('subpages') or [])
+        ]
+        
         try:
-            # CSV fájl létrehozása és mentése
-            df = pd.DataFrame(elements_to_save)
-            
-            # Oszlopok típusának beállítása
-            df['oid'] = df['oid'].astype(int)  # oid oszlop egész számmá konvertálása
-            df['position'] = df['position'].astype(int)  # position oszlop egész számmá konvertálása
-            
-            # CSV fájl mentése:
-            # - index=False: ne legyen index oszlop
-            # - quoting=1: QUOTE_MINIMAL - csak akkor használjon idézőjelet, ha szükséges
-            # - quotechar='"': idézőjel karakter
-            # - header=True: oszlopnevek kiírása
-            df.to_csv(filename, 
-                     index=False, 
-                     quoting=1,  # QUOTE_MINIMAL
-                     quotechar='"',
-                     header=True)
+            self._escape_rows(elements_to_save)
+            self.write_rows(doc_info['oid'], elements_to_save)
             
             # Frissítjük a current_document-et
             self.current_document = doc_info
@@ -341,15 +603,441 @@ class DocumentManager:
             print(f"Hiba a dokumentum mentése során: {e}")
             return False
 
+    def write_rows(self, page, rows):
+        """
+        Teljes oldal mentése mentési formátumú sorokból
+        
+        A PageStore.write_rows párja, így a DocumentManager egy Document
+        tárolójaként is használható (lásd Document.save). Egy batch blokkon
+        belül az oldal a blokk végén mentődik.
+        
+        :param page: Az oldal azonosítója
+        :param rows: Mentési formátumú (escape-elt) sorok
+        """
+        if self._batch is not None:
+            self._batch[str(page)] = {'rows': list(rows), 'upserts': [], 'ops': []}
+        else:
+            self._store_rows(str(page), rows)
+
+    def _store_rows(self, page, rows):
+        """
+        Teljes oldal mentése: alapfájl írása, napló törlése és a gyorsítótár frissítése
+        
+        :param page: Az oldal azonosítója
+        :param rows: Mentési formátumú sorok
+        """
+        self.store_pages([(page, rows)])
+
+    def store_pages(self, pages):
+        """
+        Több teljes oldal mentése kötegelt írással
+        
+        SQLite tárolásnál egyetlen tranzakcióban ír; az oldal index, a
+        hierarchia és a keresési index is oldalcsoportonként egy-egy
+        tranzakcióban frissül; a függőségi gráf a mentett oldalakat (és a
+        megváltozott című oldalakra hivatkozókat) változottnak jelöli.
+        
+        :param pages: (oldal azonosító, mentési formátumú sorok) párok
+        """
+        pages = [(str(page), rows) for page, rows in pages]
+        self.page_store.write_pages(pages)
+        
+        stored = []
+        for page, rows in pages:
+            # Az alapfájl már minden naplózott módosítást tartalmaz
+            self.journal.truncate(page)
+            
+            # Write-through: a mentett állapot kerül a gyorsítótárba, újraolvasás nélkül
+            rows = [
+                {key: ("" if value is None else str(value)) for key, value in row.items()}
+                for row in rows
+            ]
+            self.page_cache.put(page, self._page_signature(page), rows)
+            stored.append((page, rows))
+        
+        # Az oldal index, a hierarchia és a keresési index frissítése
+        self.site_index.update_pages((page, page_entry(rows)) for page, rows in stored)
+        self._update_hierarchy(page for page, _ in stored)
+        self.search_index.update_pages(stored)
+        self.picture_store.update_pages(stored)
+        self.dependency_graph.update_pages(stored)
+
+    def apply_changes(self, page, op, elements):
+        """
+        Kis módosítás naplózása a teljes oldal újraírása helyett
+        
+        A módosított elemek teljes sora a lap naplójába kerül; a naplót a
+        read_document újrajátssza. Ha a napló eléri a storage.journal_compact_after
+        beállításban megadott méretet, összevonjuk az alapfájlba. Egy batch
+        blokkon belül a módosítás csak a blokk végén kerül a naplóba.
+        
+        :param page: Az oldal azonosítója
+        :param op: A művelet neve (insert, move, status, content)
+        :param elements: A módosított elemek (DocumentElement vagy szótár)
+        :return: True ha sikeres, False ha nem
+        """
+        try:
+            if op not in PageJournal.OPERATIONS:
+                raise ValueError(f"Ismeretlen napló művelet: {op}")
+            rows = [self._element_to_row(elem, escape=False) for elem in elements]
+            self._escape_rows(rows)
+            page = str(page)
+            if self._batch is not None:
+                pending = self._batch.setdefault(page, {'rows': None, 'upserts': [], 'ops': []})
+                pending['upserts'].extend(rows)
+                pending['ops'].append(op)
+            else:
+                self._journal_rows(page, op, rows)
+            return True
+        except Exception as e:
+            print(f"Hiba a módosítás naplózása során: {e}")
+            return False
+
+    def _journal_rows(self, page, op, rows):
+        """
+        Mentési formátumú sorok naplózása és az indexek frissítése
+        
+        :param page: Az oldal azonosítója
+        :param op: A művelet neve
+        :param rows: Az escape-elt, teljes sorok
+        """
+        cached_rows = self.page_cache.peek(page, self._page_signature(page))
+        entry_count = self.journal.append(page, op, rows, self.page_store.page_signature(page))
+        
+        # Write-through: a gyorsítótárban lévő oldalra is alkalmazzuk a módosítást
+        if cached_rows is not None:
+            self.page_cache.put(page, self._page_signature(page), PageJournal.merge_rows(cached_rows, rows))
+        
+        # Cím, aloldal vagy útvonal változásakor az oldal index is frissül
+        if any(row['type'] in ('TITLE', 'PAGE', 'PATH') for row in rows):
+            self.site_index.update_page(page, self._read_rows(page))
+            self._update_hierarchy([page])
+        if any(row['type'] in INDEXED_TYPES for row in rows):
+            self.search_index.update_elements(page, rows)
+        if any(row['type'] == 'PICTURE' for row in rows):
+            self.picture_store.update_page(page, self._read_rows(page))
+        if any(row['type'] in ('TITLE',) + LINK_TYPES for row in rows):
+            self.dependency_graph.update_page(page, self._read_rows(page))
+        else:
+            self.dependency_graph.mark_dirty([page])
+        
+        compact_after = 100
+        if self.config_manager is not None:
+            compact_after = self.config_manager.get_config('storage.journal_compact_after', compact_after)
+        if entry_count >= compact_after:
+            self.compact_document(page)
+
+    @contextmanager
+    def batch(self):
+        """
+        Kötegelt módosítás: a blokkban hívott apply_changes és write_document
+        (és write_rows) módosítások a memóriában gyűlnek, és a blokk végén oldalanként
+        egyetlen írással mentődnek
+        
+        A teljesen újraírt oldalak egy store_pages hívással (SQLite tárolásnál
+        egy tranzakcióban), a csak módosított oldalak egy-egy naplóbejegyzéssel
+        kerülnek mentésre. A blokkon belül a read_document már a módosított
+        állapotot adja. Kivétel esetén semmi nem kerül mentésre, és a
+        current_document is visszaáll. A beágyazott blokk a külsőhöz tartozik.
+        
+            with doc_manager.batch():
+                doc_manager.apply_changes(page, 'insert', [element])
+                doc_manager.apply_changes(page, 'move', moved)
+        """
+        if self._batch is not None:
+            yield self
+            return
+        
+        current_document = self.current_document
+        self._batch = {}
+        try:
+            yield self
+        except BaseException:
+            self._batch = None
+            self.current_document = current_document
+            raise
+        pending, self._batch = self._batch, None
+        self._commit_batch(pending)
+
+    def _commit_batch(self, pending):
+        """
+        Egy köteg függő módosításainak mentése
+        
+        :param pending: Oldal -> {'rows': teljes sorok vagy None, 'upserts': sorok, 'ops': műveletek}
+        """
+        full_pages = [
+            (page, PageJournal.merge_rows([], changes['rows'] + changes['upserts']) if changes['upserts'] else changes['rows'])
+            for page, changes in pending.items() if changes['rows'] is not None
+        ]
+        if full_pages:
+            self.store_pages(full_pages)
+        for page, changes in pending.items():
+            if changes['rows'] is None and changes['upserts']:
+                # Elemenként csak az utolsó állapot kerül a naplóba
+                rows = list({str(row['oid']): row for row in changes['upserts']}.values())
+                ops = set(changes['ops'])
+                self._journal_rows(page, ops.pop() if len(ops) == 1 else 'batch', rows)
+
+    def compact_document(self, page):
+        """
+        A napló összevonása az oldal alapfájljába
+        
+        :param page: Az oldal azonosítója
+        :return: True ha sikeres, False ha nem
+        """
+        try:
+            self._store_rows(page, self._read_rows(page))
+            return True
+        except Exception as e:
+            print(f"Hiba a napló összevonása során: {e}")
+            return False
+
+    def _content_format_path(self):
+        """A tárolt tartalom kódolási verzióját rögzítő jelölő fájl"""
+        return os.path.join(self.pages_dir, "content_format")
+
+    def _content_format(self):
+        """
+        A tárolt oldalak tartalom kódolásának verziója
+        
+        :return: A jelölő fájlban rögzített verzió; jelölő nélkül a régi kódolás
+        """
+        try:
+            with open(self._content_format_path(), 'r', encoding='utf-8') as file:
+                return int(file.read().strip())
+        except FileNotFoundError:
+            return content_codec.LEGACY_VERSION
+        except (OSError, ValueError) as e:
+            # Ismeretlen állapotban nem kódolunk át, mert a kétszeres átkódolás adatvesztés
+            print(f"Hiba a tartalom kódolási verzió olvasása során: {e}")
+            return content_codec.FORMAT_VERSION
+
+    def _write_content_format(self):
+        """A jelenlegi kódolási verzió rögzítése a jelölő fájlban"""
+        os.makedirs(self.pages_dir, exist_ok=True)
+        with open(self._content_format_path(), 'w', encoding='utf-8') as file:
+            file.write(str(content_codec.FORMAT_VERSION))
+
+    def migrate_content_format(self, batch_size=200):
+        """
+        A régi kódolással (escape_content) mentett oldalak átkódolása
+        
+        Explicit, egyszeri lépés (a GUI indításakor, illetve python migrate.py).
+        Minden oldal (a napló alkalmazása után) a régi visszaalakítással
+        olvasódik és a jelenlegi kódolással mentődik; csak azok az oldalak
+        íródnak újra, amelyeknek a tárolt alakja ettől megváltozik. Végül a
+        jelölő fájl rögzíti az új verziót, és a még el nem készült indexek
+        már az átkódolt tartalomból épülnek fel.
+        
+        :param batch_size: Ennyi oldal kerül egy kötegelt mentésbe
+        :return: Az átkódolt oldalak száma (0, ha nincs teendő)
+        """
+        if self._content_format() >= content_codec.FORMAT_VERSION:
+            return 0
+        
+        pages = self.list_pages()
+        migrated = 0
+        for start in range(0, len(pages), batch_size):
+            converted = []
+            for page in pages[start:start + batch_size]:
+                try:
+                    stored = self._read_rows(page)
+                except Exception as e:
+                    print(f"Hiba a(z) doc{page} átkódolása során: {e}")
+                    continue
+                rows = [dict(row) for row in stored]
+                for row in rows:
+                    if not self._is_active_type(row['type']):
+                        row['content'] = content_codec.legacy_decode(row['content'])
+                self._escape_rows(rows)
+                if rows != stored:
+                    converted.append((page, rows))
+            if converted:
+                self.store_pages(converted)
+                migrated += len(converted)
+        
+        self._write_content_format()
+        self.content_migration_pending = False
+        if migrated:
+            print(f"{migrated} oldal átkódolva a(z) {content_codec.FORMAT_VERSION}. tartalom kódolásra")
+        self.build_missing_indexes()
+        return migrated
+
+    def migrate_picture_references(self, batch_size=200):
+        """
+        A régi PICTURE hivatkozások (abszolút útvonal vagy pictures/pic{oid}.png) áthelyezése a képtárba
+        
+        Explicit lépés (python migrate.py): az oldalak betöltése nem importál
+        fájlt. A relatív útvonal az alkalmazás könyvtárához képest értendő. A
+        képtárra már mutató elemek változatlanok, így a lépés megismételhető;
+        a hiányzó képre mutató elem is változatlan marad. A módosított oldalak
+        a store_pages hívással mentődnek, így a picture_refs is frissül.
+        
+        :param batch_size: Ennyi oldal kerül egy kötegelt mentésbe
+        :return: A módosított oldalak száma
+        """
+        active = self._is_active_type('PICTURE')
+        pages = self.list_pages()
+        migrated = 0
+        for start in range(0, len(pages), batch_size):
+            converted = []
+            for page in pages[start:start + batch_size]:
+                try:
+                    stored = self._read_rows(page)
+                except Exception as e:
+                    print(f"Hiba a(z) doc{page} képeinek áthelyezése során: {e}")
+                    continue
+                rows = None
+                for i, row in enumerate(stored):
+                    if row['type'] != 'PICTURE':
+                        continue
+                    path = row['content'] if active else self.unescape_content(row['content'])
+                    if not path or self.picture_store.contains(path):
+                        continue
+                    try:
+                        reference = self.picture_store.import_file(os.path.join(self.base_path, path))
+                    except OSError as e:
+                        print(f"Hiba a(z) doc{page} {row['oid']} elemének képe nem helyezhető át: {e}")
+                        continue
+                    if rows is None:
+                        rows = [dict(stored_row) for stored_row in stored]
+                    rows[i]['content'] = reference if active else self.escape_content(reference)
+                if rows is not None:
+                    converted.append((page, rows))
+            if converted:
+                self.store_pages(converted)
+                migrated += len(converted)
+        return migrated
+
+    def list_pages(self):
+        """
+        Az összes tárolt oldal azonosítója
+        
+        :return: Oldal azonosítók listája
+        """
+        return self.page_store.list_pages()
+
+    def search(self, query, limit=20):
+        """
+        Teljes szöveges keresés az összes oldal elemeiben
+        
+        :param query: A keresett szavak vagy "kifejezés"
+        :param limit: A találatok maximális száma
+        :return: Találatok listája (page, element, score, snippet, title)
+        """
+        try:
+            results = self.search_index.search(query, limit)
+        except Exception as e:
+            print(f"Hiba a keresés során: {e}")
+            return []
+        for result in results:
+            result['title'] = self.site_index.title(result['page'])
+        return results
+
+    def rebuild_search_index(self):
+        """
+        A keresési index teljes újraépítése az összes oldalból
+        
+        :return: Az indexelt oldalak száma
+        """
+        def pages():
+            for page in self.list_pages():
+                try:
+                    yield page, self._read_rows(page)
+                except Exception as e:
+                    print(f"Hiba a(z) doc{page} indexelése során: {e}")
+        
+        return self.search_index.replace_all(pages())
+
+    def rebuild_picture_references(self):
+        """
+        A képtár hivatkozás számlálóinak újraszámolása az összes oldalból
+        
+        :return: A feldolgozott oldalak száma
+        """
+        def pages():
+            for page in self.list_pages():
+                try:
+                    yield page, self._read_rows(page)
+                except Exception as e:
+                    print(f"Hiba a(z) doc{page} feldolgozása során: {e}")
+        
+        return self.picture_store.replace_all(pages())
+
+    def rebuild_site_index(self, workers=None):
+        """
+        Az oldal index teljes újraépítése
+        
+        CSV tárolásnál a dokumentum könyvtár fájljait párhuzamosan dolgozza
+        fel, majd a még össze nem vont naplóval rendelkező oldalakat
+        újraindexeli; a többi tárolónál az oldalakat egymás után olvassa.
+        
+        :param workers: A munkafolyamatok száma (alapértelmezett: CPU magok száma)
+        :return: Az indexelt oldalak száma
+        """
+        if not isinstance(self.page_store, CSVPageStore):
+            count = self.site_index.replace_all(
+                (page, page_entry(self._read_rows(page))) for page in self.page_store.list_pages()
+            )
+            self.rebuild_hierarchy()
+            return count
+        
+        count = self.site_index.rebuild(self.page_store.pages_dir, workers)
+        for log_file in glob.glob(os.path.join(self.pages_dir, "doc*.log")):
+            page = os.path.basename(log_file)[3:-4]
+            try:
+                self.site_index.update_page(page, self._read_rows(page))
+            except FileNotFoundError:
+                pass
+        self.rebuild_hierarchy()
+        return count
+
+    def rebuild_hierarchy(self):
+        """
+        Az oldal hierarchia újraszámolása az oldal index szülő adataiból
+        
+        :return: A hierarchiában szereplő oldalak száma
+        """
+        return self.hierarchy.rebuild(
+            {page: self.site_index.parent(page) for page in self.site_index.pages()}
+        )
+
+    def rebuild_dependencies(self):
+        """
+        Az oldalak közötti függőségi gráf újraépítése az összes oldalból
+        
+        :return: A feldolgozott oldalak száma
+        """
+        def pages():
+            for page in self.list_pages():
+                try:
+                    yield page, self._read_rows(page)
+                except Exception as e:
+                    print(f"Hiba a(z) doc{page} feldolgozása során: {e}")
+        
+        return self.dependency_graph.rebuild(pages())
+
+    def _update_hierarchy(self, pages):
+        """
+        Az oldalak szülőjének átvezetése a hierarchiába, ha megváltozott
+        
+        :param pages: Az oldalak azonosítói (a szülők előbb szerepeljenek)
+        """
+        try:
+            self.hierarchy.set_parents((page, self.site_index.parent(page)) for page in pages)
+        except ValueError as e:
+            print(f"Hiba a hierarchia frissítése során: {e}")
+
     def load_list_elements(self):
         """Lista elemek betöltése a lists.csv fájlból"""
         try:
             csv_path = os.path.join(self.base_path, "lists.csv")
-            df = pd.read_csv(csv_path, dtype=str)  # Minden mezőt string típusként olvasunk
+            with open(csv_path, 'r', encoding='utf-8', newline='') as csvfile:
+                rows = list(csv.DictReader(csvfile))  # Minden mező string
             
-            # Lista elemek betöltése a DataFrame-ből
+            # Lista elemek betöltése a CSV sorokból
             self.list_elements = []
-            for _, row in df.iterrows():
+            for row in rows:
                 list_element = {
                     'listname': row['listname'],
                     'elementID': row['elementID'],
@@ -376,26 +1064,7 @@ class DocumentManager:
         Speciális karakterek escape-elése page elemekhez.
         A soremelés karaktereket eltávolítja, minden más escape-elés ugyanúgy működik.
         """
-        if not content:
-            return content
-            
-        # Először eltávolítjuk a soremelés karakterek minden prezentációs módját
-        content = content.replace('\n', ' ').replace('\r', ' ').replace('\\n', ' ').replace('\\r', ' ')
-            
-        # HTML karakterek escape-elése
-        replacements = {
-            '\t': '\\t',    # Tab
-            '<': '&lt;',    # HTML tag kezdete
-            '>': '&gt;',    # HTML tag vége
-            '&': '&amp;',   # HTML és karakter
-            '"': '&quot;',  # Idézőjel
-            "'": '&apos;',  # Aposztróf
-        }
-        
-        result = content
-        for original, escaped in replacements.items():
-            result = result.replace(original, escaped)
-        return result
+        return content_codec.encode_page(content)
 
 # Példa használat
 if __name__ == "__main__":
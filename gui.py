@@ -6,7 +6,7 @@ warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QScrollArea, QTableWidget, QTableWidgetItem,
+    QPushButton, QLabel, QScrollArea, QTableView, QAbstractItemView,
     QDialog, QFormLayout, QLineEdit, QSpinBox, QComboBox, QListWidget,
     QListWidgetItem, QGroupBox, QGridLayout, QFileDialog, QTextEdit,
     QSizePolicy, QSpacerItem, QStackedWidget, QHeaderView, QTreeWidget, 
@@ -17,7 +17,10 @@ from PyQt5.QtGui import QFont
 from document_manager import DocumentManager
 from config_manager import ConfigManager
 from translations import Translator
-from models import ShowActiveElement, DocumentElement, DocumentElementType, DocumentElementStatus
+from models import DocumentElement, DocumentElementType, DocumentElementStatus
+from widgets import ElementButtonDelegate, ElementDelegate, ElementTableModel
+from thumbnail_cache import ThumbnailCache
+import ordering
 
 class ClickableLabel(QLabel):
     clicked = pyqtSignal(str)  # Signal a kattintás eseményhez
@@ -44,20 +47,6 @@ class ClickableLabel(QLabel):
         menu = context_menu.create_menu(event)
         menu.exec_(event.globalPos())
 
-class ElementGroupBox(QGroupBox):
-    """Elem megjelenítő doboz kontextus menüvel"""
-    
-    def __init__(self, title, parent, element, doc_manager):
-        super().__init__(title)
-        self.parent = parent
-        self.element = element
-        self.doc_manager = doc_manager
-        
-    def contextMenuEvent(self, event):
-        context_menu = ElementContextMenu(self.parent, self.element, self.doc_manager)
-        menu = context_menu.create_menu(event)
-        menu.exec_(event.globalPos())
-
 class ElementEditorDialog(QDialog):
     def __init__(self, parent=None, doc_info=None):
         super().__init__(parent)
@@ -179,25 +168,20 @@ class ElementEditorDialog(QDialog):
         geometry = type_geometries.get(self.selected_type)
         
         if geometry:
-            # Slot-ok feldolgozása
-            slot_ids = geometry.slot_ids.split('#>')
-            slot_names = geometry.slot_names.split('#>')
-            slot_types = geometry.slot_types.split('#>')
-            slot_defaults = geometry.slot_defaults.split('#>') if geometry.slot_defaults else []
+            # Slot-ok: a betöltéskor lefordított leírásból
+            schema = geometry.schema
             
             # Ha ez egy létező elem szerkesztése
             existing_values = {}
             if hasattr(self, 'doc_info') and self.doc_info:
                 element = self.doc_info.get('element')
                 if element:
-                    # A content mező unescapelése
+                    # A content mező unescapelése és slot értékekre bontása
                     content = self.doc_manager.unescape_content(element.content) if element.content else ""
-                    existing_values = {'content': content}
+                    existing_values = schema.as_dict(content)
             
             # Mezők létrehozása minden slot-hoz
-            for i, (slot_id, slot_name, slot_type) in enumerate(zip(slot_ids, slot_names, slot_types)):
-                slot_default = slot_defaults[i] if i < len(slot_defaults) else ""
-                
+            for slot_id, slot_name, slot_type, slot_default in schema.slots:
                 # Ha van létező érték, azt használjuk alapértelmezettként
                 if slot_id in existing_values:
                     slot_default = existing_values[slot_id]
@@ -335,78 +319,37 @@ class ElementEditorDialog(QDialog):
         config_manager = self.parent.config_manager
         
         # Next OID kezelése
-        next_oid = config_manager.get_state('next_oid', '1')
-        config_manager.set_state('next_oid', str(int(next_oid) + 1))
+        next_oid = config_manager.allocate_oid()
         
         # Elem típusának neve (pl. "TEXT", "BOLDTEXT")
         type_name = element_type.type_id
         
-        # Position konvertálása int típusra és növelése
-        insert_position = int(self.position) + 1
-        
         # Új elem létrehozása
-        from models import DocumentElement, DocumentElementType, DocumentElementStatus
+        from models import DocumentElement, DocumentElementStatus
+        schema = self.doc_manager.get_type_geometries()[element_type].schema
         new_element = DocumentElement(
             name=f"{type_name}{next_oid}",
-            content="#>".join(values.values()),
+            content=schema.join(values),
             element_type=element_type,
             status=DocumentElementStatus.NEW,
             pid=self.doc_info['elements'][0].get('pid', '1') if self.doc_info['elements'] else "1",
-            position=insert_position
+            oid=str(next_oid)
         )
+        if type_name == "PICTURE":
+            # A kiválasztott kép a képtárba kerül, a tartalom a képtárbeli hivatkozás
+            try:
+                new_element.handle_picture(new_element.content)
+            except (FileNotFoundError, ValueError) as e:
+                print(f"Hiba: {str(e)}")
+                return
         
-        # Az oid manuális beállítása
-        new_element.oid = str(next_oid)
-        
-        # Position értékek módosítása a dokumentumban
-        elements = []
-        for element_dict in self.doc_info['elements']:
-            # DocumentElement objektum létrehozása a szótárból
-            element = DocumentElement(
-                name=element_dict['name'],
-                content=element_dict['content'],
-                element_type=DocumentElementType.get(element_dict['type']),
-                status=DocumentElementStatus[element_dict['status']],
-                pid=element_dict['pid'],
-                position=int(element_dict['position'])
-            )
-            element.oid = element_dict['oid']
-            
-            # Ha az elem pozíciója nagyobb vagy egyenlő az új elem pozíciójával,
-            # növeljük eggyel
-            if element.position >= insert_position:
-                element.position += 1
-                
-            elements.append(element)
-        
-        # Új elem beszúrása
-        elements.append(new_element)
+        # Az új elem a kiválasztott elem után, a hézagba kerül; a többi elem
+        # pozíciója csak akkor változik, ha a hézag elfogyott (újrasorszámozás)
+        rows = self.doc_info['elements'] + self.doc_info.get('path', []) + self.doc_info.get('subpages', [])
+        anchor = next((row for row in rows if str(row['position']) == str(self.position)), None)
+        changed = ordering.reposition(rows, new_element, after=anchor)
         
-        # Path és Subpages elemek pozíciójának növelése
-        if 'path' in self.doc_info:
-            for path_element in self.doc_info['path']:
-                path_element['position'] = str(int(path_element['position']) + 1)
-                
-        if 'subpages' in self.doc_info:
-            for subpage_element in self.doc_info['subpages']:
-                subpage_element['position'] = str(int(subpage_element['position']) + 1)
-        
-        # Dokumentum mentése előtt rendezzük a listákat position szerint
-        elements.sort(key=lambda x: x.position)
-        if 'path' in self.doc_info:
-            self.doc_info['path'].sort(key=lambda x: int(x['position']))
-        if 'subpages' in self.doc_info:
-            self.doc_info['subpages'].sort(key=lambda x: int(x['position']))
-        
-        # Dokumentum mentése
-        self.doc_manager.write_document({
-            'oid': self.doc_info['oid'],
-            'name': self.doc_info['name'],
-            'elements': elements,
-            'path': self.doc_info.get('path', []),
-            'subpages': self.doc_info.get('subpages', [])
-        })
-                
+        self.doc_manager.apply_changes(self.doc_info['oid'], 'insert', changed)
         
         # Dialog bezárása
         self.accept()
@@ -493,24 +436,29 @@ class AddSubPage(QDialog):
         try:
             config_manager = self.parent.config_manager
             
-            # 1. Hivatkozás létrehozása
-            link_oid = config_manager.get_state('next_oid', '1')
-            config_manager.set_state('next_oid', str(int(link_oid) + 1))
-            
             # Maximum pozíció meghatározása
-            max_path_pos = max([int(p['position']) for p in self.doc_info.get('path', []) if 'position' in p] or [0])
-            max_subpages_pos = max([int(p['position']) for p in self.doc_info.get('subpages', []) if 'position' in p] or [0])
-            new_position = max(max_path_pos, max_subpages_pos) + 1
+            new_position = ordering.next_position(
+                self.doc_info.get('elements', []) + self.doc_info.get('path', []) + self.doc_info.get('subpages', [])
+            )
             
             # Új subpage elem létrehozása
             new_page_name = self.name_input.text()
             if not new_page_name:
                 return
-                
+            
+            # Az összes szükséges OID lefoglalása egyetlen hívással:
+            # hivatkozás, új oldal, a másolt path elemek és az új path elem
+            path_elements = self.doc_info.get('path', [])
+            oids = config_manager.allocate_oids(3 + len(path_elements))
+            link_oid, page_oid = oids[0], oids[1]
+            path_oids = oids[2:-1]
+            new_path_oid = oids[-1]
+            
+            # 1. Hivatkozás létrehozása
             new_subpage = {
                 'oid': link_oid,
                 'name': f"PAGE{link_oid}",
-                'content': f"{str(int(link_oid) + 1)}#>{self.doc_manager.escape_page(new_page_name)}",
+                'content': f"{page_oid}#>{new_page_name}",
                 'type': "PAGE",
                 'status': "NEW",
                 'pid': self.doc_info['oid'],
@@ -523,57 +471,48 @@ class AddSubPage(QDialog):
             self.doc_info['subpages'].append(new_subpage)
             
             # Dokumentum mentése előtt rendezzük a listákat position szerint
-            self.doc_info['subpages'].sort(key=lambda x: int(x['position']))
+            self.doc_info['subpages'].sort(key=ordering.get_position)
             if 'path' in self.doc_info:
-                self.doc_info['path'].sort(key=lambda x: int(x['position']))
+                self.doc_info['path'].sort(key=ordering.get_position)
             
             # Dokumentum mentése
             if self.doc_manager.write_document(self.doc_info):
                 # 2. Új dokumentum létrehozása TITLE elemmel
-                page_oid = config_manager.get_state('next_oid', '1')
-                config_manager.set_state('next_oid', str(int(page_oid) + 1))
-                
                 new_doc_info = {
                     'oid': page_oid,
                     'name': f"doc{page_oid}",
                     'elements': [{
                         'oid': page_oid,
                         'name': f"TITLE{page_oid}",
-                        'content': self.doc_manager.escape_page(new_page_name),
+                        'content': new_page_name,
                         'type': "TITLE",
                         'status': "NEW",
                         'pid': self.doc_info['oid'],
-                        'position': "1"
+                        'position': str(ordering.position_at(0))
                     }],
                     'subpages': [],
                     'path': []
                 }
                 
                 # 3. Path elemek másolása új OID-kkal
-                position_counter = 2  # TITLE után kezdjük
+                position_counter = 1  # TITLE után kezdjük
                 if 'path' in self.doc_info:
-                    for path_elem in self.doc_info['path']:
-                        new_oid = config_manager.get_state('next_oid', '1')
-                        config_manager.set_state('next_oid', str(int(new_oid) + 1))
-                        
+                    for path_elem, new_oid in zip(self.doc_info['path'], path_oids):
                         new_path_elem = path_elem.copy()
                         new_path_elem['oid'] = new_oid
-                        new_path_elem['position'] = str(position_counter)
+                        new_path_elem['position'] = str(ordering.position_at(position_counter))
                         position_counter += 1
                         new_doc_info['path'].append(new_path_elem)
                 
                 # 4. Új path elem hozzáadása
-                new_path_oid = config_manager.get_state('next_oid', '1')
-                config_manager.set_state('next_oid', str(int(new_path_oid) + 1))
-                
                 new_path = {
                     'oid': new_path_oid,
                     'name': f"PATH{page_oid}",
-                    'content': f"{page_oid}#>{self.doc_manager.escape_page(new_page_name)}",
+                    'content': f"{page_oid}#>{new_page_name}",
                     'type': "PATH",
                     'status': "NEW",
                     'pid': self.doc_info['oid'],
-                    'position': str(position_counter)
+                    'position': str(ordering.position_at(position_counter))
                 }
                 new_doc_info['path'].append(new_path)
                 
@@ -722,27 +661,23 @@ class ElementContextMenu:
     def save_and_refresh(self):
         """Dokumentum mentése és újratöltése"""
         # Az elem státuszának módosítása a megfelelő listában
+        changed = None
         if self.called_from == 'elements':
             for element in self.parent.doc_info['elements']:
                 if element['oid'] == self.element['oid']:
                     element['status'] = self.element['status']
+                    changed = element
                     break
         elif self.called_from == 'subpages':
             for subpage in self.parent.doc_info['subpages']:
                 if subpage['oid'] == self.element['oid']:
                     subpage['status'] = self.element['status']
+                    changed = subpage
                     break
-                    
-        # Dokumentum mentése előtt rendezzük a listákat position szerint
-        if 'elements' in self.parent.doc_info:
-            self.parent.doc_info['elements'].sort(key=lambda x: int(x['position']))
-        if 'path' in self.parent.doc_info:
-            self.parent.doc_info['path'].sort(key=lambda x: int(x['position']))
-        if 'subpages' in self.parent.doc_info:
-            self.parent.doc_info['subpages'].sort(key=lambda x: int(x['position']))
-        
-        # Dokumentum mentése
-        self.doc_manager.write_document(self.parent.doc_info)
+        
+        # Csak a módosított elem kerül a naplóba
+        if changed is not None:
+            self.doc_manager.apply_changes(self.parent.doc_info['oid'], 'status', [changed])
         # Csak az oid-t adjuk át
         self.parent.load_initial_document(str(self.parent.doc_info['oid']))
 
@@ -762,8 +697,19 @@ class VanDoorMainWindow(QMainWindow):
         super().__init__()
         self.config_manager = ConfigManager()
         self.translator = Translator(self.config_manager.get_state('current_language', 'hu'))
-        self.doc_manager = DocumentManager()
-        self.element_buttons = []  # Gombok tárolása a nyelvváltáshoz
+        self.doc_manager = DocumentManager(self.config_manager)
+        # Egyszeri adat migráció: a régi kódolású oldalak átkódolása, mielőtt bármi megjelenne
+        if self.doc_manager.content_migration_pending:
+            self.doc_manager.migrate_content_format()
+        
+        # PICTURE elemek bélyegképei: háttérszálon készülnek, lemezen és memóriában gyorsítótárazva
+        thumbnail_config = self.config_manager.get_config('ui.thumbnails', {})
+        self.thumbnail_size = thumbnail_config.get('size', 160)
+        self.thumbnail_cache = ThumbnailCache(
+            os.path.join(self.doc_manager.base_path, thumbnail_config.get('cache_dir', "pictures/thumbnails")),
+            thumbnail_config.get('disk_cache_mb', 64) * 1024 * 1024,
+            thumbnail_config.get('memory_cache_mb', 16) * 1024 * 1024
+        )
         self.disabled_positions = {
             'up': set(),    # Felfelé mozgatás tiltott pozíciói
             'down': set(),  # Lefelé mozgatás tiltott pozíciói
@@ -898,15 +844,41 @@ class VanDoorMainWindow(QMainWindow):
         toolbar_layout.addWidget(self.bookmark_label)
         toolbar_layout.addStretch()
         
+        # Teljes szöveges keresés
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText(self.translator.get_text('search'))
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.returnPressed.connect(self.handle_search)
+        toolbar_layout.addWidget(self.search_input)
+        
         # Gombok eseménykezelőinek beállítása
         self.save_bookmark_btn.clicked.connect(self.save_current_as_bookmark)
         self.load_bookmark_btn.clicked.connect(self.load_bookmark)
         
-        # Elemek táblázat
-        self.elements_table = QTableWidget()
-        self.elements_table.setColumnCount(2)
+        # Elemek táblázat: modell és delegáltak, widgetek nélkül, csak a látható sorok rajzolódnak
+        self.elements_model = ElementTableModel(self.STATUS_COLORS, self.disabled_positions)
+        self.elements_table = QTableView()
+        self.elements_table.setModel(self.elements_model)
         self.elements_table.horizontalHeader().setVisible(False)
         self.elements_table.verticalHeader().setVisible(False)
+        self.elements_table.setSelectionMode(QAbstractItemView.NoSelection)
+        self.elements_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.elements_table.setFocusPolicy(Qt.NoFocus)
+        self.elements_table.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.elements_table.setItemDelegateForColumn(
+            ElementTableModel.CONTENT_COLUMN,
+            ElementDelegate(self.doc_manager, self.thumbnail_size, self.thumbnail_cache, self.elements_table)
+        )
+        self.button_delegate = ElementButtonDelegate(self.elements_model, self.element_button_texts(), self.elements_table)
+        self.button_delegate.clicked.connect(self.handle_element_button_click)
+        self.elements_table.setItemDelegateForColumn(ElementTableModel.BUTTONS_COLUMN, self.button_delegate)
+        self.elements_table.verticalHeader().setDefaultSectionSize(self.button_delegate.row_height())
+        self.elements_table.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.elements_table.customContextMenuRequested.connect(self.show_element_context_menu)
+        
+        # A sorok magassága csak láthatóvá váláskor mérődik (lásd fit_visible_rows)
+        self.fitted_rows = set()
+        self.elements_table.verticalScrollBar().valueChanged.connect(self.fit_visible_rows)
         
         right_layout.addWidget(toolbar)
         right_layout.addWidget(self.elements_table)
@@ -939,60 +911,55 @@ class VanDoorMainWindow(QMainWindow):
         # Kezdeti dokumentum betöltése
         self.load_initial_document()
     
-    def create_element_buttons(self, row, total_elements, element):
-        """Elem gombok létrehozása"""
-        button_widget = QWidget()
-        button_layout = QVBoxLayout(button_widget)
-        button_layout.setContentsMargins(0, 0, 0, 0)
-        
-        # Gombok létrehozása
-        up_button = QPushButton(self.translator.get_text('move_up'))
-        new_button = QPushButton(self.translator.get_text('new_element'))
-        down_button = QPushButton(self.translator.get_text('move_down'))
-        
-        # Position tulajdonság beállítása
-        position = str(element.get('position', ''))  # Biztosítjuk, hogy string legyen
-        up_button.position = position
-        new_button.position = position  # Ez is kell
-        down_button.position = position
-        
-        # Gombok eseménykezelőinek beállítása
-        up_button.clicked.connect(lambda: self.handle_up_button_click(position))
-        new_button.clicked.connect(lambda: self.handle_new_button_click(position, row))
-        down_button.clicked.connect(lambda: self.handle_down_button_click(position))
-        
-        # Gombok engedélyezése/tiltása
-        up_button.setEnabled(row > 0 and position not in self.disabled_positions['up'])
-        new_button.setEnabled(position not in self.disabled_positions['new'])
-        down_button.setEnabled(row < total_elements - 1 and position not in self.disabled_positions['down'])
-        
-        # Gombok hozzáadása a layouthoz
-        button_layout.addWidget(up_button)
-        button_layout.addWidget(new_button)
-        button_layout.addWidget(down_button)
-        
-        # Gombok tárolása a későbbi frissítéshez
-        self.element_buttons.append((up_button, new_button, down_button))
+    def element_button_texts(self):
+        """Az elem gombok feliratai az aktuális nyelven"""
+        return {
+            'up': self.translator.get_text('move_up'),
+            'new': self.translator.get_text('new_element'),
+            'down': self.translator.get_text('move_down')
+        }
+
+    def handle_element_button_click(self, button, row):
+        """Elem gomb (fel, új, le) kattintás kezelése"""
+        position = str(self.elements_model.element(row).get('position', ''))
+        if button == 'up':
+            self.handle_up_button_click(position)
+        elif button == 'new':
+            self.handle_new_button_click(position, row)
+        elif button == 'down':
+            self.handle_down_button_click(position)
+
+    def show_element_context_menu(self, pos):
+        """Elem kontextus menü a tartalom oszlopban"""
+        index = self.elements_table.indexAt(pos)
+        if not index.isValid() or index.column() != ElementTableModel.CONTENT_COLUMN:
+            return
+        context_menu = ElementContextMenu(self, self.elements_model.element(index.row()), self.doc_manager)
+        menu = context_menu.create_menu(None)
+        menu.exec_(self.elements_table.viewport().mapToGlobal(pos))
+
+    def fit_visible_rows(self):
+        """
+        A látható sorok magasságának igazítása a tartalomhoz
         
-        return button_widget
+        Csak a még nem mért, látható sorok mérődnek, így a megnyitás ideje
+        nem függ az oldal elemeinek számától.
+        """
+        table = self.elements_table
+        row = table.rowAt(0)
+        if row < 0:
+            return
+        row_count = self.elements_model.rowCount()
+        bottom = table.viewport().height()
+        while row < row_count and table.rowViewportPosition(row) < bottom:
+            if row not in self.fitted_rows:
+                self.fitted_rows.add(row)
+                table.resizeRowToContents(row)
+            row += 1
 
     def update_button_states(self):
-        """Gombok állapotának frissítése"""        
-        for up_button, new_button, down_button in self.element_buttons[:]:  # Másolaton iterálunk
-            if up_button and up_button.parent() is not None:
-                position = str(up_button.position)  # Biztosítjuk, hogy string legyen
-                row = int(position) - 1
-                total_elements = len(self.doc_info['elements'])
-                
-                # Alap engedélyezés/tiltás pozíció alapján
-                up_enabled = row > 0 and position not in self.disabled_positions['up']
-                down_enabled = row < total_elements - 1 and position not in self.disabled_positions['down']
-                new_enabled = position not in self.disabled_positions['new']
-                               
-                
-                up_button.setEnabled(up_enabled)
-                new_button.setEnabled(new_enabled)
-                down_button.setEnabled(down_enabled)
+        """Gombok állapotának frissítése"""
+        self.elements_model.refresh_buttons()
 
     def temporarily_disable_position(self, position, button_type, seconds=5):
         """Pozíció ideiglenes letiltása adott gomb típusra"""
@@ -1049,7 +1016,7 @@ class VanDoorMainWindow(QMainWindow):
             for i in reversed(range(self.subpage_elements_layout.count())): 
                 self.subpage_elements_layout.itemAt(i).widget().setParent(None)
             for subpage in current_doc.get('subpages', []):
-                content = self.doc_manager.unescape_content(str(subpage['content']))  # Unescape-elés
+                content = str(subpage['content'])  # A read_document már visszaalakította
                 page, title = content.split('#>')
                 label = ClickableLabel(title, content, subpage, self, self.doc_manager)
                 label.clicked.connect(self.handle_path_click)  # Ugyanazt a handlert használjuk
@@ -1105,8 +1072,12 @@ class VanDoorMainWindow(QMainWindow):
             table_config = self.config_manager.get_config('ui.table', {})
             content_width = int(table_width * table_config.get('content_column_width_percent', 80) / 100)
             buttons_width = int(table_width * table_config.get('buttons_column_width_percent', 15) / 100)
-            self.elements_table.setColumnWidth(0, content_width)
-            self.elements_table.setColumnWidth(1, buttons_width)
+            if (content_width, buttons_width) != (self.elements_table.columnWidth(0), self.elements_table.columnWidth(1)):
+                self.elements_table.setColumnWidth(0, content_width)
+                self.elements_table.setColumnWidth(1, buttons_width)
+                # Más szélességnél a sorok tördelése is más: újramérés
+                self.fitted_rows.clear()
+            self.fit_visible_rows()
     
     def change_language(self, language):
         """Nyelv váltása"""
@@ -1130,18 +1101,8 @@ class VanDoorMainWindow(QMainWindow):
         self.update_bookmark_label()
         self.subpages_label.setText(self.translator.get_text('subpages'))
         self.new_subpage_btn.setText(self.translator.get_text('new_subpage'))
-        
-        # Elem gombok szövegeinek frissítése csak ha vannak még gombok
-        if hasattr(self, 'element_buttons'):
-            for buttons in self.element_buttons[:]:  # Másolaton iterálunk
-                try:
-                    up_btn, new_btn, down_btn = buttons
-                    up_btn.setText(self.translator.get_text('move_up'))
-                    new_btn.setText(self.translator.get_text('new_element'))
-                    down_btn.setText(self.translator.get_text('move_down'))
-                except RuntimeError:
-                    # Ha valamelyik gomb már törölve van, eltávolítjuk a listából
-                    self.element_buttons.remove(buttons)
+        self.search_input.setPlaceholderText(self.translator.get_text('search'))
+        self.button_delegate.set_texts(self.element_button_texts())
     
     def update_bookmark_label(self):
         """Könyvjelző címke frissítése"""
@@ -1150,66 +1111,26 @@ class VanDoorMainWindow(QMainWindow):
     
     def load_initial_document(self, page="1", title="VanDoor Test Page"):
         """Kezdeti dokumentum betöltése"""
+        page_changed = str(page) != str(getattr(self, 'current_page', None))
         self.current_page = page
         self.current_title = title
         
         # Dokumentum betöltése
         self.doc_info = self.doc_manager.read_document(page)
         
-        # Töröljük a régi elemeket
-        self.elements_table.setRowCount(0)
-        self.element_buttons.clear()
-        
-        if self.doc_info and 'elements' in self.doc_info:
-            elements = self.doc_info['elements']
-            # Táblázat sorainak beállítása
-            self.elements_table.setRowCount(len(elements))
-            
-            # Keressük meg az első TITLE típusú elemet
-            title_found = False
-            
-            # Táblázat feltöltése
-            for row, element in enumerate(elements):
-                # Ha ez az első TITLE típusú elem, beállítjuk az ablak címét és a top panel címét
-                if not title_found and element['type'] == 'TITLE':
-                    self.update_window_title(str(element['content']))
-                    self.title_label.setText(str(element['content']))
-                    title_found = True
-                
-                # Első oszlop: GroupBox
-                group_box = ElementGroupBox(f"{element['oid']}: {element['name']} ({element['type']})", self, element, self.doc_manager)
-                
-                # Háttérszín beállítása status alapján
-                bg_color = self.STATUS_COLORS.get(element['status'], '#ffffff')  # alapértelmezett: fehér
-                group_box.setStyleSheet(f"QGroupBox {{ background-color: {bg_color}; }}")
-                
-                group_box_layout = QVBoxLayout(group_box)
-                
-                # Content megjelenítése az isactive flag alapján
-                if element.get('isactive', True) and element['type'] == 'SIGNATURE':
-                    content_widget = ShowActiveElement.create_widget(
-                        element['type'],
-                        self.doc_manager.unescape_content(str(element['content'])),
-                        self.doc_manager
-                    )
-                    if content_widget:
-                        group_box_layout.addWidget(content_widget)
-                else:
-                    content_label = QLabel(self.doc_manager.unescape_content(str(element['content'])))
-                    content_label.setWordWrap(True)
-                    group_box_layout.addWidget(content_label)
-                
-                self.elements_table.setCellWidget(row, 0, group_box)
-                
-                # Második oszlop: Gombok
-                button_widget = self.create_element_buttons(row, len(elements), element)
-                self.elements_table.setCellWidget(row, 1, button_widget)
-                
-                # Dinamikus sormagasság beállítása
-                group_box_height = group_box.sizeHint().height()
-                button_height = button_widget.sizeHint().height()
-                row_height = max(group_box_height, button_height)
-                self.elements_table.setRowHeight(row, row_height)
+        # Elemek átadása a modellnek; a sorokat a delegáltak rajzolják
+        elements = self.doc_info['elements'] if self.doc_info and 'elements' in self.doc_info else []
+        self.elements_model.set_elements(elements)
+        if page_changed:
+            self.elements_table.scrollToTop()
+        self.fitted_rows.clear()
+        self.fit_visible_rows()
+        
+        # Az első TITLE típusú elem az ablak és a top panel címe
+        title_element = next((element for element in elements if element['type'] == 'TITLE'), None)
+        if title_element is not None:
+            self.update_window_title(str(title_element['content']))
+            self.title_label.setText(str(title_element['content']))
 
         # Path elemek frissítése
         # Először töröljük az összes elemet a path_layout-ból
@@ -1220,9 +1141,9 @@ class VanDoorMainWindow(QMainWindow):
         
         # Path elemek hozzáadása
         if self.doc_info and 'path' in self.doc_info:
-            sorted_path = sorted(self.doc_info['path'], key=lambda x: x['position'])
+            sorted_path = ordering.sort_rows(self.doc_info['path'])
             for i, path_element in enumerate(sorted_path):
-                content = self.doc_manager.unescape_content(str(path_element['content']))  # Unescape-elés
+                content = str(path_element['content'])  # A read_document már visszaalakította
                 page, title = content.split('#>')
                 label = ClickableLabel(title, content)
                 label.clicked.connect(self.handle_path_click)
@@ -1237,7 +1158,7 @@ class VanDoorMainWindow(QMainWindow):
             for i in reversed(range(self.subpage_elements_layout.count())): 
                 self.subpage_elements_layout.itemAt(i).widget().setParent(None)
             for subpage in self.doc_info['subpages']:
-                content = self.doc_manager.unescape_content(str(subpage['content']))  # Unescape-elés
+                content = str(subpage['content'])  # A read_document már visszaalakította
                 page, title = content.split('#>')
                 label = ClickableLabel(title, content, subpage, self, self.doc_manager)
                 label.clicked.connect(self.handle_path_click)  # Ugyanazt a handlert használjuk
@@ -1246,76 +1167,75 @@ class VanDoorMainWindow(QMainWindow):
                 label.setStyleSheet(f"background-color: {bg_color};")
                 self.subpage_elements_layout.addWidget(label)
 
+    def handle_search(self):
+        """Keresés indítása és a találatok megjelenítése egy legördülő menüben"""
+        query = self.search_input.text().strip()
+        if not query:
+            return
+        
+        results = self.doc_manager.search(query)
+        
+        menu = QMenu(self)
+        menu.setStyleSheet("QMenu { menu-scrollable: 1; }")
+        if not results:
+            no_result_action = menu.addAction(self.translator.get_text('search_no_results'))
+            no_result_action.setEnabled(False)  # Nem kattintható
+        for result in results:
+            title = result['title'] or f"doc{result['page']}"
+            action = menu.addAction(f"{title}: {result['snippet']}")
+            action.triggered.connect(
+                lambda checked=False, page=result['page'], title=title: self.load_initial_document(page, title)
+            )
+        menu.exec_(self.search_input.mapToGlobal(self.search_input.rect().bottomLeft()))
+
     def handle_path_click(self, content):
         """PATH elem kattintás kezelése"""
         page, title = content.split('#>')
         self.load_initial_document(page, title)
 
+    def _page_rows(self):
+        """Az aktuális oldal összes sora (elemek, útvonal és aloldal hivatkozások)"""
+        return self.doc_info['elements'] + self.doc_info.get('path', []) + self.doc_info.get('subpages', [])
+
+    def _move_element(self, position, step):
+        """
+        Elem mozgatása a szomszédja elé vagy mögé
+        
+        Csak a mozgatott elem pozíciója változik (a szomszédok közötti hézagba
+        kerül), kivéve ha az oldal újrasorszámozása szükséges.
+        
+        :param position: Az elem jelenlegi pozíciója
+        :param step: -1 felfelé, 1 lefelé
+        """
+        elements = ordering.sort_rows(self.doc_info['elements'])
+        index = next(
+            (i for i, element in enumerate(elements) if str(element['position']) == str(position)), None
+        )
+        if index is None or not 0 <= index + step < len(elements):
+            return
+        
+        rows = self._page_rows()
+        neighbour = elements[index + step]
+        if step < 0:
+            changed = ordering.reposition(rows, elements[index], before=neighbour)
+        else:
+            changed = ordering.reposition(rows, elements[index], after=neighbour)
+        
+        self.doc_manager.apply_changes(self.doc_info['oid'], 'move', changed)
+        
+        # Dokumentum újratöltése
+        self.load_initial_document(
+            self.doc_info['oid'],
+            self.doc_info['name']
+        )
+
     def move_element_up(self, position):
         """
         Elem mozgatása felfelé
         
         :param position: Az elem jelenlegi pozíciója
         """
-        from models import DocumentElement, DocumentElementType, DocumentElementStatus
-        
-        # Position konvertálása int típusra
-        current_pos = int(position)
-        if current_pos <= 1:  # Az első elem nem mozgatható feljebb
-            return
-            
-        # Elemek listájának konvertálása DocumentElement objektumokká
-        elements = []
-        for element_dict in self.doc_info['elements']:
-            element_type = DocumentElementType.get(element_dict['type'])
-            if not element_type:
-                continue
-                
-            element = DocumentElement(
-                name=element_dict['name'],
-                content=element_dict['content'],
-                element_type=element_type,
-                status=DocumentElementStatus[element_dict['status']],
-                pid=element_dict['pid'],
-                position=int(element_dict['position'])
-            )
-            element.oid = element_dict['oid']
-            elements.append(element)
-                    
-        # A mozgatandó elem és az előtte lévő elem megkeresése
-        current_element = None
-        previous_element = None
-        for element in elements:
-            if element.position == current_pos:
-                current_element = element
-            elif element.position == current_pos - 1:
-                previous_element = element
-                
-        if current_element and previous_element:
-            # Pozíciók cseréje
-            current_element.position, previous_element.position = previous_element.position, current_element.position
-            
-            # Dokumentum mentése előtt rendezzük a listákat position szerint
-            elements.sort(key=lambda x: x.position)
-            if 'path' in self.doc_info:
-                self.doc_info['path'].sort(key=lambda x: int(x['position']))
-            if 'subpages' in self.doc_info:
-                self.doc_info['subpages'].sort(key=lambda x: int(x['position']))
-            
-            # Dokumentum mentése
-            self.doc_manager.write_document({
-                'oid': self.doc_info['oid'],
-                'name': self.doc_info['name'],
-                'elements': elements,
-                'path': self.doc_info['path'],
-                'subpages': self.doc_info['subpages']
-            })
-            
-            # Dokumentum újratöltése
-            self.load_initial_document(
-                self.doc_info['oid'],
-                self.doc_info['name']
-            )
+        self._move_element(position, -1)
             
     def move_element_down(self, position):
         """
@@ -1323,68 +1243,7 @@ class VanDoorMainWindow(QMainWindow):
         
         :param position: Az elem jelenlegi pozíciója
         """
-        from models import DocumentElement, DocumentElementType, DocumentElementStatus
-        
-        # Position konvertálása int típusra
-        current_pos = int(position)
-        
-        # Elemek listájának konvertálása DocumentElement objektumokká
-        elements = []
-        for element_dict in self.doc_info['elements']:
-            element_type = DocumentElementType.get(element_dict['type'])
-            if not element_type:
-                continue
-                
-            element = DocumentElement(
-                name=element_dict['name'],
-                content=element_dict['content'],
-                element_type=element_type,
-                status=DocumentElementStatus[element_dict['status']],
-                pid=element_dict['pid'],
-                position=int(element_dict['position'])
-            )
-            element.oid = element_dict['oid']
-            elements.append(element)
-            
-        # Ellenőrizzük, hogy nem az utolsó elem-e
-        max_position = max(element.position for element in elements)
-        if current_pos >= max_position:
-            return
-                    
-        # A mozgatandó elem és az utána következő elem megkeresése
-        current_element = None
-        next_element = None
-        for element in elements:
-            if element.position == current_pos:
-                current_element = element
-            elif element.position == current_pos + 1:
-                next_element = element
-                
-        if current_element and next_element:
-            # Pozíciók cseréje
-            current_element.position, next_element.position = next_element.position, current_element.position
-            
-            # Dokumentum mentése előtt rendezzük a listákat position szerint
-            elements.sort(key=lambda x: x.position)
-            if 'path' in self.doc_info:
-                self.doc_info['path'].sort(key=lambda x: int(x['position']))
-            if 'subpages' in self.doc_info:
-                self.doc_info['subpages'].sort(key=lambda x: int(x['position']))
-            
-            # Dokumentum mentése
-            self.doc_manager.write_document({
-                'oid': self.doc_info['oid'],
-                'name': self.doc_info['name'],
-                'elements': elements,
-                'path': self.doc_info['path'],
-                'subpages': self.doc_info['subpages']
-            })
-            
-            # Dokumentum újratöltése
-            self.load_initial_document(
-                self.doc_info['oid'],
-                self.doc_info['name']
-            )
+        self._move_element(position, 1)
             
     def add_new_element(self, row):
         """Új elem hozzáadása a kiválasztott sor után"""
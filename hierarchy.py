@@ -0,0 +1,249 @@
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class HierarchyService:
+    """Az oldal fa lekérdezései egy előre kiszámolt lezárt (closure) táblából.
+
+    A page_closure tábla minden (ős, leszármazott) párt tárol a távolságukkal
+    együtt (az oldal önmagának 0 távolságú őse), a page_subtree tábla pedig
+    az egyes részfák méretét. Mindkettőt a set_parent hívás tartja
+    naprakészen, így a lekérdezések egy-egy indexelt kereséssel válaszolnak,
+    rekurzív fájl olvasás nélkül."""
+
+    def __init__(self, db_path: str):
+        """
+        :param db_path: Az adatbázis elérési útja (az oldal indexszel közös lehet)
+        """
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS page_closure (
+                    ancestor TEXT NOT NULL,
+                    descendant TEXT NOT NULL,
+                    depth INTEGER NOT NULL,
+                    PRIMARY KEY (ancestor, descendant)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_page_closure_descendant
+                    ON page_closure(descendant, depth, ancestor);
+                CREATE INDEX IF NOT EXISTS idx_page_closure_ancestor_depth
+                    ON page_closure(ancestor, depth, descendant);
+                CREATE TABLE IF NOT EXISTS page_subtree (
+                    oid TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL
+                ) WITHOUT ROWID;
+            """)
+
+    def close(self):
+        """Adatbázis kapcsolat lezárása"""
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM page_subtree").fetchone()[0]
+
+    def __contains__(self, oid) -> bool:
+        return self.connection.execute(
+            "SELECT 1 FROM page_subtree WHERE oid = ?", (str(oid),)
+        ).fetchone() is not None
+
+    def _ensure_node(self, oid: str):
+        """Az oldal felvétele gyökérként, ha még nem szerepel"""
+        if oid not in self:
+            self.connection.execute(
+                "INSERT INTO page_closure (ancestor, descendant, depth) VALUES (?, ?, 0)", (oid, oid)
+            )
+            self.connection.execute("INSERT INTO page_subtree (oid, size) VALUES (?, 1)", (oid,))
+
+    def parent(self, oid: str) -> Optional[str]:
+        """A szülő oldal azonosítója (gyökérnél vagy ismeretlen oldalnál None)"""
+        row = self.connection.execute(
+            "SELECT ancestor FROM page_closure WHERE descendant = ? AND depth = 1", (str(oid),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_parent(self, oid: str, parent: Optional[str]):
+        """
+        Az oldal (és a teljes részfája) áthelyezése a megadott szülő alá
+
+        Ha a szülő nem változott, nem történik írás.
+
+        :param oid: Az oldal azonosítója
+        :param parent: Az új szülő azonosítója (None: gyökér oldal)
+        :raises ValueError: Ha a szülő az oldal saját leszármazottja lenne
+        """
+        with self.connection:
+            self._move(str(oid), None if parent is None else str(parent))
+
+    def set_parents(self, items: Iterable[Tuple[str, Optional[str]]]):
+        """
+        Több oldal szülőjének beállítása egyetlen tranzakcióban
+
+        Körkörös hivatkozásnál a teljes módosítás visszagörgetésre kerül.
+
+        :param items: (oid, szülő) párok, a szülők előbb szerepeljenek
+        :raises ValueError: Ha valamelyik szülő az oldal saját leszármazottja lenne
+        """
+        with self.connection:
+            for oid, parent in items:
+                self._move(str(oid), None if parent is None else str(parent))
+
+    def _move(self, oid: str, parent: Optional[str]):
+        """Az áthelyezés a folyamatban lévő tranzakción belül"""
+        if oid in self and self.parent(oid) == parent:
+            return
+        if parent is not None and self.connection.execute(
+            "SELECT 1 FROM page_closure WHERE ancestor = ? AND descendant = ?", (oid, parent)
+        ).fetchone():
+            raise ValueError(f"Körkörös hierarchia: a(z) {parent} oldal a(z) {oid} leszármazottja")
+
+        self._ensure_node(oid)
+        size = self.subtree_size(oid)
+
+        # Leválasztás a régi ősökről (a részfán belüli kapcsolatok maradnak)
+        old_ancestors = [
+            row[0] for row in self.connection.execute(
+                "SELECT ancestor FROM page_closure WHERE descendant = ? AND depth > 0", (oid,)
+            )
+        ]
+        if old_ancestors:
+            self.connection.execute("""
+                DELETE FROM page_closure
+                WHERE descendant IN (SELECT descendant FROM page_closure WHERE ancestor = ?)
+                  AND ancestor IN (SELECT ancestor FROM page_closure WHERE descendant = ? AND depth > 0)
+            """, (oid, oid))
+            self.connection.executemany(
+                "UPDATE page_subtree SET size = size - ? WHERE oid = ?",
+                [(size, ancestor) for ancestor in old_ancestors]
+            )
+
+        if parent is None:
+            return
+
+        # Bekötés az új szülő alá: minden új ős minden részfa elemhez
+        self._ensure_node(parent)
+        self.connection.execute("""
+            INSERT INTO page_closure (ancestor, descendant, depth)
+            SELECT up.ancestor, down.descendant, up.depth + down.depth + 1
+            FROM page_closure AS up, page_closure AS down
+            WHERE up.descendant = ? AND down.ancestor = ?
+        """, (parent, oid))
+        self.connection.execute("""
+            UPDATE page_subtree SET size = size + ?
+            WHERE oid IN (SELECT ancestor FROM page_closure WHERE descendant = ?)
+        """, (size, parent))
+
+    def rebuild(self, parents: Dict[str, Optional[str]]) -> int:
+        """
+        A lezárt tábla teljes újraszámolása egy oid -> szülő leképezésből
+
+        :param parents: Minden oldal szülője (gyökérnél None)
+        :return: Az oldalak száma
+        """
+        parents = {str(oid): (None if parent is None else str(parent)) for oid, parent in parents.items()}
+        for parent in list(parents.values()):
+            if parent is not None and parent not in parents:
+                parents[parent] = None
+
+        # Ősláncok memoizált kiszámolása (a legközelebbi ős elöl)
+        chains: Dict[str, List[str]] = {}
+        for start in parents:
+            stack = []
+            visited = set()
+            oid = start
+            while oid is not None and oid not in chains:
+                if oid in visited:
+                    # A kört az utolsó él elhagyásával szakítjuk meg
+                    print(f"Körkörös hierarchia a(z) {stack[-1]} oldalnál, a kör megszakítva")
+                    parents[stack[-1]] = None
+                    break
+                stack.append(oid)
+                visited.add(oid)
+                oid = parents[oid]
+            for node in reversed(stack):
+                parent = parents[node]
+                chains[node] = [] if parent is None else [parent] + chains[parent]
+
+        sizes = dict.fromkeys(chains, 1)
+        for chain in chains.values():
+            for ancestor in chain:
+                sizes[ancestor] += 1
+
+        with self.connection:
+            self.connection.execute("DELETE FROM page_closure")
+            self.connection.execute("DELETE FROM page_subtree")
+            self.connection.executemany(
+                "INSERT INTO page_closure (ancestor, descendant, depth) VALUES (?, ?, ?)",
+                (
+                    (ancestor, oid, depth)
+                    for oid, chain in chains.items()
+                    for depth, ancestor in enumerate([oid] + chain)
+                )
+            )
+            self.connection.executemany(
+                "INSERT INTO page_subtree (oid, size) VALUES (?, ?)", sizes.items()
+            )
+        return len(chains)
+
+    def ancestors(self, oid: str) -> List[str]:
+        """Az oldal ősei a gyökértől a közvetlen szülőig"""
+        return [
+            row[0] for row in self.connection.execute(
+                "SELECT ancestor FROM page_closure WHERE descendant = ? AND depth > 0 ORDER BY depth DESC",
+                (str(oid),)
+            )
+        ]
+
+    def depth(self, oid: str) -> Optional[int]:
+        """Az oldal mélysége (a gyökér 0), ismeretlen oldalnál None"""
+        row = self.connection.execute(
+            "SELECT MAX(depth), COUNT(*) FROM page_closure WHERE descendant = ?", (str(oid),)
+        ).fetchone()
+        return row[0] if row[1] else None
+
+    def descendants(self, oid: str, depth: Optional[int] = None) -> List[str]:
+        """
+        Az oldal leszármazottai szintenként
+
+        :param oid: Az oldal azonosítója
+        :param depth: A legnagyobb távolság (None: a teljes részfa)
+        :return: Leszármazott azonosítók, távolság szerint rendezve
+        """
+        if depth is None:
+            cursor = self.connection.execute(
+                "SELECT descendant FROM page_closure WHERE ancestor = ? AND depth > 0 ORDER BY depth, descendant",
+                (str(oid),)
+            )
+        else:
+            cursor = self.connection.execute(
+                "SELECT descendant FROM page_closure WHERE ancestor = ? AND depth BETWEEN 1 AND ? "
+                "ORDER BY depth, descendant",
+                (str(oid), int(depth))
+            )
+        return [row[0] for row in cursor]
+
+    def subtree_size(self, oid: str) -> int:
+        """A részfa mérete az oldallal együtt (ismeretlen oldalnál 0)"""
+        row = self.connection.execute(
+            "SELECT size FROM page_subtree WHERE oid = ?", (str(oid),)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def lowest_common_ancestor(self, a: str, b: str) -> Optional[str]:
+        """
+        A két oldal legközelebbi közös őse (az oldalak önmaguk ősei is)
+
+        :return: A közös ős azonosítója, vagy None ha különböző fákban vannak
+        """
+        row = self.connection.execute("""
+            SELECT first.ancestor FROM page_closure AS first
+            JOIN page_closure AS second ON second.ancestor = first.ancestor AND second.descendant = ?
+            WHERE first.descendant = ?
+            ORDER BY first.depth
+            LIMIT 1
+        """, (str(b), str(a))).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,370 @@
+"""
+A webhely statikus HTML oldalakká alakítása
+
+Minden oldal PUBLIC elemei az elementtypes.csv wrap sablonjaival kerülnek
+egy doc<oid>.html fájlba. A sablonban a "#>" és az önálló "#" jelek a
+tartalom "#>" jellel elválasztott értékeinek (slot_ids) helyét jelölik,
+sorrendben (lásd models.SlotSchema). A PAGEID értékű hivatkozások (PAGE,
+LINK, PATH) a megfelelő .html fájlra mutatnak, a képtárbeli képek a
+kimenet pictures könyvtárába kerülnek.
+
+Az oldalak előállítása folyamatkészletben, kötegekben fut. A kimenet csak
+a tartalomtól függ (nincs benne időbélyeg), így a változatlan oldalak
+bájtra azonos fájlt adnak; az ilyen fájlokat nem írjuk újra.
+
+A PAGE és PATH hivatkozások a cél oldal aktuális címét mutatják, így egy
+oldal kimenete a hivatkozott oldalak címétől is függ. A --incremental
+kapcsolóval csak a függőségi gráf (dependency_graph) szerint megváltozott
+bemenetű oldalak készülnek újra.
+
+Használat: python html_renderer.py [célkönyvtár] [--workers N] [--incremental]
+"""
+import glob
+import html
+import os
+import re
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from models import SlotSchema
+from picture_store import parse_reference
+
+# Egy típus sablonja: (lefordított slot leírás, aktív típus)
+Template = Tuple[SlotSchema, bool]
+
+# A cél oldal aktuális címét mutató típusok, és a hivatkozás szövegét tartalmazó slot
+TITLE_SLOTS = {'PAGE': 'PAGETITLE', 'PATH': 'TITLE'}
+TEXT_SLOTS = {'PAGE': 'PAGETITLE', 'PATH': 'TITLE', 'LINK': 'LINKTEXT'}
+
+_LINK_PATTERN = re.compile(r"(HREF=')(?:doc)?(\d+)(?:\.csv)?(')", re.IGNORECASE)
+
+# A munkafolyamatok állapota (_init_worker tölti fel)
+_templates: Dict[str, Template] = {}
+_decode: Optional[Callable[[str], str]] = None
+
+
+def compile_templates(type_geometries: Dict) -> Dict[str, Template]:
+    """
+    A lefordított TypeGeometry sablonok összegyűjtése (a munkafolyamatoknak átadható formában)
+
+    :param type_geometries: DocumentElementType -> TypeGeometry szótár
+    :return: Típus azonosító -> sablon szótár
+    """
+    return {
+        geometry.type_id: (geometry.schema or geometry.compile(), geometry.isactive == "1")
+        for geometry in type_geometries.values()
+    }
+
+
+def page_file_name(page: str) -> str:
+    """Az oldal HTML fájljának neve"""
+    return f"doc{page}.html"
+
+
+def _format_value(value: str) -> str:
+    """Egy érték HTML kódolása; a sortörések <BR> elemek lesznek"""
+    return html.escape(value, quote=True).replace('\r\n', '\n').replace('\n', '<BR>\n')
+
+
+def render_element(row: Dict, template: Template, decode: Callable[[str], str],
+                   titles: Optional[Dict[str, str]] = None) -> str:
+    """
+    Egy elem HTML kódja a sablon alapján
+
+    :param row: Mentési formátumú (escape-elt) elem sor
+    :param template: A típus lefordított sablonja
+    :param decode: A tárolt tartalom visszaalakítása (pl. DocumentManager.unescape_content)
+    :param titles: A hivatkozott oldalak aktuális címei; megadásakor a PAGE és PATH
+        elemek ezt mutatják, a nem létező oldalra mutató hivatkozás pedig csak szöveg lesz
+    """
+    schema, isactive = template
+    content = row['content'] or ""
+    if not isactive:
+        # Az aktív típusok tartalma nincs escape-elve
+        content = decode(content)
+    values = schema.parse(content)
+
+    if schema.page_slot is not None and titles is not None:
+        target = values[schema.page_slot].strip()
+        text_slot = schema.index.get(TEXT_SLOTS.get(row['type']))
+        if target not in titles:
+            return _format_value(values[text_slot]) if text_slot is not None else ""
+        title_slot = schema.index.get(TITLE_SLOTS.get(row['type']))
+        if title_slot is not None and titles[target]:
+            values[title_slot] = titles[target]
+
+    result = schema.render(values, _format_value)
+    if schema.page_slot is not None:
+        result = _LINK_PATTERN.sub(lambda match: f"{match.group(1)}{page_file_name(match.group(2))}{match.group(3)}", result)
+    return result
+
+
+def render_page(rows: List[Dict], templates: Dict[str, Template], decode: Callable[[str], str],
+                titles: Optional[Dict[str, str]] = None) -> bytes:
+    """
+    Egy oldal teljes HTML dokumentuma
+
+    :param rows: Az oldal mentési formátumú sorai
+    :param templates: compile_templates eredménye
+    :param decode: A tárolt tartalom visszaalakítása
+    :param titles: A hivatkozott oldalak aktuális címei (lásd render_element)
+    :return: UTF-8 kódolású HTML
+    """
+    public = sorted(
+        (row for row in rows if row['status'] == 'PUBLIC' and row['type'] in templates),
+        key=lambda row: int(row['position'] or 0)
+    )
+    title = next((decode(row['content'] or "") for row in public if row['type'] == 'TITLE'), "")
+
+    body = []
+    previous_type = None
+    for row in public:
+        fragment = render_element(row, templates[row['type']], decode, titles)
+        if row['type'] == 'PATH' and previous_type == 'PATH':
+            # Az útvonal elemei egy sorban, elválasztóval
+            body[-1] += " &gt; " + fragment
+        else:
+            body.append(fragment)
+        previous_type = row['type']
+
+    document = [
+        "<!DOCTYPE html>",
+        "<HTML>",
+        "<HEAD>",
+        "<META CHARSET='utf-8'>",
+        f"<TITLE>{html.escape(title, quote=True)}</TITLE>",
+        "</HEAD>",
+        "<BODY>",
+        *body,
+        "</BODY>",
+        "</HTML>",
+        ""
+    ]
+    return "\n".join(document).encode('utf-8')
+
+
+def _init_worker(templates: Dict[str, Template], decode: Callable[[str], str]):
+    """A munkafolyamat sablonjainak beállítása (egyszer, nem minden köteggel)"""
+    global _templates, _decode
+    _templates = templates
+    _decode = decode
+
+
+def _render_batch(batch: List[Tuple[str, List[Dict], Dict[str, str]]]) -> List[Tuple[str, bytes]]:
+    """Oldalak kötegének előállítása (folyamatkészletben fut)"""
+    return [(page, render_page(rows, _templates, _decode, titles)) for page, rows, titles in batch]
+
+
+class HtmlRenderer:
+    """A webhely összes oldalának kiírása statikus HTML fájlokba"""
+
+    def __init__(self, doc_manager, workers: Optional[int] = None, batch_size: int = 64):
+        """
+        :param doc_manager: DocumentManager példány
+        :param workers: A munkafolyamatok száma (alapértelmezett: CPU magok száma)
+        :param batch_size: Egy munkafolyamatnak egyszerre átadott oldalak száma
+        """
+        self.doc_manager = doc_manager
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.templates = compile_templates(doc_manager.type_geometries)
+        self.stats = None
+
+    def picture_references(self, rows: List[Dict]) -> List[Tuple[str, str]]:
+        """Az oldal PUBLIC PICTURE elemei által hivatkozott képtárbeli képek (hash, kiterjesztés)"""
+        references = []
+        for row in rows:
+            if row['type'] != 'PICTURE' or row['status'] != 'PUBLIC':
+                continue
+            parsed = parse_reference(self.doc_manager.unescape_content(row['content']))
+            if parsed is not None:
+                references.append(parsed)
+        return references
+
+    def target_titles(self, rows: List[Dict]) -> Dict[str, str]:
+        """Az oldal által hivatkozott, létező oldalak aktuális címei az oldal indexből"""
+        site_index = self.doc_manager.site_index
+        titles = {}
+        for row in rows:
+            if row['type'] in TEXT_SLOTS:
+                target = self.doc_manager.unescape_content(row['content'] or "").partition('#>')[0].strip()
+                if target in site_index:
+                    titles[target] = site_index.title(target)
+        return titles
+
+    def _iter_batches(self, pages: Iterable[str], pictures: set, missing: set):
+        """
+        Az oldalak sorai kötegekben; közben gyűjti a hivatkozott képeket
+
+        :param missing: Ide kerülnek a már nem létező oldalak
+        """
+        batch = []
+        for page in pages:
+            try:
+                rows = self.doc_manager.get_page_rows(page, use_cache=False)
+            except FileNotFoundError:
+                missing.add(page)
+                continue
+            pictures.update(self.picture_references(rows))
+            batch.append((page, rows, self.target_titles(rows)))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _write_file(self, path: str, data: bytes) -> bool:
+        """
+        Fájl írása, ha a tartalma eltér a meglévőtől
+
+        :return: Igaz, ha a fájl megváltozott
+        """
+        try:
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+        except FileNotFoundError:
+            pass
+        temp_path = path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return True
+
+    def _copy_pictures(self, target_dir: str, pictures: set) -> int:
+        """
+        A hivatkozott képek másolása a kimenet pictures könyvtárába
+
+        A képtár tartalom szerint címzett, így a már meglévő fájl azonos, nem kell újra másolni.
+
+        :return: Az újonnan másolt képek száma
+        """
+        store = self.doc_manager.picture_store
+        pictures_dir = os.path.join(target_dir, 'pictures')
+        os.makedirs(pictures_dir, exist_ok=True)
+        copied = 0
+        for digest, ext in sorted(pictures):
+            source = store.path(digest, ext)
+            target = os.path.join(pictures_dir, f"{digest}{ext}")
+            if os.path.exists(target) or not os.path.exists(source):
+                continue
+            shutil.copyfile(source, target + ".tmp")
+            os.replace(target + ".tmp", target)
+            copied += 1
+        return copied
+
+    def render(self, target_dir: str = None, pages: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Az oldalak kiírása
+
+        Teljes előállításkor a törölt oldalak korábbi HTML fájljai is
+        törlődnek, így a könyvtár mindig a webhely aktuális állapotát
+        tükrözi. A kiírt oldalak kikerülnek a függőségi gráf változott
+        halmazából.
+
+        :param target_dir: A célkönyvtár (alapértelmezett: html)
+        :param pages: Csak ezen oldalak előállítása (None: az összes oldal)
+        :return: Összesítő (pages, written, unchanged, removed, pictures, seconds)
+        """
+        if target_dir is None:
+            target_dir = os.path.join(self.doc_manager.base_path, 'html')
+        os.makedirs(target_dir, exist_ok=True)
+        full = pages is None
+        pages = self.doc_manager.list_pages() if full else sorted(pages)
+
+        start = time.perf_counter()
+        stats = {'pages': 0, 'written': 0, 'unchanged': 0, 'removed': 0, 'pictures': 0}
+        rendered = set()
+        pictures = set()
+        missing = set()
+
+        def write_batch(future):
+            for page, data in future.result():
+                rendered.add(page)
+                stats['pages'] += 1
+                if self._write_file(os.path.join(target_dir, page_file_name(page)), data):
+                    stats['written'] += 1
+                else:
+                    stats['unchanged'] += 1
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.templates, self.doc_manager.unescape_content)
+        ) as executor:
+            # Legfeljebb két köteg vár munkafolyamatonként, a memóriahasználat korlátos
+            pending = deque()
+            for batch in self._iter_batches(pages, pictures, missing):
+                pending.append(executor.submit(_render_batch, batch))
+                if len(pending) >= 2 * self.workers:
+                    write_batch(pending.popleft())
+            while pending:
+                write_batch(pending.popleft())
+
+        if full:
+            names = {page_file_name(page) for page in rendered}
+            stale = [path for path in glob.glob(os.path.join(target_dir, "doc*.html"))
+                     if os.path.basename(path) not in names]
+        else:
+            stale = [os.path.join(target_dir, page_file_name(page)) for page in missing]
+        for path in stale:
+            if os.path.exists(path):
+                os.remove(path)
+                stats['removed'] += 1
+
+        self.doc_manager.dependency_graph.clear_dirty(None if full else rendered | missing)
+        stats['pictures'] = self._copy_pictures(target_dir, pictures)
+        stats['seconds'] = time.perf_counter() - start
+        self.stats = stats
+        return stats
+
+    def changed_pages(self, target_dir: str = None) -> List[str]:
+        """
+        Az újra előállítandó oldalak: a függőségi gráf változott halmaza,
+        valamint azok az oldalak, amelyeknek még nincs HTML fájlja
+
+        :param target_dir: A célkönyvtár (alapértelmezett: html)
+        """
+        if target_dir is None:
+            target_dir = os.path.join(self.doc_manager.base_path, 'html')
+        existing = set(os.listdir(target_dir)) if os.path.isdir(target_dir) else set()
+        dirty = self.doc_manager.dependency_graph.dirty_pages()
+        dirty.update(page for page in self.doc_manager.list_pages() if page_file_name(page) not in existing)
+        return sorted(dirty)
+
+    def rebuild(self, target_dir: str = None) -> Tuple[List[str], Dict]:
+        """
+        Növekményes újraépítés: csak a megváltozott bemenetű oldalak előállítása
+
+        :param target_dir: A célkönyvtár (alapértelmezett: html)
+        :return: (az újra előállított oldalak, összesítő)
+        """
+        dirty = self.changed_pages(target_dir)
+        return dirty, self.render(target_dir, dirty)
+
+
+if __name__ == "__main__":
+    import argparse
+    from config_manager import ConfigManager
+    from document_manager import DocumentManager
+
+    parser = argparse.ArgumentParser(description="A webhely statikus HTML oldalakká alakítása")
+    parser.add_argument("target", nargs="?", default=None, help="Célkönyvtár (alapértelmezett: html)")
+    parser.add_argument("--workers", type=int, default=None, help="Munkafolyamatok száma")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Csak az utolsó előállítás óta megváltozott bemenetű oldalak")
+    args = parser.parse_args()
+
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    renderer = HtmlRenderer(DocumentManager(ConfigManager(os.path.join(base_path, "config"))), args.workers)
+    if args.incremental:
+        dirty, stats = renderer.rebuild(args.target)
+        shown = ", ".join(dirty[:50]) + (f", ... (+{len(dirty) - 50})" if len(dirty) > 50 else "")
+        print(f"Változott oldalak ({len(dirty)}): {shown or '-'}")
+    else:
+        stats = renderer.render(args.target)
+    print(f"{stats['pages']} oldal ({stats['written']} kiírva, {stats['unchanged']} változatlan, "
+          f"{stats['removed']} törölve), {stats['pictures']} kép {stats['seconds']:.2f} mp alatt")
@@ -0,0 +1,290 @@
+"""
+A webhely oldal hivatkozásainak ellenőrzése
+
+A LINK, PAGE és PATH elemek tartalmának első értéke a hivatkozott oldal
+azonosítója ("20#>Cím"). Az ellenőrzés jelenti:
+
+    - a nem létező oldalra mutató (lógó) hivatkozásokat,
+    - a PAGE és PATH elemek elavult címeit (eltérnek a cél oldal címétől),
+    - az árva oldalakat, amelyekre egyetlen másik oldal PAGE eleme sem mutat
+      (a gyökér oldalak kivételével).
+
+Az oldalak feldolgozása folyamatkészletben fut. Az oldalankénti eredmény
+az oldal aláírásával (az alapfájl és a napló módosítási ideje és mérete,
+SQLite tárolásnál a verziószám) együtt egy gyorsítótár adatbázisba kerül,
+így a következő futás csak a megváltozott oldalakat olvassa be újra.
+
+Használat: python link_checker.py [--workers N] [--all]
+"""
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from page_journal import PageJournal
+from page_store import open_page_store
+
+# Oldalra hivatkozó elem típusok
+LINK_TYPES = ('LINK', 'PAGE', 'PATH')
+
+# Ezeknél a típusoknál a tartalom második értéke a cél oldal címe
+TITLE_TYPES = ('PAGE', 'PATH')
+
+# Ennyi feldolgozott oldalanként véglegesítjük a gyorsítótárat
+COMMIT_EVERY = 5000
+
+# A munkafolyamatok állapota (_init_worker tölti fel)
+_page_store = None
+_journal = None
+_decode = None
+
+
+def scan_rows(rows: Iterable[Dict], decode: Callable[[str], str]) -> Dict:
+    """
+    Egy oldal hivatkozásainak kinyerése
+
+    :param rows: Az oldal mentési formátumú sorai
+    :param decode: A tárolt tartalom visszaalakítása (pl. DocumentManager.unescape_content)
+    :return: Szótár a title, parent és refs kulcsokkal; a refs elemei
+        [elem oid, típus, cél oldal, szöveg] listák
+    """
+    title = None
+    parent = None
+    refs = []
+    for row in rows:
+        if row['status'] == 'DEL':
+            continue
+        if row['type'] == 'TITLE' and title is None:
+            title = decode(row['content'] or "")
+            parent = row['pid']
+        elif row['type'] in LINK_TYPES:
+            target, _, text = decode(row['content'] or "").partition('#>')
+            refs.append([row['oid'], row['type'], target.strip(), text])
+    # A gyökér oldal pid értéke 0 (vagy üres)
+    if parent in (None, "", "0"):
+        parent = None
+    return {'title': title, 'parent': parent, 'refs': refs}
+
+
+def _scan_local(doc_manager, page: str) -> Optional[Dict]:
+    """Egy oldal feldolgozása a hívó folyamatban (néhány oldalnál nem éri meg a folyamatkészlet)"""
+    try:
+        return scan_rows(doc_manager.get_page_rows(page, use_cache=False), doc_manager.unescape_content)
+    except FileNotFoundError:
+        return None
+
+
+def _init_worker(store_mode: str, store_location: str, journal_dir: str, decode: Callable[[str], str]):
+    """A munkafolyamat olvasóinak megnyitása (egyszer, nem minden köteggel)"""
+    global _page_store, _journal, _decode
+    _page_store = open_page_store(store_mode, store_location)
+    _journal = PageJournal(journal_dir)
+    _decode = decode
+
+
+def _scan_batch(pages: List[str]) -> List[Tuple[str, Optional[Dict]]]:
+    """Oldalak kötegének beolvasása és feldolgozása (folyamatkészletben fut)"""
+    results = []
+    for page in pages:
+        try:
+            rows = _page_store.read_rows(page)
+            results.append((page, scan_rows(_journal.replay(page, rows, _page_store.page_signature(page)), _decode)))
+        except FileNotFoundError:
+            # Közben törölték
+            results.append((page, None))
+    return results
+
+
+class LinkChecker:
+    """Lógó hivatkozások, elavult címek és árva oldalak keresése a teljes webhelyen"""
+
+    def __init__(self, doc_manager, db_path: str, workers: Optional[int] = None, batch_size: int = 256):
+        """
+        :param doc_manager: DocumentManager példány
+        :param db_path: Az oldalankénti eredmények gyorsítótár adatbázisa
+        :param workers: A munkafolyamatok száma (alapértelmezett: CPU magok száma)
+        :param batch_size: Egy munkafolyamatnak egyszerre átadott oldalak száma
+        """
+        self.doc_manager = doc_manager
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS link_check_pages (
+                    page TEXT PRIMARY KEY,
+                    signature TEXT NOT NULL,
+                    title TEXT,
+                    parent TEXT
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS link_check_refs (
+                    page TEXT NOT NULL,
+                    element TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    text TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_link_check_refs_page ON link_check_refs(page);
+                CREATE INDEX IF NOT EXISTS idx_link_check_refs_target ON link_check_refs(target, type);
+            """)
+
+    def close(self):
+        """Adatbázis kapcsolat lezárása"""
+        self.connection.close()
+
+    def _scan(self, pages: List[str]) -> Iterable[Tuple[str, Optional[Dict]]]:
+        """A megadott oldalak feldolgozása a folyamatkészletben"""
+        page_store = self.doc_manager.page_store
+        batches = [pages[i:i + self.batch_size] for i in range(0, len(pages), self.batch_size)]
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(
+                page_store.mode,
+                page_store.location,
+                self.doc_manager.pages_dir,
+                self.doc_manager.unescape_content
+            )
+        ) as executor:
+            for results in executor.map(_scan_batch, batches):
+                yield from results
+
+    def _remove_pages(self, pages: Iterable[str]):
+        """Oldalak törlése a gyorsítótárból (a folyamatban lévő tranzakción belül)"""
+        pages = [(page,) for page in pages]
+        self.connection.executemany("DELETE FROM link_check_pages WHERE page = ?", pages)
+        self.connection.executemany("DELETE FROM link_check_refs WHERE page = ?", pages)
+
+    def refresh(self) -> int:
+        """
+        A gyorsítótár frissítése: csak az aláírásuk szerint megváltozott oldalak kerülnek beolvasásra
+
+        :return: Az újra beolvasott oldalak száma
+        """
+        signatures = {
+            page: repr(signature) for page, signature in self.doc_manager.page_signatures().items()
+        }
+        cached = dict(self.connection.execute("SELECT page, signature FROM link_check_pages"))
+        changed = [page for page, signature in signatures.items() if cached.get(page) != signature]
+
+        with self.connection:
+            self._remove_pages([page for page in cached if page not in signatures])
+
+        if len(changed) > self.batch_size:
+            results = self._scan(changed)
+        else:
+            results = ((page, _scan_local(self.doc_manager, page)) for page in changed)
+        try:
+            for count, (page, entry) in enumerate(results, 1):
+                if page in cached:
+                    self._remove_pages([page])
+                if entry is not None:
+                    self.connection.execute(
+                        "INSERT INTO link_check_pages (page, signature, title, parent) VALUES (?, ?, ?, ?)",
+                        (page, signatures[page], entry['title'], entry['parent'])
+                    )
+                    self.connection.executemany(
+                        "INSERT INTO link_check_refs (page, element, type, target, text) VALUES (?, ?, ?, ?, ?)",
+                        [(page, *ref) for ref in entry['refs']]
+                    )
+                if count % COMMIT_EVERY == 0:
+                    # Egy megszakított futás eredménye se vesszen el teljesen
+                    self.connection.commit()
+        finally:
+            self.connection.commit()
+        return len(changed)
+
+    def check(self) -> Dict:
+        """
+        A teljes webhely ellenőrzése
+
+        :return: Jelentés: pages, scanned, dangling, stale, orphans, seconds;
+            a dangling és stale elemei page, element, type, target (stale-nél
+            text és title is) kulcsú szótárak, az orphans oldal azonosítók listája
+        """
+        start = time.perf_counter()
+        scanned = self.refresh()
+
+        dangling = [
+            {'page': page, 'element': element, 'type': element_type, 'target': target}
+            for page, element, element_type, target in self.connection.execute("""
+                SELECT r.page, r.element, r.type, r.target FROM link_check_refs r
+                WHERE NOT EXISTS (SELECT 1 FROM link_check_pages p WHERE p.page = r.target)
+                ORDER BY r.page, r.element
+            """)
+        ]
+        stale = [
+            {'page': page, 'element': element, 'type': element_type, 'target': target, 'text': text, 'title': title}
+            for page, element, element_type, target, text, title in self.connection.execute(f"""
+                SELECT r.page, r.element, r.type, r.target, r.text, COALESCE(p.title, '')
+                FROM link_check_refs r JOIN link_check_pages p ON p.page = r.target
+                WHERE r.type IN ({", ".join("?" * len(TITLE_TYPES))})
+                  AND TRIM(r.text) != TRIM(COALESCE(p.title, ''))
+                ORDER BY r.page, r.element
+            """, TITLE_TYPES)
+        ]
+        orphans = [row[0] for row in self.connection.execute("""
+            SELECT p.page FROM link_check_pages p
+            WHERE p.parent IS NOT NULL AND NOT EXISTS (
+                SELECT 1 FROM link_check_refs r WHERE r.target = p.page AND r.type = 'PAGE' AND r.page != p.page
+            )
+            ORDER BY p.page
+        """)]
+        pages = self.connection.execute("SELECT COUNT(*) FROM link_check_pages").fetchone()[0]
+        return {
+            'pages': pages,
+            'scanned': scanned,
+            'dangling': dangling,
+            'stale': stale,
+            'orphans': orphans,
+            'seconds': time.perf_counter() - start
+        }
+
+
+def link_check_path_from_config(base_path: str, config_manager=None) -> str:
+    """
+    A hivatkozás ellenőrző gyorsítótár adatbázisának elérési útja a konfiguráció alapján
+
+    :param base_path: Az alkalmazás könyvtára
+    :param config_manager: ConfigManager példány (opcionális)
+    :return: Abszolút elérési út
+    """
+    relative = "pages/link_check.db"
+    if config_manager is not None:
+        relative = config_manager.get_config('storage.link_check_file', relative)
+    return os.path.join(base_path, relative)
+
+
+if __name__ == "__main__":
+    import argparse
+    from config_manager import ConfigManager
+    from document_manager import DocumentManager
+
+    parser = argparse.ArgumentParser(description="Az oldal hivatkozások ellenőrzése")
+    parser.add_argument("--workers", type=int, default=None, help="Munkafolyamatok száma")
+    parser.add_argument("--all", action="store_true", help="Minden talált hiba kiírása (alapértelmezett: az első 20)")
+    args = parser.parse_args()
+
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    config_manager = ConfigManager(os.path.join(base_path, "config"))
+    checker = LinkChecker(
+        DocumentManager(config_manager), link_check_path_from_config(base_path, config_manager), args.workers
+    )
+    report = checker.check()
+    limit = None if args.all else 20
+
+    for item in report['dangling'][:limit]:
+        print(f"Lógó hivatkozás: doc{item['page']} {item['type']} {item['element']} -> doc{item['target']}")
+    for item in report['stale'][:limit]:
+        print(f"Elavult cím: doc{item['page']} {item['type']} {item['element']} -> doc{item['target']}: "
+              f"\"{item['text']}\" (aktuális: \"{item['title']}\")")
+    for page in report['orphans'][:limit]:
+        print(f"Árva oldal: doc{page}")
+    print(f"{report['pages']} oldal ({report['scanned']} beolvasva): {len(report['dangling'])} lógó hivatkozás, "
+          f"{len(report['stale'])} elavult cím, {len(report['orphans'])} árva oldal "
+          f"{report['seconds']:.2f} mp alatt")
@@ -0,0 +1,34 @@
+"""
+Egyszeri adat migrációk parancssorból
+
+A tartalom kódolás átalakítását a GUI indításkor is elvégzi; a régi PICTURE
+hivatkozások képtárba helyezése (ami minden oldalt végignéz) csak innen fut.
+Egy régi webhelyen a parancssori eszközök (html_renderer, site_export,
+link_checker, ...) előtt:
+
+    python migrate.py
+"""
+import os
+
+from config_manager import ConfigManager
+from document_manager import DocumentManager
+
+
+def run_migrations(doc_manager: DocumentManager) -> dict:
+    """
+    A függő migrációk futtatása
+
+    :param doc_manager: A webhely DocumentManager példánya
+    :return: Migrációnként a feldolgozott oldalak száma
+    """
+    return {
+        'content_format': doc_manager.migrate_content_format(),
+        'picture_references': doc_manager.migrate_picture_references(),
+    }
+
+
+if __name__ == "__main__":
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    results = run_migrations(DocumentManager(ConfigManager(os.path.join(base_path, "config"))))
+    for name, count in results.items():
+        print(f"{name}: {count} oldal")
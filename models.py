@@ -1,13 +1,12 @@
 import uuid
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+from typing import List, Dict, Any, NamedTuple, Optional
 from enum import Enum, auto
-import pandas as pd
+import csv
 import os
-import shutil
-import zipfile
-from datetime import datetime
-from PyQt5.QtWidgets import QLabel, QWidget, QSizePolicy
-from PyQt5.QtCore import Qt
+import sys
+import ordering
+from page_codec import format_page_rows, iter_page_rows, write_page_rows
 
 class DocumentElementType:
     """Dokumentum elem típusok.
@@ -44,8 +43,9 @@ class DocumentElementType:
             
         try:
             csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "elementtypes.csv")
-            df = pd.read_csv(csv_path)
-            for _, row in df.iterrows():
+            with open(csv_path, 'r', encoding='utf-8', newline='') as csvfile:
+                rows = list(csv.DictReader(csvfile))
+            for row in rows:
                 type_id = row['type_id']
                 # Ha még nem létezik ilyen típus, létrehozzuk
                 if type_id not in cls._instances:
@@ -119,8 +119,123 @@ class TypeGeometry:
         self.slot_types = slot_types
         self.slot_defaults = slot_defaults
         self.isactive = isactive
+        self.schema = None  # Lefordított slot leírás (compile tölti fel)
+
+    def compile(self) -> 'SlotSchema':
+        """A slot leírás és a wrap sablon lefordítása (a betöltéskor egyszer)"""
+        self.schema = SlotSchema(self.slot_ids, self.slot_names, self.slot_types, self.slot_defaults, self.wrap)
+        return self.schema
+
+
+class Slot(NamedTuple):
+    """Egy elem típus egy mezője"""
+    id: str
+    name: str
+    type: str
+    default: str
+
+
+class SlotSchema:
+    """Egy elem típus lefordított slot leírása.
+
+    A tartalom "#>" jellel elválasztott értékei sorban a slot_ids mezőknek
+    felelnek meg. A wrap sablonban a "#>" és az önálló "#" jelek az értékek
+    helyét jelölik; a sablon egyszer, str.format mintává fordul, így a
+    megjelenítéshez nem kell újra feldarabolni."""
+
+    def __init__(self, slot_ids: str, slot_names: str, slot_types: str, slot_defaults: str, wrap: str):
+        ids = slot_ids.split('#>') if slot_ids else []
+        names = slot_names.split('#>') if slot_names else []
+        types = slot_types.split('#>') if slot_types else []
+        defaults = slot_defaults.split('#>') if slot_defaults else []
+        self.slots = tuple(
+            Slot(
+                slot_id,
+                names[i] if i < len(names) else slot_id,
+                types[i] if i < len(types) else "TEXT",
+                defaults[i] if i < len(defaults) else ""
+            )
+            for i, slot_id in enumerate(ids)
+        )
+        self.ids = tuple(ids)
+        self.index = {slot_id: i for i, slot_id in enumerate(ids)}
+        self.page_slot = self.index.get('PAGEID')  # A hivatkozott oldal azonosítójának helye
+
+        parts = self.split_wrap(wrap or "")
+        self.placeholders = len(parts) - 1
+        self._template = "".join(
+            part.replace('{', '{{').replace('}', '}}') + (f"{{{i}}}" if i < self.placeholders else "")
+            for i, part in enumerate(parts)
+        )
+
+    @staticmethod
+    def split_wrap(wrap: str) -> List[str]:
+        """
+        A wrap sablon felbontása a helyőrzők ("#>" vagy önálló "#") mentén
+
+        :param wrap: Pl. "<A HREF='doc#>.csv'>#</A>"
+        :return: Szöveg darabok; a helyőrzők száma eggyel kevesebb
+        """
+        parts = []
+        current = []
+        index = 0
+        while index < len(wrap):
+            if wrap[index] == '#':
+                parts.append("".join(current))
+                current = []
+                index += 2 if wrap.startswith('#>', index) else 1
+            else:
+                current.append(wrap[index])
+                index += 1
+        parts.append("".join(current))
+        return parts
+
+    def parse(self, content: str) -> List[str]:
+        """
+        A tartalom felbontása slot értékekre
+
+        :param content: Visszaalakított (unescape-elt) tartalom
+        :return: Értékek slot sorrendben; a hiányzók üres szövegek
+        """
+        values = content.split('#>') if content else []
+        if len(values) < len(self.slots):
+            values.extend([""] * (len(self.slots) - len(values)))
+        return values
+
+    def as_dict(self, content: str) -> Dict[str, str]:
+        """A tartalom slot azonosító -> érték szótárként"""
+        return dict(zip(self.ids, self.parse(content)))
+
+    def join(self, values: Dict[str, str]) -> str:
+        """
+        Slot értékek összefűzése tartalommá, slot sorrendben
+
+        A szótárban nem szereplő (pl. a szerkesztőben rejtett) slot-ok kimaradnak.
+        """
+        return "#>".join(values[slot_id] for slot_id in self.ids if slot_id in values)
+
+    def render(self, values: List[str], format_value=None) -> str:
+        """
+        Értékek behelyettesítése a wrap sablonba
+
+        :param values: Slot értékek (parse eredménye)
+        :param format_value: Az értékek átalakítása behelyettesítés előtt (pl. HTML kódolás)
+        """
+        if format_value is not None:
+            values = [format_value(value) for value in values]
+        if len(values) < self.placeholders:
+            values = list(values) + [""] * (self.placeholders - len(values))
+        return self._template.format(*values)
 
 class DocumentElement:
+    """Egy dokumentum elem.
+
+    Nagy oldalakon sok példány él egyszerre, ezért az attribútumok rögzítettek
+    (__slots__, példányonkénti szótár nélkül); a típus és a státusz közös
+    objektum, az ismétlődő név és szülő értékek internáltak."""
+
+    __slots__ = ('oid', 'name', 'content', 'type', 'status', 'pid', 'position', 'type_geometry')
+
     def __init__(
         self, 
         name: str, 
@@ -128,23 +243,37 @@ class DocumentElement:
         element_type: DocumentElementType,
         status: DocumentElementStatus = DocumentElementStatus.NEW,
         pid: str = None,
-        position: int = 0
+        position: int = 0,
+        oid: str = None
     ):
-        self.oid = str(uuid.uuid4())  # Egyedi azonosító
-        self.name = name
+        # Egyedi azonosító; betöltéskor a tárolt oid, új elemnél egy UUID
+        self.oid = str(uuid.uuid4()) if oid is None else oid
+        self.name = sys.intern(name) if isinstance(name, str) else name
         self.content = content
         self.type = element_type
         self.status = status
-        self.pid = pid  # Szülő dokumentum azonosítója
+        self.pid = sys.intern(pid) if isinstance(pid, str) else pid  # Szülő dokumentum azonosítója
         self.position = position
         self.type_geometry = None  # Inicializáljuk None értékkel
 
-        # Képek kezelése
-        if element_type.type_id == "PICTURE":
-            self.handle_picture(content)
-
     def handle_picture(self, picture_path: str):
-        """Képek kezelése a pictures könyvtárban"""
+        """
+        Új PICTURE elem képének felvétele a tartalom szerint címzett képtárba
+        
+        Csak a szerkesztő hívja új elem létrehozásakor; a betöltés (from_row)
+        nem importál fájlt. A kép a hash értéke alapján kerül a pictures
+        könyvtárba; ha ilyen tartalmú kép már van, nem készül újabb másolat.
+        A képtárra már hivatkozó tartalmat nem importáljuk újra.
+        
+        :raises FileNotFoundError: Ha a kép nem létezik
+        :raises ValueError: Nem támogatott képformátum esetén
+        """
+        from picture_store import get_default_store
+        store = get_default_store()
+        if store.contains(picture_path):
+            self.content = picture_path.replace("\\", "/")
+            return
+        
         allowed_extensions = ['.png', '.jpg', '.gif']
         if not os.path.exists(picture_path):
             raise FileNotFoundError(f"A megadott kép nem létezik: {picture_path}")
@@ -153,16 +282,26 @@ class DocumentElement:
         if file_ext not in allowed_extensions:
             raise ValueError(f"Nem támogatott képformátum. Csak {allowed_extensions} engedélyezettek.")
         
-        pictures_dir = os.path.join(os.path.dirname(__file__), 'pictures')
-        os.makedirs(pictures_dir, exist_ok=True)
-        
-        # Kép másolása a pictures mappába
-        dest_filename = f"pic{self.oid}{file_ext}"
-        dest_path = os.path.join(pictures_dir, dest_filename)
-        shutil.copy2(picture_path, dest_path)
+        # A content mostantól a képtárbeli kép relatív elérési útja (pictures/<hash><kiterjesztés>)
+        self.content = store.import_file(picture_path)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, str]) -> 'DocumentElement':
+        """
+        Elem létrehozása egy mentési formátumú sorból (UUID generálás nélkül)
         
-        # A content mostantól a kép relatív elérési útja lesz
-        self.content = os.path.join('pictures', dest_filename)
+        :param row: Elem szótár, minden érték string
+        :return: DocumentElement objektum
+        """
+        return cls(
+            name=row['name'].strip('"'),
+            content=row['content'].strip('"'),
+            element_type=DocumentElementType.get(row['type']) if row['type'] else None,
+            status=DocumentElementStatus[row['status']] if row['status'] else None,
+            pid=row['pid'].strip('"'),
+            position=int(row['position']),
+            oid=row['oid'].strip('"')
+        )
 
     def to_csv_dict(self) -> Dict[str, Any]:
         """Dokumentum elem konvertálása CSV formátumba"""
@@ -181,71 +320,143 @@ class Document:
         self.oid = str(uuid.uuid4())  # Dokumentum egyedi azonosítója
         self.name = name
         self.elements: List[DocumentElement] = []
+        self.store = None  # Oldal tároló, ahova a módosítások mentődnek (None: nincs automatikus mentés)
+        self._batch_depth = 0
+        self._dirty = False
 
-    def add_element(self, element: DocumentElement, position: int = -1):
-        """
-        Dokumentum elem hozzáadása adott pozícióra
-        
-        :param element: A hozzáadandó dokumentum elem
-        :param position: Pozíció, ahova az elemet be kell szúrni
-                         -1: dokumentum végére
-                         0 vagy 1: dokumentum elejére
-                         pozitív egész: adott indexre
-        """
+    def _place(self, element: DocumentElement, position: int):
+        """Elem elhelyezése a sorszám szerinti helyre (a position értelmezését lásd: add_element)"""
         # Pozíció korrekció
         if position < -1:
             position = -1
         
-        # Ha üres a dokumentum, mindig a végére kerül
-        if not self.elements:
-            position = 0
-        
-        # Pozíció meghatározása
-        if position == -1:
+        self.elements.sort(key=ordering.get_position)
+        if position == -1 or position > len(self.elements):
             # A dokumentum végére kerül
-            position = max([elem.position for elem in self.elements] + [0]) + 1
+            after, before = (self.elements[-1] if self.elements else None), None
         elif position <= 1:
-            # A dokumentum elejére kerül, meglévő elemek pozíciójának növelése
-            for elem in self.elements:
-                elem.position += 1
-            position = 0
+            # A dokumentum elejére kerül
+            after, before = None, None
         else:
-            # Adott pozíciónál nagyobb pozíciójú elemek eltolása
-            for elem in self.elements:
-                if elem.position >= position:
-                    elem.position += 1
-        
-        # Elem beállítása
-        element.pid = self.oid
-        element.position = position
+            after, before = None, self.elements[position - 1]
+        ordering.reposition(self.elements, element, after=after, before=before)
         
         # Elem beszúrása a megfelelő helyre
-        # Ha már létezik elem ezen a pozíción, utána szúrjuk be
-        insert_index = next((i for i, elem in enumerate(self.elements) if elem.position >= position), len(self.elements))
+        insert_index = next((i for i, elem in enumerate(self.elements) if elem.position > element.position), len(self.elements))
         self.elements.insert(insert_index, element)
+
+    def _changed(self):
+        """Módosítás után: mentés a tárolóba, vagy batch blokkban a blokk végére halasztva"""
+        if self._batch_depth:
+            self._dirty = True
+        else:
+            self.save()
+
+    def add_element(self, element: DocumentElement, position: int = -1):
+        """
+        Dokumentum elem hozzáadása adott pozícióra
         
-        # CSV mentése
-        try:
-            self.to_csv(f"doc{self.oid}.csv")
-        except Exception as e:
-            print(f"Hiba a dokumentum mentése során: {e}")
+        A meglévő elemek pozíciója nem változik, az új elem a szomszédok
+        közötti hézagba kerül; csak ha a hézag elfogyott, akkor számozza újra
+        a dokumentumot.
         
+        :param element: A hozzáadandó dokumentum elem
+        :param position: Pozíció, ahova az elemet be kell szúrni
+                         -1: dokumentum végére
+                         0 vagy 1: dokumentum elejére
+                         pozitív egész: az adott sorszámú (1-től számolt) elem elé
+        """
+        element.pid = self.oid
+        self._place(element, position)
+        self._changed()
+        return element
+
+    def move_element(self, oid: str, position: int):
+        """
+        Elem áthelyezése adott pozícióra
+        
+        :param oid: Az elem azonosítója
+        :param position: Az új pozíció, az add_element szerinti értelmezéssel
+        :return: Az áthelyezett elem, vagy None ha nincs ilyen elem
+        """
+        element = next((elem for elem in self.elements if elem.oid == oid), None)
+        if element is None:
+            return None
+        self.elements.remove(element)
+        self._place(element, position)
+        self._changed()
         return element
 
     def remove_element(self, oid: str):
         self.elements = [elem for elem in self.elements if elem.oid != oid]
+        self._changed()
 
     def update_element(self, oid: str, updated_element: DocumentElement):
         for i, elem in enumerate(self.elements):
             if elem.oid == oid:
                 updated_element.pid = self.oid
                 self.elements[i] = updated_element
+                self._changed()
                 break
 
+    @contextmanager
+    def batch(self):
+        """
+        Kötegelt módosítás: a blokkban végzett beszúrások, törlések,
+        módosítások és áthelyezések a blokk végén egyetlen írással mentődnek
+        
+        Kivétel esetén az elemek listája, és az elemek pozíciója és szülője
+        visszaáll a blokk előtti állapotra, és semmi nem kerül mentésre.
+        A beágyazott blokk a külsővel együtt mentődik.
+        
+            with document.batch():
+                for element in elements:
+                    document.add_element(element)
+        """
+        snapshot = [(elem, elem.position, elem.pid) for elem in self.elements]
+        dirty = self._dirty
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.elements = [elem for elem, _, _ in snapshot]
+            for elem, position, pid in snapshot:
+                elem.position = position
+                elem.pid = pid
+            self._dirty = dirty
+            raise
+        finally:
+            self._batch_depth -= 1
+        if not self._batch_depth and self._dirty:
+            self.save()
+
+    def save(self) -> bool:
+        """
+        Dokumentum mentése a hozzá tartozó tárolóba (ha van ilyen)
+        
+        :return: True ha sikeres vagy nincs tároló, False hiba esetén
+        """
+        self._dirty = False
+        if self.store is None:
+            return True
+        try:
+            self.to_store(self.store)
+            return True
+        except Exception as e:
+            print(f"Hiba a dokumentum mentése során: {e}")
+            return False
+
     def to_csv(self, filename: str):
-        data = [elem.to_csv_dict() for elem in self.elements]
-        df = pd.DataFrame(data)
-        df.to_csv(filename, index=False)
+        write_page_rows(filename, (elem.to_csv_dict() for elem in self.elements))
+
+    def to_store(self, store, page: str = None):
+        """
+        Dokumentum mentése egy oldal tárolóba (lásd page_store.PageStore)
+        
+        :param store: A tároló (CSV, oszlopos vagy SQLite)
+        :param page: Az oldal azonosítója (alapértelmezett: a dokumentum oid-ja)
+        """
+        store.write_rows(str(page or self.oid), [elem.to_csv_dict() for elem in self.elements])
 
     @classmethod
     def from_csv(cls, filename: str, document_name: str):
@@ -256,44 +467,54 @@ class Document:
         :param document_name: A dokumentum neve
         :return: Document objektum
         """
-        import csv
-        
-        # Új dokumentum létrehozása
-        document = cls(document_name)
+        try:
+            return cls.from_rows(iter_page_rows(filename), document_name)
+        except Exception as e:
+            print(f"Hiba a dokumentum betöltése során: {e}")
+            return None
+
+    @classmethod
+    def from_store(cls, store, page: str, document_name: str):
+        """
+        Dokumentum betöltése egy oldal tárolóból (lásd page_store.PageStore)
         
+        :param store: A tároló (CSV, oszlopos vagy SQLite)
+        :param page: Az oldal azonosítója
+        :param document_name: A dokumentum neve
+        :return: Document objektum, vagy None hiba esetén; a módosításai ebbe a tárolóba mentődnek
+        """
         try:
-            with open(filename, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    # Enum értékek konvertálása
-                    element_type = DocumentElementType.get(row['type']) if row['type'] else None
-                    element_status = DocumentElementStatus[row['status']] if row['status'] else None
-                    
-                    # Elem létrehozása
-                    element = DocumentElement(
-                        name=row['name'].strip('"'),
-                        content=row['content'].strip('"'),
-                        element_type=element_type,
-                        status=element_status,
-                        pid=row['pid'].strip('"'),
-                        position=int(row['position'])
-                    )
-                    element.oid = row['oid'].strip('"')
-                    
-                    # Elem hozzáadása a dokumentumhoz
-                    document.elements.append(element)
-                    
-            return document
-            
+            document = cls.from_rows(store.read_rows(str(page)), document_name)
         except Exception as e:
             print(f"Hiba a dokumentum betöltése során: {e}")
             return None
+        document.oid = str(page)
+        document.store = store
+        return document
+
+    @classmethod
+    def from_rows(cls, rows, document_name: str):
+        """
+        Dokumentum létrehozása mentési formátumú sorokból
+        
+        :param rows: Elem szótárak (minden érték string)
+        :param document_name: A dokumentum neve
+        :return: Document objektum
+        """
+        # Új dokumentum létrehozása
+        document = cls(document_name)
+        
+        document.elements.extend(DocumentElement.from_row(row) for row in rows)
+        return document
 
     def export_to_zip(self, base_dir: str = None):
         """
         Dokumentumok exportálása zip fájlba
         A zip fájl neve: save<ANSI formátumú dátum+idő>.zip
         """
+        import zipfile
+        from datetime import datetime
+        
         if base_dir is None:
             base_dir = os.path.join(os.path.dirname(__file__), 'exports')
         
@@ -305,78 +526,21 @@ class Document:
         zip_path = os.path.join(base_dir, zip_filename)
         
         with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # CSV fájl mentése
+            # CSV tartalom közvetlenül az archívumba, ideiglenes fájl nélkül
             csv_filename = f"{self.name}_{timestamp}.csv"
-            csv_path = os.path.join(base_dir, csv_filename)
-            self.to_csv(csv_path)
-            zipf.write(csv_path, arcname=csv_filename)
+            zipf.writestr(csv_filename, format_page_rows(elem.to_csv_dict() for elem in self.elements))
             
-            # Képek hozzáadása a zip fájlhoz
+            # Képek hozzáadása a zip fájlhoz (a már tömörített formátumok tömörítés nélkül)
             pictures_dir = os.path.join(os.path.dirname(__file__), 'pictures')
             for elem in self.elements:
                 if elem.type.type_id == "PICTURE":
                     pic_path = os.path.join(pictures_dir, os.path.basename(elem.content))
                     if os.path.exists(pic_path):
-                        zipf.write(pic_path, arcname=os.path.join('pictures', os.path.basename(elem.content)))
-            
-            # Töröljük a ideiglenes CSV fájlt
-            os.remove(csv_path)
+                        compress_type = zipfile.ZIP_STORED if pic_path.lower().endswith(('.png', '.jpg', '.gif')) else zipfile.ZIP_DEFLATED
+                        zipf.write(pic_path, arcname=os.path.join('pictures', os.path.basename(elem.content)), compress_type=compress_type)
         
         return zip_path
 
-class ShowActiveElement:
-    """Aktív elemek megjelenítésének kezelése"""
-    
-    @staticmethod
-    def create_signature_widget(content: str, doc_manager) -> QLabel:
-        """SIGNATURE típusú elem widget létrehozása"""
-        # Content feldolgozása
-        parts = content.split('#>')
-        halign = parts[0].strip("'") if len(parts) > 0 else ""  # Idézőjelek eltávolítása
-        textcontent = parts[1] if len(parts) > 1 else ""
-        
-        # Horizontális igazítás keresése
-        halign_item = None
-        list_items = doc_manager.show_list("HALIGN")
-        
-        # Keresés a megadott halign értékkel
-        for item in list_items:
-            if item['elementID'] == halign:
-                halign_item = item
-                break
-        
-        # Ha nincs találat, keressük az alapértelmezett elemet
-        if not halign_item:
-            for item in list_items:
-                if item.get('isdefelement') == '1':
-                    halign_item = item
-                    break
-        
-        # Label létrehozása
-        label = QLabel(textcontent)
-        label.setWordWrap(True)
-        label.setStyleSheet("margin: 5px; padding: 5px; width: 100%;")
-        label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
-        
-        # Horizontális igazítás beállítása
-        if halign_item:
-            if halign_item['elementname'] == 'Left':
-                label.setAlignment(Qt.AlignLeft)
-                
-            elif halign_item['elementname'] == 'Center':
-                label.setAlignment(Qt.AlignCenter)
-            elif halign_item['elementname'] == 'Right':
-                label.setAlignment(Qt.AlignRight)
-        
-        return label
-        
-    @staticmethod
-    def create_widget(element_type: str, content: str, doc_manager) -> QWidget:
-        """Widget létrehozása az elem típusa alapján"""
-        if element_type == 'SIGNATURE':
-            return ShowActiveElement.create_signature_widget(content, doc_manager)
-        return None
-
 # Példakód az export_to_zip metódus használatára
 if __name__ == "__main__":
     # Dokumentum létrehozása
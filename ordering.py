@@ -0,0 +1,126 @@
+"""
+Ritka (hézagos) pozíciók az oldal elemeinek sorrendjéhez
+
+A position érték egész szám marad, de az új oldalak elemei POSITION_GAP
+lépésközzel kapják, így egy beszúrás vagy mozgatás a két szomszéd közötti
+hézag felezésével csak a mozgatott elemet érinti. Ha a hézag elfogy (pl.
+a korábbi, sűrű 1..N pozíciójú oldalakon), az oldal újrasorszámozása
+(rebalance) egyszer minden elemet POSITION_GAP lépésközre állít.
+
+A megjelenítéshez a sűrű 1..N sorszám a dense_ranks eredménye.
+
+A függvények mentési formátumú sor szótárakkal (a position lehet string
+is) és DocumentElement objektumokkal egyaránt működnek.
+"""
+from typing import Dict, List, Optional
+
+# Két szomszédos elem pozíciója közötti alapértelmezett hézag
+POSITION_GAP = 1024
+
+
+def get_position(row) -> int:
+    """A sor vagy elem pozíciója egész számként"""
+    return int(row['position'] if isinstance(row, dict) else row.position)
+
+
+def _set_position(row, position: int):
+    if isinstance(row, dict):
+        # A szótáras sorok (pl. a read_document elemei) string pozíciót tárolnak
+        row['position'] = str(position)
+    else:
+        row.position = position
+
+
+def _get_oid(row) -> str:
+    return str(row['oid'] if isinstance(row, dict) else row.oid)
+
+
+def sort_rows(rows) -> List:
+    """A sorok pozíció szerint rendezve (azonos pozíciónál az eredeti sorrendben)"""
+    return sorted(rows, key=get_position)
+
+
+def dense_ranks(rows) -> Dict[str, int]:
+    """
+    A megjelenítési sorszámok: elem oid -> 1..N a pozíció szerinti sorrendben
+
+    :param rows: Sorok vagy elemek
+    """
+    return {_get_oid(row): rank for rank, row in enumerate(sort_rows(rows), 1)}
+
+
+def position_at(index: int) -> int:
+    """Az index. (0-tól számolt) elem pozíciója egy új, hézagosan számozott oldalon"""
+    return (index + 1) * POSITION_GAP
+
+
+def next_position(rows) -> int:
+    """Pozíció az oldal végére (a legnagyobb pozíció után egy hézaggal)"""
+    return max([get_position(row) for row in rows] or [0]) + POSITION_GAP
+
+
+def position_between(before: Optional[int], after: Optional[int]) -> Optional[int]:
+    """
+    Pozíció két szomszédos pozíció között
+
+    :param before: Az előző pozíció (None: az oldal eleje)
+    :param after: A következő pozíció (None: az oldal vége)
+    :return: A hézag közepe, vagy None ha nincs szabad egész érték
+    """
+    low = 0 if before is None else before
+    if after is None:
+        return low + POSITION_GAP
+    if after - low < 2:
+        return None
+    return low + (after - low) // 2
+
+
+def rebalance(rows) -> List:
+    """
+    A sorok újrasorszámozása POSITION_GAP lépésközzel, a jelenlegi sorrendben
+
+    :param rows: Egy oldal összes sora (helyben módosulnak)
+    :return: A megváltozott pozíciójú sorok
+    """
+    changed = []
+    for index, row in enumerate(sort_rows(rows)):
+        if get_position(row) != position_at(index):
+            _set_position(row, position_at(index))
+            changed.append(row)
+    return changed
+
+
+def _slot(rows, after=None, before=None) -> Optional[int]:
+    """Szabad pozíció közvetlenül az after sor után, vagy közvetlenül a before sor előtt"""
+    positions = sorted(get_position(row) for row in rows)
+    if before is not None:
+        high = get_position(before)
+        return position_between(max([p for p in positions if p < high], default=None), high)
+    if after is None:
+        return position_between(None, positions[0] if positions else None)
+    low = get_position(after)
+    return position_between(low, min([p for p in positions if p > low], default=None))
+
+
+def reposition(rows, row, after=None, before=None) -> List:
+    """
+    Elem beszúrása vagy mozgatása közvetlenül az after sor után (vagy a before sor elé)
+
+    Ha a szomszédok között nincs hézag, előbb az oldal többi sorát
+    újrasorszámozza.
+
+    :param rows: Az oldal összes sora (az elem maga lehet köztük: mozgatás)
+    :param row: A beszúrandó vagy mozgatandó sor vagy elem (helyben módosul)
+    :param after: A sor, ami után kerül (None és before nélkül: az oldal elejére)
+    :param before: A sor, ami elé kerül
+    :return: A mentendő sorok: az újrasorszámozott sorok és maga az elem
+    """
+    oid = _get_oid(row)
+    others = [other for other in rows if _get_oid(other) != oid]
+    position = _slot(others, after, before)
+    changed = []
+    if position is None:
+        changed = rebalance(others)
+        position = _slot(others, after, before)
+    _set_position(row, position)
+    return changed + [row]
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class PageCache:
+    """Méretkorlátos LRU gyorsítótár a beolvasott oldalakhoz.
+
+    Minden bejegyzés mellé egy aláírást (pl. fájl mtime és méret) tárolunk;
+    ha lekéréskor az aktuális aláírás eltér, a bejegyzés elavult, és
+    kiesik a gyorsítótárból."""
+
+    def __init__(self, max_size: int = 128):
+        """
+        :param max_size: A tárolt oldalak maximális száma (0: kikapcsolva)
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, key: Hashable, signature: Any) -> Optional[Any]:
+        """Érvényes bejegyzés lekérése a számlálók és az LRU sorrend módosítása nélkül"""
+        entry = self._entries.get(key)
+        if entry is None or signature is None or entry[0] != signature:
+            return None
+        return entry[1]
+
+    def get(self, key: Hashable, signature: Any) -> Optional[Any]:
+        """
+        Bejegyzés lekérése
+
+        :param key: Az oldal azonosítója
+        :param signature: Az oldal aktuális aláírása
+        :return: A tárolt érték, vagy None ha nincs érvényes bejegyzés
+        """
+        value = self.peek(key, signature)
+        if value is None:
+            self.misses += 1
+            self._entries.pop(key, None)
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, signature: Any, value: Any):
+        """
+        Bejegyzés tárolása; a legrégebben használt bejegyzés kiesik, ha betelt
+
+        :param key: Az oldal azonosítója
+        :param signature: Az oldal aláírása a tárolás pillanatában
+        :param value: A tárolandó érték
+        """
+        if self.max_size <= 0 or signature is None:
+            return
+        self._entries[key] = (signature, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Egy bejegyzés eltávolítása"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Az összes bejegyzés eltávolítása"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Találat/tévesztés számlálók és méret"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'max_size': self.max_size
+        }
@@ -0,0 +1,91 @@
+import csv
+import io
+import os
+from typing import Dict, Iterable, Iterator, List
+
+# Az oldal elemek oszlopai, a CSV fájlok fejlécével azonos sorrendben
+PAGE_COLUMNS = ['oid', 'name', 'content', 'type', 'status', 'pid', 'position']
+
+
+def iter_page_rows(filename: str) -> Iterator[Dict[str, str]]:
+    """
+    Oldal CSV fájl sorainak folyamatos (streaming) olvasása
+
+    Minden érték string; a hiányzó mezők üres stringként jelennek meg.
+    A fejléc sorrendje tetszőleges lehet, az oszlopokat név szerint
+    rendeljük a PAGE_COLUMNS sémához.
+
+    :param filename: A CSV fájl elérési útja
+    :return: Elem szótárak iterátora
+    :raises FileNotFoundError: Ha a fájl nem létezik
+    """
+    with open(filename, 'r', encoding='utf-8', newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        if header == PAGE_COLUMNS:
+            for row in reader:
+                if row:
+                    yield dict(zip(PAGE_COLUMNS, row))
+            return
+
+        # Eltérő oszlopsorrend: név szerinti leképezés
+        indexes = [header.index(column) if column in header else None for column in PAGE_COLUMNS]
+        for row in reader:
+            if not row:
+                continue
+            yield {
+                column: (row[i] if i is not None and i < len(row) else "")
+                for column, i in zip(PAGE_COLUMNS, indexes)
+            }
+
+
+def read_page_rows(filename: str) -> List[Dict[str, str]]:
+    """
+    Oldal CSV fájl összes sorának beolvasása
+
+    :param filename: A CSV fájl elérési útja
+    :return: Elem szótárak listája
+    """
+    return list(iter_page_rows(filename))
+
+
+def _write_csv(csvfile, rows: Iterable[Dict]):
+    """A fejléc és a sorok kiírása egy megnyitott szöveges fájlba"""
+    writer = csv.writer(csvfile, quoting=csv.QUOTE_ALL, lineterminator='\n')
+    writer.writerow(PAGE_COLUMNS)
+    writer.writerows(
+        ["" if row.get(column) is None else row[column] for column in PAGE_COLUMNS]
+        for row in rows
+    )
+
+
+def format_page_rows(rows: Iterable[Dict]) -> str:
+    """
+    Oldal sorainak CSV szöveggé alakítása (a fájlba írással azonos formátumban)
+
+    :param rows: Elem szótárak
+    :return: A teljes CSV tartalom
+    """
+    buffer = io.StringIO(newline='')
+    _write_csv(buffer, rows)
+    return buffer.getvalue()
+
+
+def write_page_rows(filename: str, rows: Iterable[Dict]):
+    """
+    Oldal sorainak folyamatos írása CSV fájlba
+
+    Ideiglenes fájlba írunk, majd atomi cserével kerül a helyére, így
+    összeomlás esetén sem marad félig írt oldal. Minden mező idézőjelek
+    közé kerül (csv.QUOTE_ALL), a None értékek üres mezőként.
+
+    :param filename: A CSV fájl elérési útja
+    :param rows: Elem szótárak (vagy bármilyen iterálható forrás)
+    """
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, 'w', encoding='utf-8', newline='') as csvfile:
+        _write_csv(csvfile, rows)
+    os.replace(temp_filename, filename)
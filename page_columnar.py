@@ -0,0 +1,265 @@
+"""
+Oldal sorok bináris, oszlopos tárolási formátuma (pages/doc{oid}.vdc)
+
+A fájl sorcsoportokból áll, a csoportok a PAGE_COLUMNS oszlopait
+egymás után, oszloponként tárolják:
+
+    VDC2 | csoport | csoport | ...
+    csoport: sorok száma (u32), bájt hossz (u32), 7 oszlop
+    oszlop: jelző bájt, bájt hossz (u32), adat
+
+A jelző bájt szerinti oszlop fajták:
+
+    i  egész oszlop: n darab int64 (oid, position)
+    s  szöveg oszlop: mód (u8), adat hossza (u32), UTF-8 adat; a 0. módban
+       az értékeket NUL karakter választja el, az 1. módban (ha egy érték
+       tartalmaz NUL karaktert) az adatot n darab u32 karakterhossz követi
+    d  szótár kódolt oszlop: a különböző értékek száma (u32) és szöveg
+       oszlopként, majd a kódok típusa (B, H vagy I) és n darab kód
+       (type, status, pid)
+
+Minden szám little-endian. A beolvasott sorok ugyanolyan szótárak, mint a
+CSV olvasásnál (minden érték string), így a két formátum felcserélhető.
+A csoportonkénti tárolás miatt egy oldal folyamatosan, állandó memóriával
+is olvasható, és a type és status szerinti szűrés a nem illeszkedő
+csoportok szöveg oszlopait ki sem bontja.
+"""
+import io
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from typing import BinaryIO, Collection, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from page_codec import PAGE_COLUMNS
+
+MAGIC = b"VDC2"
+
+# Egy sorcsoport legfeljebb ennyi sort tartalmaz
+ROW_GROUP_SIZE = 4096
+
+# Egész számként tárolt, illetve szótár kódolt oszlopok
+INT_COLUMNS = ('oid', 'position')
+DICTIONARY_COLUMNS = ('type', 'status', 'pid')
+
+_SEPARATOR = '\x00'
+_COUNT = struct.Struct('<I')
+_GROUP_HEADER = struct.Struct('<II')
+_COLUMN_HEADER = struct.Struct('<cI')
+_STRING_HEADER = struct.Struct('<BI')
+_SWAP = sys.byteorder != 'little'
+
+
+def _array_bytes(values: array) -> bytes:
+    if _SWAP:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_array(typecode: str, data: memoryview, offset: int, count: int) -> Tuple[array, int]:
+    values = array(typecode)
+    end = offset + count * values.itemsize
+    values.frombytes(data[offset:end])
+    if _SWAP:
+        values.byteswap()
+    return values, end
+
+
+def _encode_strings(values: List[str]) -> bytes:
+    """Szöveg oszlop adata"""
+    joined = _SEPARATOR.join(values)
+    if values and joined.count(_SEPARATOR) == len(values) - 1:
+        data = joined.encode('utf-8')
+        return _STRING_HEADER.pack(0, len(data)) + data
+    data = "".join(values).encode('utf-8')
+    lengths = array('I', map(len, values))
+    return _STRING_HEADER.pack(1, len(data)) + data + _array_bytes(lengths)
+
+
+def _decode_strings(data: memoryview, offset: int, count: int) -> Tuple[List[str], int]:
+    mode, size = _STRING_HEADER.unpack_from(data, offset)
+    offset += _STRING_HEADER.size
+    text = str(data[offset:offset + size], 'utf-8')
+    offset += size
+    if count == 0:
+        return [], offset
+    if mode == 0:
+        return text.split(_SEPARATOR), offset
+    lengths, offset = _read_array('I', data, offset, count)
+    ends = list(accumulate(lengths))
+    return [text[start:end] for start, end in zip([0] + ends[:-1], ends)], offset
+
+
+def _encode_column(column: str, values: List[str]) -> bytes:
+    """Egy oszlop kódolása a legtömörebb alkalmazható formában (fejléccel)"""
+    kind, payload = b's', None
+    if column in INT_COLUMNS:
+        try:
+            numbers = array('q', map(int, values))
+        except (ValueError, OverflowError):
+            numbers = None
+        # Csak ha a szöveges alak pontosan visszaállítható (pl. nincs vezető nulla)
+        if numbers is not None and list(map(str, numbers)) == values:
+            kind, payload = b'i', _array_bytes(numbers)
+    elif column in DICTIONARY_COLUMNS:
+        dictionary = list(dict.fromkeys(values))
+        positions = {value: i for i, value in enumerate(dictionary)}
+        typecode = 'B' if len(dictionary) <= 0xFF else 'H' if len(dictionary) <= 0xFFFF else 'I'
+        codes = array(typecode, map(positions.__getitem__, values))
+        kind = b'd'
+        payload = (_COUNT.pack(len(dictionary)) + _encode_strings(dictionary)
+                   + typecode.encode('ascii') + _array_bytes(codes))
+    if payload is None:
+        payload = _encode_strings(values)
+    return _COLUMN_HEADER.pack(kind, len(payload)) + payload
+
+
+def _decode_column(kind: bytes, data: memoryview, count: int) -> List[str]:
+    """Egy oszlop adatának visszaalakítása szövegek listájává"""
+    if kind == b'i':
+        return list(map(str, _read_array('q', data, 0, count)[0]))
+    if kind == b's':
+        return _decode_strings(data, 0, count)[0]
+    if kind == b'd':
+        (size,) = _COUNT.unpack_from(data, 0)
+        dictionary, offset = _decode_strings(data, _COUNT.size, size)
+        typecode = str(data[offset:offset + 1], 'ascii')
+        codes = _read_array(typecode, data, offset + 1, count)[0]
+        return list(map(dictionary.__getitem__, codes))
+    raise ValueError(f"Ismeretlen oszlop típus: {kind!r}")
+
+
+def _split_columns(data: memoryview) -> Dict[str, Tuple[bytes, memoryview]]:
+    """Egy sorcsoport oszlopainak szétválasztása kibontás nélkül"""
+    columns = {}
+    offset = 0
+    for column in PAGE_COLUMNS:
+        kind, size = _COLUMN_HEADER.unpack_from(data, offset)
+        offset += _COLUMN_HEADER.size
+        columns[column] = (kind, data[offset:offset + size])
+        offset += size
+    return columns
+
+
+def _iter_groups(stream: BinaryIO) -> Iterator[Tuple[int, Dict[str, Tuple[bytes, memoryview]]]]:
+    """A sorcsoportok (sorok száma, oszlopok) egymás után, a fájlból csoportonként olvasva"""
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Nem oszlopos oldal formátum")
+    while True:
+        header = stream.read(_GROUP_HEADER.size)
+        if not header:
+            return
+        if len(header) < _GROUP_HEADER.size:
+            raise ValueError("Csonka oszlopos oldal")
+        count, size = _GROUP_HEADER.unpack(header)
+        data = stream.read(size)
+        if len(data) < size:
+            raise ValueError("Csonka oszlopos oldal")
+        yield count, _split_columns(memoryview(data))
+
+
+def _iter_stream(stream: BinaryIO, types: Optional[Collection[str]] = None,
+                 statuses: Optional[Collection[str]] = None,
+                 oids: Optional[Collection[str]] = None) -> Iterator[Dict[str, str]]:
+    """A sorok folyamatos visszaalakítása szűréssel (lásd iter_columnar_rows)"""
+    for count, columns in _iter_groups(stream):
+        decoded = {}
+        selected = None
+        if types is not None or statuses is not None:
+            selected = range(count)
+            for column, accepted in (('type', types), ('status', statuses)):
+                if accepted is not None:
+                    decoded[column] = column_values = _decode_column(*columns[column], count)
+                    selected = [i for i in selected if column_values[i] in accepted]
+            if oids:
+                decoded['oid'] = _decode_column(*columns['oid'], count)
+                selected = sorted(set(selected).union(i for i, oid in enumerate(decoded['oid']) if oid in oids))
+            if not selected:
+                # A csoport szöveg oszlopait ki sem bontjuk
+                continue
+        values = [
+            decoded[column] if column in decoded else _decode_column(*columns[column], count)
+            for column in PAGE_COLUMNS
+        ]
+        if selected is not None:
+            values = [[column_values[i] for i in selected] for column_values in values]
+        yield from (
+            {'oid': oid, 'name': name, 'content': content, 'type': type_id,
+             'status': status, 'pid': pid, 'position': position}
+            for oid, name, content, type_id, status, pid, position in zip(*values)
+        )
+
+
+def format_columnar_rows(rows: Iterable[Dict]) -> bytes:
+    """
+    Oldal sorainak oszlopos bináris alakja
+
+    :param rows: Elem szótárak; a None értékek üres szövegként kerülnek tárolásra
+    :return: A teljes fájl tartalom
+    """
+    rows = list(rows)
+    parts = [MAGIC]
+    for start in range(0, len(rows), ROW_GROUP_SIZE):
+        group = rows[start:start + ROW_GROUP_SIZE]
+        body = b"".join(
+            _encode_column(column, ["" if row.get(column) is None else str(row[column]) for row in group])
+            for column in PAGE_COLUMNS
+        )
+        parts.append(_GROUP_HEADER.pack(len(group), len(body)))
+        parts.append(body)
+    return b"".join(parts)
+
+
+def parse_columnar_rows(data: bytes) -> List[Dict[str, str]]:
+    """
+    Oszlopos bináris tartalom visszaalakítása elem szótárakká
+
+    :param data: A format_columnar_rows kimenete
+    :return: Elem szótárak listája, minden érték string
+    :raises ValueError: Ha a tartalom nem oszlopos oldal formátumú
+    """
+    return list(_iter_stream(io.BytesIO(data)))
+
+
+def iter_columnar_rows(filename: str, types: Optional[Collection[str]] = None,
+                       statuses: Optional[Collection[str]] = None,
+                       oids: Optional[Collection[str]] = None) -> Iterator[Dict[str, str]]:
+    """
+    Oszlopos oldal fájl sorainak folyamatos olvasása, sorcsoportonként
+
+    :param filename: A fájl elérési útja
+    :param types: Csak ezen típusú sorok (None: mind)
+    :param statuses: Csak ezen státuszú sorok (None: mind)
+    :param oids: Ezen azonosítójú sorok a szűrőktől függetlenül
+    :return: Elem szótárak iterátora a tárolási sorrendben
+    :raises FileNotFoundError: Ha a fájl nem létezik
+    """
+    with open(filename, 'rb') as f:
+        yield from _iter_stream(f, types, statuses, oids)
+
+
+def read_columnar_rows(filename: str) -> List[Dict[str, str]]:
+    """
+    Oszlopos oldal fájl beolvasása
+
+    :param filename: A fájl elérési útja
+    :return: Elem szótárak listája
+    :raises FileNotFoundError: Ha a fájl nem létezik
+    """
+    with open(filename, 'rb') as f:
+        return list(_iter_stream(f))
+
+
+def write_columnar_rows(filename: str, rows: Iterable[Dict]):
+    """
+    Oldal sorainak írása oszlopos fájlba (ideiglenes fájlon át, atomi cserével)
+
+    :param filename: A fájl elérési útja
+    :param rows: Elem szótárak
+    """
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, 'wb') as f:
+        f.write(format_columnar_rows(rows))
+    os.replace(temp_filename, filename)
@@ -0,0 +1,201 @@
+import json
+import os
+import zlib
+from typing import Dict, List
+
+
+class PageJournal:
+    """Oldalankénti, csak hozzáfűzhető módosítási napló.
+
+    Minden bejegyzés egy sor a pages/doc{oid}.log fájlban:
+    "<crc32> <json>", ahol a JSON az op nevét (insert, move, status,
+    content, illetve batch egy kötegelt módosításnál) és az érintett elemek teljes, mentési formátumú sorait
+    tartalmazza. Mivel minden bejegyzés a teljes sor állapotot rögzíti
+    (upsert), a napló újrajátszása idempotens. A félbeszakadt utolsó sort
+    a CRC ellenőrzés kiszűri.
+
+    A napló első sora (op: base) az alapfájl aláírása a napló
+    kezdetekor. Az alapfájl teljes újraírása (összevonás, mentés) után a
+    napló törlődik; ha közben összeomlás történt, az aláírás már nem
+    egyezik, így a napló elavultként kimarad, és nem hozza vissza pl. a
+    teljes mentéssel törölt elemeket."""
+
+    OPERATIONS = ('insert', 'move', 'status', 'content', 'batch')
+
+    # Az alapfájl aláírását tartalmazó első sor művelet neve
+    BASE_OPERATION = 'base'
+
+    def __init__(self, journal_dir: str):
+        """
+        :param journal_dir: A naplófájlokat tartalmazó könyvtár
+        """
+        self.journal_dir = journal_dir
+        self._entry_counts: Dict[str, int] = {}
+        self._bases: Dict[str, object] = {}  # oldal -> a napló kezdetekori alapfájl aláírás (fejléc nélkül: nincs)
+
+    def path(self, page: str) -> str:
+        """A naplófájl elérési útja egy oldalhoz"""
+        return os.path.join(self.journal_dir, f"doc{page}.log")
+
+    @staticmethod
+    def _line(entry: Dict) -> str:
+        payload = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+        return f"{zlib.crc32(payload.encode('utf-8')):08x} {payload}\n"
+
+    @staticmethod
+    def _normalize(signature):
+        """Az aláírás JSON-ból visszaolvasott alakja (a tuple-ökből listák lesznek)"""
+        return json.loads(json.dumps(signature))
+
+    def _is_stale(self, page: str, base) -> bool:
+        """A napló egy azóta újraírt alapfájlhoz tartozik-e (a fejléc nélküli napló sosem elavult)"""
+        page = str(page)
+        return page in self._bases and self._bases[page] != self._normalize(base)
+
+    def append(self, page: str, op: str, rows: List[Dict], base) -> int:
+        """
+        Bejegyzés hozzáfűzése a naplóhoz
+
+        :param page: Az oldal azonosítója
+        :param op: A művelet neve (insert, move, status, content, batch)
+        :param rows: Az érintett elemek teljes sorai mentési formátumban
+        :param base: Az alapfájl jelenlegi aláírása (lásd PageStore.page_signature);
+            az üres napló első soraként kerül mentésre
+        :return: A naplóban lévő bejegyzések száma
+        """
+        if op not in self.OPERATIONS:
+            raise ValueError(f"Ismeretlen napló művelet: {op}")
+
+        line = self._line({'op': op, 'rows': rows})
+
+        count = self.entry_count(page)
+        if count and self._is_stale(page, base):
+            # Egy korábbi, összeomlás miatt félbemaradt összevonás maradéka
+            print(f"Elavult napló törlése: {self.path(page)}")
+            self.truncate(page)
+            count = 0
+        if count == 0:
+            line = self._line({'op': self.BASE_OPERATION, 'signature': base, 'rows': []}) + line
+        with open(self.path(page), 'w' if count == 0 else 'a', encoding='utf-8', newline='\n') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if count == 0:
+            self._bases[str(page)] = self._normalize(base)
+        self._entry_counts[str(page)] = count + 1
+        return count + 1
+
+    def entries(self, page: str, base=None, check_base: bool = False) -> List[Dict]:
+        """
+        A napló érvényes bejegyzéseinek beolvasása (a fejléc nélkül).
+
+        Az első sérült (pl. összeomlás miatt félbeszakadt) sornál megáll, és
+        a fájlt visszavágja az utolsó ép bejegyzésig, hogy a következő
+        hozzáfűzés ne egy csonka sor folytatásába kerüljön.
+
+        :param page: Az oldal azonosítója
+        :param base: Az alapfájl jelenlegi aláírása
+        :param check_base: Igaz értéknél az elavult (újraírt alapfájlhoz
+            tartozó) napló bejegyzései helyett üres listát ad
+        """
+        entries = []
+        valid_length = 0
+        corrupted = False
+        try:
+            with open(self.path(page), 'rb') as f:
+                for line in f:
+                    crc, _, payload = line.rstrip(b'\n').partition(b' ')
+                    try:
+                        if not line.endswith(b'\n') or int(crc, 16) != zlib.crc32(payload):
+                            raise ValueError("Sérült napló bejegyzés")
+                        entries.append(json.loads(payload.decode('utf-8')))
+                    except ValueError:
+                        corrupted = True
+                        break
+                    valid_length += len(line)
+            if corrupted:
+                print(f"Sérült napló bejegyzés, visszavágás: {self.path(page)}")
+                with open(self.path(page), 'r+b') as f:
+                    f.truncate(valid_length)
+        except FileNotFoundError:
+            pass
+        self._bases.pop(str(page), None)
+        if entries and entries[0].get('op') == self.BASE_OPERATION:
+            self._bases[str(page)] = entries.pop(0).get('signature')
+        self._entry_counts[str(page)] = len(entries)
+        if check_base and entries and self._is_stale(page, base):
+            return []
+        return entries
+
+    def entry_count(self, page: str) -> int:
+        """A naplóban lévő bejegyzések száma"""
+        page = str(page)
+        if page not in self._entry_counts:
+            self.entries(page)
+        return self._entry_counts[page]
+
+    def replay(self, page: str, rows: List[Dict], base) -> List[Dict]:
+        """
+        A napló újrajátszása az alap sorokon
+
+        :param page: Az oldal azonosítója
+        :param rows: Az alapfájlból beolvasott sorok
+        :param base: Az alapfájl aláírása (elavult napló esetén az alap sorok változatlanok)
+        :return: A napló alkalmazása utáni sorok, pozíció szerint rendezve
+        """
+        entries = self.entries(page, base, check_base=True)
+        if not entries:
+            return rows
+
+        upserts = [row for entry in entries for row in entry['rows']]
+        return self.merge_rows(rows, upserts)
+
+    def latest_rows(self, page: str, base) -> Dict[str, Dict[str, str]]:
+        """
+        Az elemek napló szerinti utolsó állapota (a replay folyamatos olvasáshoz használható párja)
+
+        :param page: Az oldal azonosítója
+        :param base: Az alapfájl aláírása (elavult napló esetén üres)
+        :return: Elem oid -> teljes sor (minden érték string), a bejegyzések sorrendjében
+        """
+        latest = {}
+        for entry in self.entries(page, base, check_base=True):
+            for row in entry['rows']:
+                row = {key: ("" if value is None else str(value)) for key, value in row.items()}
+                latest.pop(row['oid'], None)
+                latest[row['oid']] = row
+        return latest
+
+    @staticmethod
+    def merge_rows(rows: List[Dict], upserts: List[Dict]) -> List[Dict]:
+        """
+        Teljes sorok alkalmazása (upsert) egy oldal sorain
+
+        :param rows: Az eredeti sorok
+        :param upserts: A beszúrandó vagy felülírandó sorok, időrendben
+        :return: Az új sorlista, pozíció szerint rendezve
+        """
+        result = list(rows)
+        index_by_oid = {str(row['oid']): i for i, row in enumerate(result)}
+        for row in upserts:
+            row = {key: ("" if value is None else str(value)) for key, value in row.items()}
+            i = index_by_oid.get(row['oid'])
+            if i is None:
+                index_by_oid[row['oid']] = len(result)
+                result.append(row)
+            else:
+                result[i] = row
+
+        # Stabil rendezés: a csoportokon belüli sorrend a pozíciót követi
+        result.sort(key=lambda row: int(row['position']))
+        return result
+
+    def truncate(self, page: str):
+        """A napló törlése, miután az alapfájl minden bejegyzést tartalmaz"""
+        try:
+            os.remove(self.path(page))
+        except FileNotFoundError:
+            pass
+        self._entry_counts[str(page)] = 0
+        self._bases.pop(str(page), None)
@@ -0,0 +1,311 @@
+"""
+Tartalom szerint címzett képtár (pictures/<sha256><kiterjesztés>)
+
+Minden kép egyetlen példányban, a tartalma SHA-256 hash értékéről
+elnevezve kerül a pictures könyvtárba, a kiterjesztés kisbetűsítve
+megmarad:
+
+    pictures/3f5a...c2.png
+
+A PICTURE elemek tartalma ez a relatív útvonal, így azonos kép
+többszöri felvétele nem foglal újabb helyet. A felvétel reflink,
+(engedélyezés esetén) hardlink vagy másolás, ideiglenes fájlon át,
+atomi cserével.
+
+A hivatkozás számláló adatbázis (alapértelmezésben pictures/pictures.db)
+két táblából áll:
+
+    picture_blobs  a tárolt képek: hash, kiterjesztés, méret, felvétel ideje
+    picture_refs   oldalanként a képre mutató PICTURE elemek száma
+                   (page, hash, count)
+
+A picture_refs tartalmát a DocumentManager oldal mentéskor frissíti. A
+hivatkozás nélküli képeket a collect_garbage törli, a frissen felvett
+képeket csak egy türelmi idő után.
+"""
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Linux FICLONE ioctl: copy-on-write másolat (btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+_CHUNK_SIZE = 1024 * 1024
+
+# A tartalom szerint címzett képekre mutató PICTURE tartalom: pictures/<sha256><kiterjesztés>
+_REFERENCE_PATTERN = re.compile(r"^pictures/([0-9a-f]{64})(\.[0-9a-z]+)$")
+
+_default_store = None
+
+
+def parse_reference(content: str) -> Optional[Tuple[str, str]]:
+    """
+    A PICTURE tartalom felbontása
+
+    :return: (hash, kiterjesztés), vagy None ha nem a képtárra mutat
+    """
+    match = _REFERENCE_PATTERN.match((content or "").replace("\\", "/"))
+    return (match.group(1), match.group(2)) if match else None
+
+
+def file_digest(path: str) -> str:
+    """Fájl SHA-256 hash értéke darabonkénti olvasással"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _reflink(source: str, target: str) -> bool:
+    """Copy-on-write másolat készítése, ha a fájlrendszer támogatja"""
+    if fcntl is None or not hasattr(fcntl, 'ioctl'):
+        return False
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        if os.path.exists(target):
+            os.remove(target)
+        return False
+
+
+class PictureStore:
+    """Tartalom szerint címzett képtár.
+
+    Minden kép egyszer, a SHA-256 hash értéke alapján elnevezve kerül a
+    pictures könyvtárba; a PICTURE elemek tartalma pictures/<hash><kiterjesztés>.
+    Az adatbázis oldalanként tárolja, melyik képre hányszor hivatkoznak,
+    így a hivatkozás nélküli képek biztonságosan törölhetők."""
+
+    def __init__(self, pictures_dir: str, db_path: Optional[str] = None, allow_hardlinks: bool = False):
+        """
+        :param pictures_dir: A képek könyvtára
+        :param db_path: A hivatkozás számláló adatbázis (alapértelmezett: pictures/pictures.db)
+        :param allow_hardlinks: Hardlink használata másolás helyett; a forrás fájl
+            későbbi módosítása ekkor a tárolt képet is módosítja
+        """
+        self.pictures_dir = pictures_dir
+        self.allow_hardlinks = allow_hardlinks
+        os.makedirs(pictures_dir, exist_ok=True)
+        self.db_path = db_path or os.path.join(pictures_dir, "pictures.db")
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path)
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS picture_blobs (
+                    hash TEXT PRIMARY KEY,
+                    ext TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS picture_refs (
+                    page TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (page, hash)
+                );
+                CREATE INDEX IF NOT EXISTS idx_picture_refs_hash ON picture_refs(hash);
+            """)
+
+    def close(self):
+        """Adatbázis kapcsolat lezárása"""
+        self.connection.close()
+
+    def path(self, digest: str, ext: str) -> str:
+        """A tárolt kép fájl elérési útja"""
+        return os.path.join(self.pictures_dir, f"{digest}{ext}")
+
+    @staticmethod
+    def reference(digest: str, ext: str) -> str:
+        """A PICTURE elem tartalma a megadott képhez"""
+        return f"pictures/{digest}{ext}"
+
+    def contains(self, content: str) -> bool:
+        """A tartalom a képtár egy meglévő képére mutat-e"""
+        parsed = parse_reference(content)
+        return parsed is not None and os.path.exists(self.path(*parsed))
+
+    def import_file(self, source: str) -> str:
+        """
+        Kép felvétele a képtárba
+
+        A forrást darabonként olvasva számoljuk a hash értéket; ha ilyen
+        tartalmú kép már van, nincs másolás. Egyébként reflink, (engedélyezés
+        esetén) hardlink, végül hagyományos másolás következik.
+
+        :param source: A felveendő kép elérési útja
+        :return: A PICTURE elem tartalma (pictures/<hash><kiterjesztés>)
+        """
+        ext = os.path.splitext(source)[1].lower()
+        digest = file_digest(source)
+        target = self.path(digest, ext)
+
+        if not os.path.exists(target):
+            temp_target = f"{target}.{os.getpid()}.tmp"
+            linked = _reflink(source, temp_target)
+            if not linked and self.allow_hardlinks:
+                try:
+                    os.link(source, temp_target)
+                    linked = True
+                except OSError:
+                    # Más fájlrendszer vagy nem támogatott: hagyományos másolás
+                    pass
+            if not linked:
+                shutil.copyfile(source, temp_target)
+            os.replace(temp_target, target)
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO picture_blobs (hash, ext, size, created) VALUES (?, ?, ?, ?)",
+                (digest, ext, os.path.getsize(target), time.time())
+            )
+        return self.reference(digest, ext)
+
+    def _page_references(self, rows: Iterable[Dict]) -> Dict[str, int]:
+        """Az oldal PICTURE elemeinek képtár hivatkozásai darabszámmal"""
+        counts = {}
+        for row in rows:
+            if row['type'] != 'PICTURE' or row['status'] == 'DEL':
+                continue
+            parsed = parse_reference(row['content'])
+            if parsed is not None:
+                counts[parsed[0]] = counts.get(parsed[0], 0) + 1
+        return counts
+
+    def _replace_page(self, page: str, rows: Iterable[Dict]):
+        """Egy oldal hivatkozásainak cseréje a folyamatban lévő tranzakción belül"""
+        self.connection.execute("DELETE FROM picture_refs WHERE page = ?", (page,))
+        self.connection.executemany(
+            "INSERT INTO picture_refs (page, hash, count) VALUES (?, ?, ?)",
+            [(page, digest, count) for digest, count in self._page_references(rows).items()]
+        )
+
+    def update_pages(self, pages: Iterable[Tuple[str, Iterable[Dict]]]):
+        """
+        Az oldalak kép hivatkozásainak frissítése egy tranzakcióban
+
+        :param pages: (oldal azonosító, mentési formátumú sorok) párok
+        """
+        with self.connection:
+            for page, rows in pages:
+                self._replace_page(str(page), rows)
+
+    def update_page(self, page: str, rows: Iterable[Dict]):
+        """Egy oldal kép hivatkozásainak frissítése"""
+        self.update_pages([(page, rows)])
+
+    def replace_all(self, pages: Iterable[Tuple[str, Iterable[Dict]]]) -> int:
+        """
+        A hivatkozások teljes újraszámolása
+
+        :param pages: (oldal azonosító, sorok) párok
+        :return: A feldolgozott oldalak száma
+        """
+        count = 0
+        with self.connection:
+            self.connection.execute("DELETE FROM picture_refs")
+            for page, rows in pages:
+                self._replace_page(str(page), rows)
+                count += 1
+        return count
+
+    def refcount(self, digest: str) -> int:
+        """A képre mutató PICTURE elemek száma az egész webhelyen"""
+        return self.connection.execute(
+            "SELECT COALESCE(SUM(count), 0) FROM picture_refs WHERE hash = ?", (digest,)
+        ).fetchone()[0]
+
+    def unreferenced(self, grace_seconds: float = 86400) -> List[Tuple[str, str]]:
+        """
+        A hivatkozás nélküli képek
+
+        A frissen felvett, még egyetlen mentett oldalon sem szereplő képek
+        a türelmi idő lejártáig nem számítanak hivatkozás nélkülinek.
+
+        :return: (hash, kiterjesztés) párok
+        """
+        return self.connection.execute("""
+            SELECT hash, ext FROM picture_blobs
+            WHERE created < ? AND hash NOT IN (SELECT hash FROM picture_refs)
+        """, (time.time() - grace_seconds,)).fetchall()
+
+    def collect_garbage(self, grace_seconds: float = 86400) -> List[str]:
+        """
+        A hivatkozás nélküli képek törlése
+
+        :param grace_seconds: A felvétel után eddig a kép akkor is megmarad, ha még nincs rá hivatkozás
+        :return: A törölt fájlok nevei
+        """
+        removed = []
+        for digest, ext in self.unreferenced(grace_seconds):
+            with self.connection:
+                # A törlés előtt újra ellenőrizzük (közben menthettek hivatkozást)
+                if self.refcount(digest):
+                    continue
+                self.connection.execute("DELETE FROM picture_blobs WHERE hash = ?", (digest,))
+            try:
+                os.remove(self.path(digest, ext))
+            except FileNotFoundError:
+                pass
+            removed.append(f"{digest}{ext}")
+        return removed
+
+
+def set_default_store(store: PictureStore):
+    """A DocumentElement.handle_picture által használt képtár beállítása"""
+    global _default_store
+    _default_store = store
+
+
+def get_default_store() -> PictureStore:
+    """Az alapértelmezett képtár (az alkalmazás pictures könyvtára, ha nincs beállítva)"""
+    global _default_store
+    if _default_store is None:
+        _default_store = PictureStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pictures'))
+    return _default_store
+
+
+def picture_store_from_config(base_path: str, config_manager=None) -> PictureStore:
+    """
+    Képtár a konfiguráció alapján (storage.picture_store_file, storage.picture_hardlinks)
+
+    :param base_path: Az alkalmazás könyvtára
+    :param config_manager: ConfigManager példány (opcionális)
+    """
+    db_file = "pictures/pictures.db"
+    allow_hardlinks = False
+    if config_manager is not None:
+        db_file = config_manager.get_config('storage.picture_store_file', db_file)
+        allow_hardlinks = bool(config_manager.get_config('storage.picture_hardlinks', allow_hardlinks))
+    return PictureStore(
+        os.path.join(base_path, 'pictures'),
+        os.path.join(base_path, db_file),
+        allow_hardlinks
+    )
+
+
+# Hivatkozás nélküli képek törlése: python picture_store.py [türelmi idő másodpercben]
+if __name__ == "__main__":
+    import sys
+    from config_manager import ConfigManager
+    from document_manager import DocumentManager
+
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    doc_manager = DocumentManager(ConfigManager(os.path.join(base_path, "config")))
+    doc_manager.rebuild_picture_references()
+    grace = float(sys.argv[1]) if len(sys.argv) > 1 else 86400
+    removed = doc_manager.picture_store.collect_garbage(grace)
+    print(f"{len(removed)} hivatkozás nélküli kép törölve")
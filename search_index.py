@@ -0,0 +1,286 @@
+import math
+import os
+import re
+import sqlite3
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# A teljes szöveges keresésben indexelt elem típusok
+INDEXED_TYPES = ('TEXT', 'TITLE', 'SUBTITLE', 'SYNOPSIS', 'BOLDTEXT')
+
+# BM25 paraméterek
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Szöveg szavakra bontása kisbetűsítve"""
+    return _TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class SearchIndex:
+    """Teljes szöveges, fordított (inverted) index az elemek tartalmára.
+
+    A postings tábla szavanként tárolja, mely oldal melyik eleme hányszor
+    tartalmazza; a keresés BM25 pontszám szerint rendezi a találatokat.
+    Az indexet a DocumentManager oldal mentéskor frissíti."""
+
+    def __init__(self, db_path: str, decode: Optional[Callable[[str], str]] = None):
+        """
+        :param db_path: Az index adatbázis elérési útja
+        :param decode: A tárolt (escape-elt) tartalom visszaalakítása
+        """
+        self.db_path = db_path
+        self.decode = decode or (lambda text: text)
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS search_elements (
+                    page TEXT NOT NULL,
+                    element TEXT NOT NULL,
+                    length INTEGER NOT NULL,
+                    content TEXT NOT NULL,
+                    PRIMARY KEY (page, element)
+                );
+                CREATE TABLE IF NOT EXISTS search_postings (
+                    term TEXT NOT NULL,
+                    page TEXT NOT NULL,
+                    element TEXT NOT NULL,
+                    tf INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_search_postings_term ON search_postings(term);
+                CREATE INDEX IF NOT EXISTS idx_search_postings_page ON search_postings(page, element);
+                CREATE TABLE IF NOT EXISTS search_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    element_count INTEGER NOT NULL,
+                    total_length INTEGER NOT NULL,
+                    built INTEGER NOT NULL DEFAULT 0
+                );
+                INSERT OR IGNORE INTO search_stats (id, element_count, total_length) VALUES (1, 0, 0);
+            """)
+
+    def close(self):
+        """Adatbázis kapcsolat lezárása"""
+        self.connection.close()
+
+    def __len__(self) -> int:
+        """Az indexelt elemek száma"""
+        return self.connection.execute("SELECT element_count FROM search_stats WHERE id = 1").fetchone()[0]
+
+    @property
+    def built(self) -> bool:
+        """Készült-e már teljes újraépítés (az üres index is lehet kész, ha nincs indexelhető elem)"""
+        return bool(self.connection.execute("SELECT built FROM search_stats WHERE id = 1").fetchone()[0])
+
+    def _delete(self, page: str, elements: Optional[List[str]] = None):
+        """Egy oldal (vagy csak a megadott elemei) bejegyzéseinek törlése, a statisztikával együtt"""
+        if elements is None:
+            where, params = "page = ?", [(page,)]
+        else:
+            where, params = "page = ? AND element = ?", [(page, element) for element in elements]
+        for param in params:
+            removed = self.connection.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM search_elements WHERE {where}", param
+            ).fetchone()
+            self.connection.execute(
+                "UPDATE search_stats SET element_count = element_count - ?, total_length = total_length - ? WHERE id = 1",
+                removed
+            )
+            self.connection.execute(f"DELETE FROM search_elements WHERE {where}", param)
+            self.connection.execute(f"DELETE FROM search_postings WHERE {where}", param)
+
+    def _insert(self, page: str, rows: Iterable[Dict]):
+        """Az indexelhető elemek felvétele"""
+        elements = []
+        postings = []
+        total_length = 0
+        for row in rows:
+            if row['type'] not in INDEXED_TYPES or row['status'] == 'DEL':
+                continue
+            content = self.decode(row['content']) or ""
+            terms = tokenize(content)
+            if not terms:
+                continue
+            element = str(row['oid'])
+            elements.append((page, element, len(terms), content))
+            postings.extend((term, page, element, tf) for term, tf in Counter(terms).items())
+            total_length += len(terms)
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO search_elements (page, element, length, content) VALUES (?, ?, ?, ?)",
+            elements
+        )
+        self.connection.executemany(
+            "INSERT INTO search_postings (term, page, element, tf) VALUES (?, ?, ?, ?)",
+            postings
+        )
+        self.connection.execute(
+            "UPDATE search_stats SET element_count = element_count + ?, total_length = total_length + ? WHERE id = 1",
+            (len(elements), total_length)
+        )
+
+    def update_page(self, page: str, rows: Iterable[Dict]):
+        """
+        Egy oldal teljes újraindexelése
+
+        :param page: Az oldal azonosítója
+        :param rows: Az oldal mentési formátumú sorai
+        """
+        page = str(page)
+        with self.connection:
+            self._delete(page)
+            self._insert(page, rows)
+
+    def update_pages(self, pages: Iterable[Tuple[str, Iterable[Dict]]]):
+        """
+        Több oldal újraindexelése egyetlen tranzakcióban
+
+        :param pages: (oldal azonosító, sorok) párok
+        """
+        with self.connection:
+            for page, rows in pages:
+                page = str(page)
+                self._delete(page)
+                self._insert(page, rows)
+
+    def update_elements(self, page: str, rows: List[Dict]):
+        """
+        Csak a megadott elemek újraindexelése (naplózott módosításokhoz)
+
+        :param page: Az oldal azonosítója
+        :param rows: A módosított elemek mentési formátumú sorai
+        """
+        page = str(page)
+        with self.connection:
+            self._delete(page, [str(row['oid']) for row in rows])
+            self._insert(page, rows)
+
+    def replace_all(self, pages: Iterable[Tuple[str, Iterable[Dict]]]) -> int:
+        """
+        Az index teljes újraépítése
+
+        :param pages: (oldal azonosító, sorok) párok
+        :return: Az indexelt oldalak száma
+        """
+        count = 0
+        with self.connection:
+            self.connection.execute("DELETE FROM search_elements")
+            self.connection.execute("DELETE FROM search_postings")
+            self.connection.execute(
+                "UPDATE search_stats SET element_count = 0, total_length = 0, built = 1 WHERE id = 1"
+            )
+            for page, rows in pages:
+                self._insert(str(page), rows)
+                count += 1
+        return count
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Keresés BM25 rangsorolással
+
+        Minden szónak szerepelnie kell a találatban; idézőjelek közötti
+        kifejezésnél a pontos szövegrészt is megköveteljük.
+
+        :param query: A keresett szavak vagy "kifejezés"
+        :param limit: A visszaadott találatok maximális száma
+        :return: Találatok listája (page, element, score, snippet), csökkenő pontszám szerint
+        """
+        phrase = None
+        stripped = query.strip()
+        if len(stripped) > 1 and stripped.startswith('"') and stripped.endswith('"'):
+            phrase = stripped[1:-1].lower()
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        element_count, total_length = self.connection.execute(
+            "SELECT element_count, total_length FROM search_stats WHERE id = 1"
+        ).fetchone()
+        if element_count <= 0:
+            return []
+        average_length = total_length / element_count
+
+        scores = defaultdict(float)
+        matched_terms = defaultdict(int)
+        for term in terms:
+            postings = self.connection.execute(
+                "SELECT p.page, p.element, p.tf, e.length FROM search_postings p "
+                "JOIN search_elements e ON e.page = p.page AND e.element = p.element "
+                "WHERE p.term = ?",
+                (term,)
+            ).fetchall()
+            if not postings:
+                return []
+            idf = math.log(1 + (element_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for page, element, tf, length in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                scores[(page, element)] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                matched_terms[(page, element)] += 1
+
+        candidates = sorted(
+            (key for key, matched in matched_terms.items() if matched == len(terms)),
+            key=lambda key: (-scores[key], key)
+        )
+
+        results = []
+        for page, element in candidates:
+            content = self.connection.execute(
+                "SELECT content FROM search_elements WHERE page = ? AND element = ?", (page, element)
+            ).fetchone()[0]
+            if phrase and phrase not in content.lower():
+                continue
+            results.append({
+                'page': page,
+                'element': element,
+                'score': scores[(page, element)],
+                'snippet': self.snippet(content, phrase or terms[0])
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    @staticmethod
+    def snippet(content: str, needle: str, width: int = 60) -> str:
+        """Rövid szövegrészlet a találat körül"""
+        content = " ".join(content.split())
+        position = content.lower().find(needle.lower())
+        if position < 0:
+            position = 0
+        start = max(0, position - width)
+        end = min(len(content), position + len(needle) + width)
+        return ("…" if start > 0 else "") + content[start:end] + ("…" if end < len(content) else "")
+
+
+def search_index_path_from_config(base_path: str, config_manager=None) -> str:
+    """
+    A keresési index adatbázis elérési útja a konfiguráció alapján
+
+    :param base_path: Az alkalmazás könyvtára
+    :param config_manager: ConfigManager példány (opcionális)
+    :return: Abszolút elérési út
+    """
+    relative = "pages/search_index.db"
+    if config_manager is not None:
+        relative = config_manager.get_config('storage.search_index_file', relative)
+    return os.path.join(base_path, relative)
+
+
+# Parancssor: python search_index.py --rebuild | python search_index.py <keresett szöveg>
+if __name__ == "__main__":
+    import sys
+    from config_manager import ConfigManager
+    from document_manager import DocumentManager
+
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    doc_manager = DocumentManager(ConfigManager(os.path.join(base_path, "config")))
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--rebuild":
+        print(f"{doc_manager.rebuild_search_index()} oldal indexelve: {doc_manager.search_index.db_path}")
+    else:
+        for result in doc_manager.search(" ".join(sys.argv[1:])):
+            print(f"{result['score']:7.3f}  doc{result['page']} #{result['element']}  {result['title'] or ''}: {result['snippet']}")
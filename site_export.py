@@ -0,0 +1,390 @@
+"""
+A teljes webhely exportálása egyetlen zip archívumba
+
+Az oldalak és a hivatkozott képek ideiglenes fájlok nélkül, folyamatosan
+kerülnek az archívumba. A tagok tömörítése szálkészletben fut, a még ki
+nem írt tagok száma korlátos, így a memóriahasználat a webhely méretétől
+független. A már tömörített képek (PNG, JPG, GIF) tömörítés nélkül kerülnek
+be.
+
+Minden archívum tartalmaz egy manifest.json tagot az összes oldal és kép
+SHA-256 hash értékével. Növekményes (delta) exportnál csak az előző export
+óta megváltozott tagok kerülnek az új archívumba, a manifest pedig az
+előző archívumra hivatkozik; a restore_export a lánc bármely pontjának
+teljes állapotát visszaállítja.
+
+Használat:
+    python site_export.py [célkönyvtár] [--workers N] [--incremental]
+    python site_export.py --restore <archívum.zip> <célkönyvtár>
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from page_codec import format_page_rows
+from zip_stream import (ZIP_DEFLATED, ZIP_STORED, StreamingZipWriter, deflate_bytes,
+                        file_crc, iter_file_chunks)
+
+# Már tömörített formátumok: újratömörítésük csak időt visz
+STORED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.zip', '.gz')
+
+# E méret fölött a fájlok tömörítés nélkül, darabonként kerülnek az archívumba
+MAX_DEFLATE_SIZE = 16 * 1024 * 1024
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Egy előkészített tag: (név, adat darabok, crc, méret, tömörített méret, mód)
+PreparedMember = Tuple[str, Iterable[bytes], int, int, int, int]
+
+
+# A manifestben elfogadott oldal azonosító (a visszaállítás ebből képez fájlnevet)
+_PAGE_KEY = re.compile(r"[0-9]+")
+
+
+def _is_plain_name(name: str) -> bool:
+    """Könyvtár nélküli fájlnév-e (a célkönyvtárból nem lehet vele kilépni)"""
+    return (isinstance(name, str) and name not in ("", ".", "..")
+            and not any(separator in name for separator in ('/', '\\', ':', '\x00')))
+
+
+def page_member_name(page: str) -> str:
+    """Az oldal tagjának neve az archívumban"""
+    return f"pages/doc{page}.csv"
+
+
+def picture_member_name(picture: str) -> str:
+    """A kép tagjának neve az archívumban"""
+    return f"pictures/{picture}"
+
+
+def prepare_bytes(name: str, data: bytes, level: int = 6) -> PreparedMember:
+    """Memóriában lévő adat tömörítése; ha nem lesz kisebb, tömörítetlenül tároljuk"""
+    compressed, crc = deflate_bytes(data, level)
+    if len(compressed) < len(data):
+        return name, [compressed], crc, len(data), len(compressed), ZIP_DEFLATED
+    return name, [data], crc, len(data), len(data), ZIP_STORED
+
+
+def prepare_page(name: str, rows: List[Dict], level: int = 6,
+                 previous_digest: Optional[str] = None) -> Tuple[str, Optional[PreparedMember]]:
+    """
+    Egy oldal CSV tartalmának előállítása, hash számítása és tömörítése (szálkészletben fut)
+
+    :param previous_digest: Az előző export hash értéke; egyezés esetén nincs tömörítés
+    :return: (SHA-256 hash, előkészített tag vagy None ha nem változott)
+    """
+    data = format_page_rows(rows).encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == previous_digest:
+        return digest, None
+    return digest, prepare_bytes(name, data, level)
+
+
+def prepare_file(name: str, path: str, level: int = 6,
+                 previous_digest: Optional[str] = None) -> Tuple[str, Optional[PreparedMember]]:
+    """
+    Egy fájl előkészítése (szálkészletben fut)
+
+    A már tömörített és a nagy fájlok tartalmát csak a CRC és a hash miatt
+    olvassuk végig; az adat az archívum írásakor, darabonként kerül beolvasásra.
+
+    :param previous_digest: Az előző export hash értéke; egyezés esetén a tag kimarad
+    :return: (SHA-256 hash, előkészített tag vagy None ha nem változott)
+    """
+    size = os.path.getsize(path)
+    if os.path.splitext(path)[1].lower() in STORED_EXTENSIONS or size > MAX_DEFLATE_SIZE:
+        hasher = hashlib.sha256()
+        crc, size = file_crc(path, hasher)
+        digest = hasher.hexdigest()
+        if digest == previous_digest:
+            return digest, None
+        return digest, (name, iter_file_chunks(path), crc, size, size, ZIP_STORED)
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == previous_digest:
+        return digest, None
+    return digest, prepare_bytes(name, data, level)
+
+
+def read_manifest(zip_path: str) -> Optional[Dict]:
+    """Az archívum manifestje (a manifest nélküli, régi archívumoknál None)"""
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            return json.loads(archive.read(MANIFEST_NAME).decode('utf-8'))
+    except (KeyError, zipfile.BadZipFile, FileNotFoundError):
+        return None
+
+
+def latest_export(base_dir: str) -> Optional[Tuple[str, Dict]]:
+    """
+    A legutóbbi manifesttel rendelkező export a könyvtárban
+
+    :return: (archívum elérési út, manifest), vagy None
+    """
+    latest = None
+    for zip_path in glob.glob(os.path.join(base_dir, "save*.zip")):
+        manifest = read_manifest(zip_path)
+        if manifest is not None and (latest is None or manifest['created'] > latest[1]['created']):
+            latest = (zip_path, manifest)
+    return latest
+
+
+def export_chain(zip_path: str) -> List[Tuple[str, Dict]]:
+    """
+    Egy export lánca a teljes exporttól az adott archívumig
+
+    :return: (archívum, manifest) párok, a legrégebbivel kezdve
+    :raises FileNotFoundError: Ha a lánc valamelyik eleme hiányzik
+    """
+    chain = []
+    base_dir = os.path.dirname(zip_path)
+    while zip_path is not None:
+        manifest = read_manifest(zip_path)
+        if manifest is None:
+            raise FileNotFoundError(f"Hiányzó vagy manifest nélküli export: {zip_path}")
+        chain.append((zip_path, manifest))
+        base = manifest.get('base')
+        if base and not _is_plain_name(base):
+            raise ValueError(f"Érvénytelen előző export a manifestben: {base!r} ({zip_path})")
+        zip_path = os.path.join(base_dir, base) if base else None
+    chain.reverse()
+    return chain
+
+
+def restore_export(zip_path: str, target_dir: str) -> Dict:
+    """
+    Egy export időpontjának teljes visszaállítása a láncból
+
+    Minden oldal és kép a lánc legújabb, azt tartalmazó archívumából kerül
+    elő; a tartalom hash értékét a manifesthez ellenőrizzük.
+
+    :param zip_path: A visszaállítandó export (teljes vagy delta)
+    :param target_dir: Célkönyvtár (pages és pictures alkönyvtárakkal)
+    :return: Összesítő (pages, pictures, archives)
+    :raises ValueError: Ha egy tag hiányzik, a hash értéke nem egyezik, vagy a
+        manifest a célkönyvtáron kívülre mutató nevet tartalmaz
+    """
+    chain = export_chain(zip_path)
+    manifest = chain[-1][1]
+    # A célfájlok neve a manifest kulcsaiból képződik: csak számjegyes oldal
+    # azonosító és könyvtár nélküli képnév fogadható el
+    for page in manifest['pages']:
+        if not _PAGE_KEY.fullmatch(page):
+            raise ValueError(f"Érvénytelen oldal azonosító a manifestben: {page!r}")
+    for picture in manifest['pictures']:
+        if not _is_plain_name(picture):
+            raise ValueError(f"Érvénytelen képnév a manifestben: {picture!r}")
+    remaining = {page_member_name(page): digest for page, digest in manifest['pages'].items()}
+    remaining.update({picture_member_name(picture): digest for picture, digest in manifest['pictures'].items()})
+
+    # A legújabb archívumtól visszafelé haladva minden tagot egyszer bontunk ki
+    for archive_path, _ in reversed(chain):
+        if not remaining:
+            break
+        with zipfile.ZipFile(archive_path) as archive:
+            for name in set(archive.namelist()) & set(remaining):
+                target = os.path.join(target_dir, *name.split('/'))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                hasher = hashlib.sha256()
+                with archive.open(name) as source, open(target, 'wb') as f:
+                    for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                        hasher.update(chunk)
+                        f.write(chunk)
+                if hasher.hexdigest() != remaining.pop(name):
+                    raise ValueError(f"Hibás hash érték: {name} ({archive_path})")
+
+    if remaining:
+        raise ValueError(f"{len(remaining)} tag hiányzik a láncból, pl. {next(iter(remaining))}")
+    return {'pages': len(manifest['pages']), 'pictures': len(manifest['pictures']), 'archives': len(chain)}
+
+
+class SiteExporter:
+    """A teljes webhely (minden oldal és hivatkozott kép) exportálása"""
+
+    def __init__(self, doc_manager, workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None, level: int = 6):
+        """
+        :param doc_manager: DocumentManager példány
+        :param workers: A tömörítő szálak száma (alapértelmezett: CPU magok száma)
+        :param max_in_flight: Az egyszerre előkészített, még ki nem írt tagok legnagyobb száma
+        :param level: A deflate tömörítés szintje
+        """
+        self.doc_manager = doc_manager
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.level = level
+        self.pictures_dir = os.path.join(doc_manager.base_path, 'pictures')
+        self.stats = None
+        self.manifest = None
+
+    def picture_names(self, rows: List[Dict]) -> List[str]:
+        """Az oldal PICTURE elemei által hivatkozott képfájlok nevei"""
+        return [
+            os.path.basename(self.doc_manager.unescape_content(row['content']))
+            for row in rows
+            if row['type'] == 'PICTURE' and row['content']
+        ]
+
+    def iter_members(self, executor, previous: Optional[Dict] = None):
+        """
+        Az archívum tagjainak előkészítése a szálkészletben, oldal sorrendben
+
+        :param previous: Az előző export manifestje (delta exportnál)
+        :return: (fajta, kulcs, Future) hármasok iterátora; a fajta 'pages' vagy 'pictures'
+        """
+        previous_pages = previous['pages'] if previous else {}
+        previous_pictures = previous['pictures'] if previous else {}
+        seen_pictures = set()
+        for page in self.doc_manager.list_pages():
+            try:
+                rows = self.doc_manager.get_page_rows(page, use_cache=False)
+            except FileNotFoundError:
+                continue
+            yield 'pages', page, executor.submit(
+                prepare_page, page_member_name(page), rows, self.level, previous_pages.get(page)
+            )
+
+            for picture in self.picture_names(rows):
+                path = os.path.join(self.pictures_dir, picture)
+                if picture in seen_pictures or not os.path.exists(path):
+                    continue
+                seen_pictures.add(picture)
+                yield 'pictures', picture, executor.submit(
+                    prepare_file, picture_member_name(picture), path, self.level, previous_pictures.get(picture)
+                )
+
+    def write(self, fileobj, previous: Optional[Dict] = None, base: Optional[str] = None) -> Dict:
+        """
+        Az archívum írása egy bináris kimenetre
+
+        A tagok a beküldés sorrendjében kerülnek kiírásra; legfeljebb
+        max_in_flight előkészített tag várakozik a memóriában. Az utolsó
+        tag a manifest.
+
+        :param fileobj: Bináris, írható kimenet (nem kell kereshetőnek lennie)
+        :param previous: Az előző export manifestje; megadásakor csak a változások kerülnek be
+        :param base: Az előző export fájlneve (a manifest láncolásához)
+        :return: Összesítő (members, unchanged, size, compressed_size)
+        """
+        writer = StreamingZipWriter(fileobj)
+        stats = {'members': 0, 'unchanged': 0, 'size': 0, 'compressed_size': 0}
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'created': datetime.now().isoformat(),
+            'kind': "delta" if previous is not None else "full",
+            'base': base if previous is not None else None,
+            'pages': {},
+            'pictures': {}
+        }
+
+        def write_member(kind, key, future):
+            digest, member = future.result()
+            manifest[kind][key] = digest
+            if member is None:
+                stats['unchanged'] += 1
+                return
+            name, chunks, crc, size, compressed_size, method = member
+            writer.write_member(name, chunks, crc, size, compressed_size, method)
+            stats['members'] += 1
+            stats['size'] += size
+            stats['compressed_size'] += compressed_size
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for item in self.iter_members(executor, previous):
+                pending.append(item)
+                if len(pending) >= self.max_in_flight:
+                    write_member(*pending.popleft())
+            while pending:
+                write_member(*pending.popleft())
+
+        if previous is not None:
+            manifest['deleted'] = {
+                kind: sorted(set(previous[kind]) - set(manifest[kind])) for kind in ('pages', 'pictures')
+            }
+        name, chunks, crc, size, compressed_size, method = prepare_bytes(
+            MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, sort_keys=True).encode('utf-8'), self.level
+        )
+        writer.write_member(name, chunks, crc, size, compressed_size, method)
+        writer.close()
+        self.manifest = manifest
+        return stats
+
+    def export(self, base_dir: str = None, incremental: bool = False) -> str:
+        """
+        Exportálás a Document.export_to_zip névadásával: save<dátum_idő>.zip
+
+        Növekményes módban a legutóbbi export óta megváltozott tagok kerülnek
+        egy save<dátum_idő>_delta.zip archívumba; ha még nincs előző export,
+        teljes export készül. A fájl előbb .part kiterjesztéssel készül, és
+        csak a sikeres írás után kapja meg a végleges nevét.
+
+        :param base_dir: A célkönyvtár (alapértelmezett: exports)
+        :param incremental: Delta export az előző exporthoz képest
+        :return: Az elkészült archívum elérési útja
+        """
+        if base_dir is None:
+            base_dir = os.path.join(self.doc_manager.base_path, 'exports')
+        os.makedirs(base_dir, exist_ok=True)
+
+        previous = latest_export(base_dir) if incremental else None
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = "_delta" if previous is not None else ""
+        zip_path = os.path.join(base_dir, f"save{timestamp}{suffix}.zip")
+        counter = 1
+        while os.path.exists(zip_path):
+            zip_path = os.path.join(base_dir, f"save{timestamp}_{counter}{suffix}.zip")
+            counter += 1
+
+        part_path = zip_path + ".part"
+        try:
+            with open(part_path, 'wb') as f:
+                if previous is not None:
+                    self.stats = self.write(f, previous[1], os.path.basename(previous[0]))
+                else:
+                    self.stats = self.write(f)
+            os.replace(part_path, zip_path)
+        except Exception:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        return zip_path
+
+
+if __name__ == "__main__":
+    import argparse
+    from config_manager import ConfigManager
+    from document_manager import DocumentManager
+
+    parser = argparse.ArgumentParser(description="A teljes webhely exportálása zip archívumba")
+    parser.add_argument("target", nargs="?", default=None, help="Célkönyvtár (alapértelmezett: exports)")
+    parser.add_argument("--workers", type=int, default=None, help="Tömörítő szálak száma")
+    parser.add_argument("--incremental", action="store_true", help="Csak az előző export óta változott tagok")
+    parser.add_argument("--restore", metavar="ARCHIVE", default=None,
+                        help="A megadott export visszaállítása a célkönyvtárba")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.restore:
+        if not args.target:
+            parser.error("a visszaállításhoz célkönyvtár szükséges")
+        result = restore_export(args.restore, args.target)
+        print(f"{result['pages']} oldal, {result['pictures']} kép visszaállítva {result['archives']} "
+              f"archívumból {time.perf_counter() - start:.2f} mp alatt: {args.target}")
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+        exporter = SiteExporter(DocumentManager(ConfigManager(os.path.join(base_path, "config"))), args.workers)
+        path = exporter.export(args.target, args.incremental)
+        stats = exporter.stats
+        print(f"{stats['members']} tag ({stats['unchanged']} változatlan), {stats['size']} -> "
+              f"{stats['compressed_size']} bájt {time.perf_counter() - start:.2f} mp alatt: {path}")
@@ -0,0 +1,257 @@
+import glob
+import json
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from page_codec import read_page_rows
+
+
+def page_entry(rows: Iterable[Dict]) -> Dict:
+    """
+    Egy oldal index bejegyzésének kinyerése az oldal soraiból
+
+    A cím az első TITLE elem, a szülő a TITLE elem pid értéke, a gyerekek
+    a PAGE elemek, az útvonal a PATH elemek tartalmából ("20#>Cím") jön,
+    pozíció szerint rendezve. A címek nyers (escape-elt) formában maradnak.
+
+    :param rows: Az oldal mentési formátumú sorai
+    :return: Szótár a title, parent, children és path kulcsokkal
+    """
+    title = None
+    parent = None
+    first_pid = None
+    children = []
+    path = []
+    for row in rows:
+        element_type = row['type']
+        if first_pid is None:
+            first_pid = row['pid']
+        if element_type == 'TITLE' and title is None:
+            title = row['content']
+            parent = row['pid']
+        elif element_type in ('PAGE', 'PATH'):
+            target, _, target_title = (row['content'] or "").partition('#>')
+            item = (int(row['position']), target, target_title)
+            (children if element_type == 'PAGE' else path).append(item)
+
+    if parent is None:
+        parent = first_pid
+    # A gyökér oldal pid értéke 0 (vagy üres)
+    if parent in (None, "", "0"):
+        parent = None
+
+    return {
+        'title': title,
+        'parent': parent,
+        'children': [target for _, target, _ in sorted(children)],
+        'path': [[target, target_title] for _, target, target_title in sorted(path)]
+    }
+
+
+def _scan_page_file(filename: str) -> Tuple[str, Optional[Dict]]:
+    """Egy oldal fájl feldolgozása (a párhuzamos újraépítés munkafolyamata)"""
+    oid = re.fullmatch(r"doc(.+)\.csv", os.path.basename(filename)).group(1)
+    try:
+        return oid, page_entry(read_page_rows(filename))
+    except Exception as e:
+        print(f"Hiba a(z) {filename} indexelése során: {e}")
+        return oid, None
+
+
+class SiteIndex:
+    """Az egész webhely oldal indexe: oid -> cím, szülő, gyerekek, útvonal.
+
+    Az index egy SQLite adatbázisban tárolódik, megnyitáskor a memóriába
+    töltődik, így a lekérdezések szótár kereséssel, oldal fájlok olvasása
+    nélkül válaszolnak. Az oldal mentésekor a DocumentManager az
+    update_page hívással tartja naprakészen."""
+
+    def __init__(self, db_path: str, decode: Optional[Callable[[str], str]] = None):
+        """
+        :param db_path: Az index adatbázis elérési útja
+        :param decode: A nyers címek visszaalakítása (pl. DocumentManager.unescape_content)
+        """
+        self.db_path = db_path
+        self.decode = decode or (lambda text: text)
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS site_pages (
+                    oid TEXT PRIMARY KEY,
+                    title TEXT,
+                    parent TEXT,
+                    children TEXT NOT NULL,
+                    path TEXT NOT NULL
+                )
+            """)
+            # Az index állapota: built = 1, ha már készült teljes újraépítés
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS site_index_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+
+        self._titles: Dict[str, Optional[str]] = {}
+        self._parents: Dict[str, Optional[str]] = {}
+        self._children: Dict[str, List[str]] = {}
+        self._paths: Dict[str, List[List[str]]] = {}
+        for oid, title, parent, children, path in self.connection.execute(
+            "SELECT oid, title, parent, children, path FROM site_pages"
+        ):
+            self._remember(oid, title, parent, json.loads(children), json.loads(path))
+
+    def _remember(self, oid, title, parent, children, path):
+        """Bejegyzés felvétele a memóriabeli szótárakba"""
+        self._titles[oid] = title
+        self._parents[oid] = parent
+        self._children[oid] = children
+        self._paths[oid] = path
+
+    def _decoded(self, entry: Dict) -> Dict:
+        """A nyers címek visszaalakítása"""
+        return {
+            'title': self.decode(entry['title']) if entry['title'] else entry['title'],
+            'parent': entry['parent'],
+            'children': entry['children'],
+            'path': [[target, self.decode(title)] for target, title in entry['path']]
+        }
+
+    def close(self):
+        """Adatbázis kapcsolat lezárása"""
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    @property
+    def built(self) -> bool:
+        """Készült-e már teljes újraépítés (az üres index is lehet kész, ha nincs cím)"""
+        row = self.connection.execute("SELECT value FROM site_index_meta WHERE key = 'built'").fetchone()
+        return row is not None and row[0] == '1'
+
+    def __contains__(self, oid) -> bool:
+        return str(oid) in self._titles
+
+    def update_page(self, oid: str, rows: Iterable[Dict]):
+        """
+        Egy oldal bejegyzésének frissítése a mentett sorok alapján
+
+        :param oid: Az oldal azonosítója
+        :param rows: Az oldal mentési formátumú sorai
+        """
+        self.update_pages([(str(oid), page_entry(rows))])
+
+    def update_pages(self, entries: Iterable[Tuple[str, Dict]]):
+        """
+        Több oldal bejegyzésének frissítése egy tranzakcióban
+
+        :param entries: (oid, page_entry eredménye) párok
+        """
+        records = []
+        for oid, entry in entries:
+            entry = self._decoded(entry)
+            self._remember(oid, entry['title'], entry['parent'], entry['children'], entry['path'])
+            records.append((
+                oid, entry['title'], entry['parent'],
+                json.dumps(entry['children']), json.dumps(entry['path'], ensure_ascii=False)
+            ))
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO site_pages (oid, title, parent, children, path) VALUES (?, ?, ?, ?, ?)",
+                records
+            )
+
+    def remove_page(self, oid: str):
+        """Egy oldal eltávolítása az indexből"""
+        oid = str(oid)
+        for mapping in (self._titles, self._parents, self._children, self._paths):
+            mapping.pop(oid, None)
+        with self.connection:
+            self.connection.execute("DELETE FROM site_pages WHERE oid = ?", (oid,))
+
+    def rebuild(self, pages_dir: str, workers: Optional[int] = None) -> int:
+        """
+        Teljes újraépítés a pages/doc*.csv fájlokból, párhuzamos feldolgozással
+
+        :param pages_dir: Az oldal fájlokat tartalmazó könyvtár
+        :param workers: A munkafolyamatok száma (alapértelmezett: CPU magok száma)
+        :return: Az indexelt oldalak száma
+        """
+        filenames = sorted(glob.glob(os.path.join(pages_dir, "doc*.csv")))
+        if not filenames:
+            return self.replace_all([])
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_scan_page_file, filenames, chunksize=64))
+        return self.replace_all((oid, entry) for oid, entry in results if entry is not None)
+
+    def replace_all(self, entries: Iterable[Tuple[str, Dict]]) -> int:
+        """
+        Az index teljes cseréje
+
+        :param entries: (oid, page_entry eredménye) párok
+        :return: Az indexelt oldalak száma
+        """
+        entries = list(entries)
+        for mapping in (self._titles, self._parents, self._children, self._paths):
+            mapping.clear()
+        with self.connection:
+            self.connection.execute("DELETE FROM site_pages")
+        self.update_pages(entries)
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO site_index_meta (key, value) VALUES ('built', '1')")
+        return len(entries)
+
+    def title(self, oid: str) -> Optional[str]:
+        """Az oldal címe"""
+        return self._titles.get(str(oid))
+
+    def parent(self, oid: str) -> Optional[str]:
+        """A szülő oldal azonosítója (a gyökérnél None)"""
+        return self._parents.get(str(oid))
+
+    def children(self, oid: str) -> List[str]:
+        """A gyerek oldalak azonosítói pozíció szerint"""
+        return list(self._children.get(str(oid), []))
+
+    def breadcrumb(self, oid: str) -> List[Tuple[str, str]]:
+        """Az oldal útvonala (oid, cím) párokként, a gyökértől az oldalig"""
+        return [tuple(item) for item in self._paths.get(str(oid), [])]
+
+    def pages(self) -> List[str]:
+        """Az összes indexelt oldal azonosítója"""
+        return list(self._titles)
+
+
+def site_index_path_from_config(base_path: str, config_manager=None) -> str:
+    """
+    Az index adatbázis elérési útja a konfiguráció alapján
+
+    :param base_path: Az alkalmazás könyvtára
+    :param config_manager: ConfigManager példány (opcionális)
+    :return: Abszolút elérési út
+    """
+    relative = "pages/site_index.db"
+    if config_manager is not None:
+        relative = config_manager.get_config('storage.site_index_file', relative)
+    return os.path.join(base_path, relative)
+
+
+# Teljes újraépítés parancssorból: python site_index.py
+if __name__ == "__main__":
+    import time
+    from config_manager import ConfigManager
+    from document_manager import DocumentManager
+
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    doc_manager = DocumentManager(ConfigManager(os.path.join(base_path, "config")))
+
+    start = time.perf_counter()
+    count = doc_manager.rebuild_site_index()
+    print(f"{count} oldal indexelve {time.perf_counter() - start:.2f} mp alatt: {doc_manager.site_index.db_path}")
@@ -0,0 +1,66 @@
+"""
+BulkImporter: az új oldalak és a meglévő szülő PAGE hivatkozásai együtt mentődnek
+"""
+import json
+import os
+
+import pytest
+
+from bulk_import import BulkImporter
+from document_manager import DocumentManager
+from test_document_manager import TempConfig, page_rows
+
+
+class ImportConfig(TempConfig):
+    """TempConfig egyszerű, folyamaton belüli OID foglalással"""
+
+    def __init__(self, root, mode="csv"):
+        super().__init__(root, mode)
+        self.next_oid = 1000
+
+    def allocate_oids(self, count=1):
+        oids = [str(oid) for oid in range(self.next_oid, self.next_oid + count)]
+        self.next_oid += count
+        return oids
+
+
+@pytest.fixture
+def importer(tmp_path):
+    os.makedirs(tmp_path / "pages")
+    config = ImportConfig(str(tmp_path))
+    dm = DocumentManager(config)
+    dm.store_pages([("20", page_rows("20", 2))])
+    source = tmp_path / "import"
+    source.mkdir()
+    (source / "pages.json").write_text(json.dumps([
+        {"key": "a", "title": "Első", "parent": "20", "elements": [{"type": "TEXT", "content": "Szöveg"}]},
+        {"key": "b", "title": "Második", "parent": "a", "elements": []},
+    ]), encoding='utf-8')
+    return BulkImporter(dm, config), str(source)
+
+
+def test_import_links_existing_parent(importer):
+    bulk, source = importer
+    report = bulk.run(source, workers=1)
+    assert report['errors'] == []
+    assert report['pages'] == 2
+
+    dm = bulk.doc_manager
+    subpages = dm.read_document("20")['subpages']
+    assert [subpage['content'].split('#>')[1] for subpage in subpages] == ["Első"]
+    assert len(dm.list_pages()) == 3
+    (first,) = dm.site_index.children("20")
+    assert dm.site_index.title(first) == "Első"
+    assert [dm.site_index.title(child) for child in dm.site_index.children(first)] == ["Második"]
+
+
+def test_failed_parent_link_saves_nothing(importer, monkeypatch):
+    bulk, source = importer
+    dm = bulk.doc_manager
+    monkeypatch.setattr(bulk, '_link_existing', lambda parent, links: False)
+
+    report = bulk.run(source, workers=1)
+    assert report['pages'] == 0
+    assert len(report['errors']) == 1
+    assert dm.list_pages() == ["20"]
+    assert dm.read_document("20")['subpages'] == []
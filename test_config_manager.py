@@ -0,0 +1,66 @@
+"""
+ConfigManager.allocate_oids: párhuzamos folyamatok sem kapnak átfedő OID tartományt
+"""
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from config_manager import ConfigManager
+
+PROCESSES = 4
+ALLOCATIONS = 50
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    (config_dir / "config.json").write_text(json.dumps({'oid_sequence_starts': 1000, 'oid_block_size': 7}))
+    (config_dir / "state.json").write_text(json.dumps({'next_oid': -1, 'current_language': "hu"}))
+    return str(config_dir)
+
+
+def disk_next_oid(config_dir):
+    with open(f"{config_dir}/state.json", encoding='utf-8') as f:
+        return int(json.load(f)['next_oid'])
+
+
+def allocate_many(config_dir):
+    """Egy munkafolyamat: változó méretű kérések, a kiadott OID-k listája"""
+    config_manager = ConfigManager(config_dir)
+    oids = []
+    for i in range(ALLOCATIONS):
+        oids.extend(config_manager.allocate_oids(1 + i % 9))
+    return oids
+
+
+def test_processes_never_get_overlapping_oids(config_dir):
+    with ProcessPoolExecutor(max_workers=PROCESSES) as executor:
+        results = list(executor.map(allocate_many, [config_dir] * PROCESSES))
+
+    oids = [int(oid) for result in results for oid in result]
+    assert len(oids) == len(set(oids))
+    assert min(oids) >= 1000
+    assert disk_next_oid(config_dir) > max(oids)
+
+
+def test_high_water_mark_never_decreases(config_dir):
+    first = ConfigManager(config_dir)
+    second = ConfigManager(config_dir)
+    first.allocate_oids(3)
+    marks = [disk_next_oid(config_dir)]
+
+    # A második példány nagyobb tartományt foglal; az első a régi next_oid értékkel ment állapotot
+    second.allocate_oids(50)
+    marks.append(disk_next_oid(config_dir))
+    first.set_state('current_language', "en")
+    marks.append(disk_next_oid(config_dir))
+    # Az első a saját maradék tartományából ad ki, majd új tartományt foglal a lemezen lévő érték fölött
+    reused = first.allocate_oids(10)
+    marks.append(disk_next_oid(config_dir))
+
+    assert marks == sorted(marks)
+    assert marks[2] == marks[1]
+    assert int(reused[-1]) >= marks[1]
+    assert not set(reused) & set(second.allocate_oids(1))
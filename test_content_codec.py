@@ -0,0 +1,120 @@
+"""
+A content_codec tulajdonság alapú ellenőrzése: a visszaalakítás a kódolás pontos inverze
+
+A hypothesis helyett rögzített magú véletlen szövegekkel, így a hibás eset megismételhető.
+"""
+import random
+
+import pytest
+
+import content_codec
+
+# A kódolás szempontjából érdekes karakterek és karaktersorozatok túlsúlyban
+ALPHABET = list("abcXYZ 019éő#>") + list(content_codec.ESCAPES) + [
+    "&lt;", "&amp;", "&amp;lt;", "&quot;", "&#39;", "\\n", "\\\\", "\\t", "\x00", "&", "\\"
+]
+ITERATIONS = 5000
+
+
+def random_text(rng, max_length=40):
+    """Véletlen szöveg az ALPHABET elemeiből"""
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_length)))
+
+
+def test_round_trip():
+    rng = random.Random(20240611)
+    for _ in range(ITERATIONS):
+        text = random_text(rng)
+        assert content_codec.decode(content_codec.encode(text)) == text, repr(text)
+
+
+def test_encoded_has_no_special_characters():
+    rng = random.Random(7)
+    for _ in range(ITERATIONS):
+        encoded = content_codec.encode(random_text(rng))
+        assert not any(char in encoded for char in "\n\r\t<>\"'"), repr(encoded)
+
+
+def test_page_round_trip_without_newlines():
+    rng = random.Random(11)
+    for _ in range(ITERATIONS):
+        text = random_text(rng).replace("\\n", "").replace("\\r", "").replace("\n", "").replace("\r", "")
+        assert content_codec.decode(content_codec.encode_page(text)) == text, repr(text)
+
+
+def test_page_newlines_become_spaces():
+    assert content_codec.decode(content_codec.encode_page("a\nb\r\nc\\nd")) == "a b  c d"
+
+
+@pytest.mark.parametrize("text, encoded", [
+    ("<b>", "&lt;b&gt;"),
+    ("a & b", "a &amp; b"),
+    ("&lt;", "&amp;lt;"),
+    ("sor1\nsor2", "sor1\\nsor2"),
+    ("C:\\new", "C:\\\\new"),
+    ("20#>Cím", "20#&gt;Cím"),
+])
+def test_known_values(text, encoded):
+    assert content_codec.encode(text) == encoded
+    assert content_codec.decode(encoded) == text
+
+
+@pytest.mark.parametrize("value", [None, ""])
+def test_empty_values_unchanged(value):
+    assert content_codec.encode(value) == value
+    assert content_codec.decode(value) == value
+    assert content_codec.encode_page(value) == value
+
+
+def test_many_matches_single():
+    rng = random.Random(3)
+    for _ in range(200):
+        values = [random_text(rng) for _ in range(rng.randint(0, 30))]
+        if values and rng.random() < 0.3:
+            values[rng.randrange(len(values))] = None
+        encoded = content_codec.encode_many(values)
+        assert encoded == [content_codec.encode(value) for value in values]
+        assert content_codec.decode_many(encoded) == values
+
+
+def test_many_accepts_iterables():
+    values = ["<a>", None, "", "x\ty"]
+    assert content_codec.decode_many(content_codec.encode_many(iter(values))) == values
+    assert content_codec.encode_many([]) == []
+
+
+def baseline_escape(content):
+    """A korábbi escape_content pontos másolata: így kódolták a régi oldalakat"""
+    replacements = {
+        '\n': '\\n', '\r': '\\r', '\t': '\\t',
+        '<': '&lt;', '>': '&gt;', '&': '&amp;', '"': '&quot;', "'": '&apos;',
+    }
+    for original, escaped in replacements.items():
+        content = content.replace(original, escaped)
+    return content
+
+
+@pytest.mark.parametrize("stored, text", [
+    ("a &amp;lt;b&amp;gt; c", "a <b> c"),
+    ("Tom &amp; Jerry", "Tom & Jerry"),
+    ("&amp;quot;idézet&amp;quot; &amp;apos;x&amp;apos;", "\"idézet\" 'x'"),
+    ("sor1\\nsor2\\ttab", "sor1\nsor2\ttab"),
+    ("C:\\\\mappa", "C:\\\\mappa"),
+])
+def test_legacy_decode_known_values(stored, text):
+    assert content_codec.legacy_decode(stored) == text
+
+
+def test_legacy_decode_inverts_baseline_escape():
+    # A régi kódolás nem kölcsönösen egyértelmű (pl. szó szerinti "&amp;" vagy "\\n"),
+    # ezért csak az egyértelmű karakterekből álló szövegekre inverz
+    alphabet = list("abcXYZ 019éő#>") + list("<>&\"'\n\r\t")
+    rng = random.Random(19)
+    for _ in range(ITERATIONS):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        assert content_codec.legacy_decode(baseline_escape(text)) == text, repr(text)
+
+
+@pytest.mark.parametrize("value", [None, ""])
+def test_legacy_empty_values_unchanged(value):
+    assert content_codec.legacy_decode(value) == value
@@ -0,0 +1,220 @@
+"""
+DocumentManager: a naplózott módosítások nem vesznek el a teljes oldal mentésekor
+
+Minden teszt saját, ideiglenes könyvtárba dolgozik (oldalak, napló, indexek).
+"""
+import os
+
+import pytest
+
+from document_manager import DocumentManager
+from models import DocumentElement, DocumentElementType
+from picture_store import PictureStore, file_digest
+
+
+class TempConfig:
+    """A ConfigManager get_config helyett: minden tároló az ideiglenes könyvtárba kerül"""
+
+    def __init__(self, root, mode="csv"):
+        self.values = {
+            'storage.mode': mode,
+            'paths.documents_dir': os.path.join(root, "pages"),
+            'storage.sqlite_file': os.path.join(root, "pages", "pages.db"),
+            'storage.site_index_file': os.path.join(root, "pages", "site_index.db"),
+            'storage.search_index_file': os.path.join(root, "pages", "search_index.db"),
+            'storage.picture_store_file': os.path.join(root, "pictures.db"),
+        }
+
+    def get_config(self, key, default=None):
+        return self.values.get(key, default)
+
+
+def page_rows(page, count):
+    rows = [{'oid': page, 'name': f"TITLE{page}", 'content': "Cím", 'type': "TITLE",
+             'status': "PUBLIC", 'pid': "1", 'position': "1024"}]
+    for i in range(1, count):
+        rows.append({'oid': f"{page}{i}", 'name': "TEXT", 'content': f"Szöveg {i}", 'type': "TEXT",
+                     'status': "PUBLIC", 'pid': "1", 'position': str((i + 1) * 1024)})
+    return rows
+
+
+@pytest.fixture(params=["csv", "columnar", "sqlite"])
+def doc_manager(request, tmp_path):
+    os.makedirs(tmp_path / "pages")
+    dm = DocumentManager(TempConfig(str(tmp_path), request.param))
+    dm.store_pages([("20", page_rows("20", 4))])
+    return dm
+
+
+def element_order(dm, page):
+    return [element['oid'] for element in dm.read_document(page)['elements']]
+
+
+def test_show_page_sees_journal(doc_manager):
+    dm = doc_manager
+    rows = dm.read_document("20")['elements']
+    rows[3]['position'] = "512"  # az utolsó elem az elejére
+    dm.apply_changes("20", 'move', [rows[3]])
+    rows[1]['status'] = "EDIT"
+    dm.apply_changes("20", 'status', [rows[1]])
+
+    page = dm.show_page("20", "doc20")
+    assert [element['oid'] for element in page['elements']] == ["203", "20", "201", "202"]
+    assert page['elements'][2]['status'] == "EDIT"
+
+
+def test_document_save_keeps_journaled_changes(doc_manager):
+    dm = doc_manager
+    rows = dm.read_document("20")['elements']
+    rows[3]['position'] = "512"
+    dm.apply_changes("20", 'move', [rows[3]])
+    rows[2]['position'] = "1536"
+    dm.apply_changes("20", 'move', [rows[2]])
+    expected = element_order(dm, "20")
+
+    dm.show_page("20", "doc20")
+    dm.current_document.add_element(
+        DocumentElement(name="TEXT", content="Új", element_type=DocumentElementType.get("TEXT"), oid="209")
+    )
+
+    assert element_order(dm, "20") == expected + ["209"]
+    # A mentett alapfájl már mindent tartalmaz, a napló üres
+    assert dm.journal.entry_count("20") == 0
+    dm.page_cache.clear()
+    assert element_order(dm, "20") == expected + ["209"]
+
+
+def test_crash_before_journal_truncate(doc_manager, tmp_path):
+    dm = doc_manager
+    rows = dm.read_document("20")['elements']
+    rows[1]['status'] = "EDIT"
+    dm.apply_changes("20", 'status', [rows[1]])
+
+    # Teljes mentés, ami törli a 201-es elemet, majd összeomlás a napló törlése előtt
+    remaining = [row for row in dm.get_page_rows("20") if row['oid'] != "201"]
+    dm.page_store.write_rows("20", remaining)
+    assert os.path.exists(dm.journal.path("20"))
+
+    reopened = DocumentManager(TempConfig(str(tmp_path), dm.storage_mode))
+    assert element_order(reopened, "20") == ["20", "202", "203"]
+    assert [row['oid'] for row in reopened.iter_elements("20")] == ["20", "202", "203"]
+
+    # Az elavult napló a következő módosításnál törlődik, nem keveredik az újjal
+    rows = reopened.read_document("20")['elements']
+    rows[2]['status'] = "DEL"
+    reopened.apply_changes("20", 'status', [rows[2]])
+    assert reopened.journal.entry_count("20") == 1
+    assert [row['status'] for row in reopened.read_document("20")['elements']] == ["PUBLIC", "PUBLIC", "DEL"]
+
+
+def test_legacy_content_migrated_once(doc_manager, tmp_path, monkeypatch):
+    dm = doc_manager
+    # A régi escape_content alakja: a < &amp;lt;, a PAGE cím kétszer kódolva
+    legacy = page_rows("30", 3)
+    legacy[1]['content'] = "a &amp;lt;b&amp;gt; c\\nTom &amp;amp; Jerry"
+    legacy[2].update(name="PAGE", type="PAGE", content="20#>&amp;lt;Főoldal&amp;gt;")
+    dm.page_store.write_rows("30", legacy)
+    os.remove(dm._content_format_path())
+    unchanged = dm.page_store.page_signature("20")
+
+    # A konstruktor nem kódol át és nem épít indexet a régi tartalomból
+    dm.search_index.close()
+    os.remove(dm.search_index.db_path)
+    reopened = DocumentManager(TempConfig(str(tmp_path), dm.storage_mode))
+    assert reopened.content_migration_pending
+    assert not reopened.search_index.built
+
+    assert reopened.migrate_content_format() == 1
+    document = reopened.read_document("30")
+    assert document['elements'][1]['content'] == "a <b> c\nTom & Jerry"
+    assert document['subpages'][0]['content'] == "20#><Főoldal>"
+    # A különleges karakter nélküli oldal nem íródik újra
+    assert reopened.page_store.page_signature("20") == unchanged
+    assert [result['page'] for result in reopened.search("Jerry")] == ["30"]
+
+    # A jelölő fájl miatt a következő megnyitás és hívás már nem kódol át újra
+    again = DocumentManager(TempConfig(str(tmp_path), dm.storage_mode))
+    assert not again.content_migration_pending
+    assert again.migrate_content_format() == 0
+    assert again.read_document("30")['elements'][1]['content'] == "a <b> c\nTom & Jerry"
+
+
+def test_search_index_built_on_first_open(doc_manager, tmp_path):
+    dm = doc_manager
+    # Meglévő webhely, amelyhez még nem készült keresési index
+    dm.search_index.close()
+    os.remove(dm.search_index.db_path)
+
+    reopened = DocumentManager(TempConfig(str(tmp_path), dm.storage_mode))
+    assert len(reopened.search_index) == 4
+    assert [result['element'] for result in reopened.search("Szöveg 2")][:1] == ["202"]
+
+
+def test_search_index_not_rebuilt_when_built(tmp_path, monkeypatch):
+    os.makedirs(tmp_path / "pages")
+    dm = DocumentManager(TempConfig(str(tmp_path)))
+    # Csak nem indexelt típusú elemek: a keresési index üres, de már elkészült
+    dm.store_pages([("30", [dict(row, type="PICTURE", content="") for row in page_rows("30", 3)])])
+    dm.rebuild_search_index()
+    assert len(dm.search_index) == 0
+    assert dm.search_index.built
+
+    rebuilds = []
+    monkeypatch.setattr(DocumentManager, 'rebuild_search_index', lambda self: rebuilds.append(1))
+    DocumentManager(TempConfig(str(tmp_path)))
+    assert rebuilds == []
+
+
+def test_site_index_built_on_first_open(doc_manager, tmp_path):
+    dm = doc_manager
+    # Meglévő webhely oldal index nélkül: az index, a hierarchia és a függőségek is üresek
+    dm.site_index.close()
+    os.remove(dm.site_index.db_path)
+
+    reopened = DocumentManager(TempConfig(str(tmp_path), dm.storage_mode))
+    assert len(reopened.site_index) == 1
+    assert reopened.site_index.title("20") == "Cím"
+    assert "20" in reopened.hierarchy
+
+
+def test_site_index_not_rebuilt_when_built(tmp_path, monkeypatch):
+    os.makedirs(tmp_path / "pages")
+    # Egyetlen, nem indexelhető oldal: az index üres, de már elkészült
+    (tmp_path / "pages" / "doc30.csv").write_bytes(b"\xff\xfe nem UTF-8")
+    dm = DocumentManager(TempConfig(str(tmp_path)))
+    dm.migrate_content_format()
+    assert len(dm.site_index) == 0
+    assert dm.site_index.built
+
+    rebuilds = []
+    monkeypatch.setattr(DocumentManager, 'rebuild_site_index', lambda self, workers=None: rebuilds.append(1))
+    DocumentManager(TempConfig(str(tmp_path)))
+    assert rebuilds == []
+
+
+def test_legacy_pictures_moved_only_by_migration(tmp_path):
+    os.makedirs(tmp_path / "pages")
+    dm = DocumentManager(TempConfig(str(tmp_path)))
+    dm.base_path = str(tmp_path)
+    dm.picture_store = PictureStore(str(tmp_path / "pictures"), str(tmp_path / "pictures.db"))
+    (tmp_path / "pictures" / "pic21.png").write_bytes(b"regi kep")
+    (tmp_path / "kulso.png").write_bytes(b"kulso kep")
+    legacy = ["pictures/pic21.png", str(tmp_path / "kulso.png"), str(tmp_path / "hianyzo.png")]
+    rows = page_rows("20", 1) + [
+        {'oid': f"2{i}", 'name': "PICTURE", 'content': path, 'type': "PICTURE",
+         'status': "PUBLIC", 'pid': "1", 'position': str((i + 1) * 1024)}
+        for i, path in enumerate(legacy, start=1)
+    ]
+    dm.store_pages([("20", rows)])
+
+    # A betöltés nem importál fájlt, és a hiányzó kép sem akadályozza meg
+    page = dm.show_page("20", "doc20")
+    assert [element['content'] for element in page['elements'][1:]] == legacy
+    assert dm.picture_store.connection.execute("SELECT COUNT(*) FROM picture_blobs").fetchone()[0] == 0
+
+    assert dm.migrate_picture_references() == 1
+    contents = [row['content'] for row in dm.get_page_rows("20")[1:]]
+    digests = [file_digest(str(tmp_path / "pictures" / "pic21.png")), file_digest(str(tmp_path / "kulso.png"))]
+    assert contents == [f"pictures/{digest}.png" for digest in digests] + [legacy[2]]
+    assert [dm.picture_store.refcount(digest) for digest in digests] == [1, 1]
+    assert dm.migrate_picture_references() == 0
@@ -0,0 +1,62 @@
+"""
+Document.batch: egyetlen mentés a blokk végén, kivételnél visszaállás
+"""
+import pytest
+
+from models import Document, DocumentElement, DocumentElementType
+
+
+class RecordingStore:
+    """Oldal tároló, ami csak feljegyzi az írásokat"""
+
+    def __init__(self):
+        self.writes = []
+
+    def write_rows(self, page, rows):
+        self.writes.append((page, rows))
+
+
+def make_document(count):
+    document = Document("teszt")
+    for number in range(count):
+        document.add_element(DocumentElement(
+            name="TEXT", content="elem %d" % number,
+            element_type=DocumentElementType.get("TEXT"), oid="e%d" % number))
+    document.store = RecordingStore()
+    return document
+
+
+def state(document):
+    return [(elem.oid, elem.position, elem.pid) for elem in document.elements]
+
+
+def test_batch_saves_once():
+    document = make_document(2)
+    with document.batch():
+        document.add_element(DocumentElement(
+            name="TEXT", content="új", element_type=DocumentElementType.get("TEXT"), oid="n"))
+        document.move_element("e0", -1)
+    assert len(document.store.writes) == 1
+    assert [oid for oid, _, _ in state(document)] == ["e1", "n", "e0"]
+
+
+def test_batch_restores_list_positions_and_pids_on_exception():
+    document = make_document(3)
+    before = state(document)
+    moved = document.elements[0]
+
+    with pytest.raises(RuntimeError):
+        with document.batch():
+            document.add_element(DocumentElement(
+                name="TEXT", content="új", element_type=DocumentElementType.get("TEXT"), oid="n"))
+            document.move_element("e0", -1)
+            document.remove_element("e1")
+            document.elements[1].pid = "máshol"
+            raise RuntimeError("megszakítva")
+
+    assert state(document) == before
+    assert document.elements[0] is moved
+    assert document.store.writes == []
+    # A visszaállás után a következő módosítás a szokásos módon mentődik
+    document.move_element("e0", -1)
+    assert len(document.store.writes) == 1
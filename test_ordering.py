@@ -0,0 +1,44 @@
+"""
+Hézagos pozíciók: beszúrás a hézagba és újrasorszámozás, ha a hézag elfogy
+"""
+from ordering import POSITION_GAP, dense_ranks, position_at, reposition, sort_rows
+
+
+def rows_at(*positions):
+    return [{'oid': str(index), 'position': str(position)}
+            for index, position in enumerate(positions, 1)]
+
+
+def test_insert_into_gap_changes_only_the_element():
+    rows = rows_at(position_at(0), position_at(1))
+    new = {'oid': "9", 'position': "0"}
+
+    changed = reposition(rows, new, after=rows[0])
+    assert changed == [new]
+    assert int(new['position']) == POSITION_GAP + POSITION_GAP // 2
+
+
+def test_rebalances_when_gap_is_used_up():
+    # Régi, sűrű 1..N pozíciók: két szomszéd között nincs szabad érték
+    rows = rows_at(1, 2, 3)
+    new = {'oid': "9", 'position': "0"}
+
+    changed = reposition(rows, new, after=rows[0])
+    assert [row['position'] for row in rows] == [str(position_at(i)) for i in range(3)]
+    assert changed[-1] is new
+    assert {row['oid'] for row in changed} == {"1", "2", "3", "9"}
+    assert [row['oid'] for row in sort_rows(rows + [new])] == ["1", "9", "2", "3"]
+
+
+def test_repeated_inserts_keep_order():
+    rows = rows_at(position_at(0), position_at(1))
+    anchor = rows[0]
+    # Mindig ugyanoda beszúrva a hézag néhány lépés után elfogy
+    for number in range(20):
+        new = {'oid': "n%d" % number, 'position': "0"}
+        reposition(rows, new, after=anchor)
+        rows.append(new)
+    ranks = dense_ranks(rows)
+    assert ranks["1"] == 1 and ranks["2"] == len(rows)
+    assert ranks["n19"] == 2 and ranks["n0"] == len(rows) - 1
+    assert len({row['position'] for row in rows}) == len(rows)
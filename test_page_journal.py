@@ -0,0 +1,76 @@
+"""
+PageJournal: újrajátszás, a félbeszakadt utolsó sor visszavágása és az összevonási küszöb
+"""
+import os
+
+from document_manager import DocumentManager
+from page_journal import PageJournal
+from test_document_manager import TempConfig, page_rows
+
+BASE = (1, 2, 3)
+
+
+def test_replay_applies_entries_in_order(tmp_path):
+    journal = PageJournal(str(tmp_path))
+    rows = page_rows("20", 3)
+    journal.append("20", 'status', [dict(rows[1], status="EDIT")], BASE)
+    journal.append("20", 'move', [dict(rows[1], status="EDIT", position="512")], BASE)
+    journal.append("20", 'insert', [dict(rows[2], oid="209", position="4096")], BASE)
+
+    replayed = journal.replay("20", rows, BASE)
+    assert [row['oid'] for row in replayed] == ["201", "20", "202", "209"]
+    assert replayed[0]['status'] == "EDIT"
+    # Az újrajátszás idempotens: minden bejegyzés a teljes sor állapot
+    assert journal.replay("20", replayed, BASE) == replayed
+
+
+def test_torn_last_line_is_truncated(tmp_path):
+    journal = PageJournal(str(tmp_path))
+    rows = page_rows("20", 2)
+    journal.append("20", 'status', [dict(rows[1], status="EDIT")], BASE)
+    valid_size = os.path.getsize(journal.path("20"))
+    # Összeomlás az írás közben: csonka, sortörés nélküli utolsó sor
+    with open(journal.path("20"), 'ab') as f:
+        f.write(b'0badc0de {"op":"status","ro')
+
+    reopened = PageJournal(str(tmp_path))
+    assert [entry['op'] for entry in reopened.entries("20")] == ['status']
+    assert os.path.getsize(journal.path("20")) == valid_size
+
+    # A következő bejegyzés ép sorként kerül a visszavágott fájl végére
+    reopened.append("20", 'status', [dict(rows[1], status="DEL")], BASE)
+    assert [row['status'] for row in PageJournal(str(tmp_path)).replay("20", rows, BASE)] == ["PUBLIC", "DEL"]
+
+
+def test_corrupted_line_stops_replay(tmp_path):
+    journal = PageJournal(str(tmp_path))
+    rows = page_rows("20", 2)
+    journal.append("20", 'status', [dict(rows[1], status="EDIT")], BASE)
+    journal.append("20", 'status', [dict(rows[1], status="DEL")], BASE)
+    with open(journal.path("20"), 'rb') as f:
+        lines = f.readlines()
+    with open(journal.path("20"), 'wb') as f:
+        f.writelines(lines[:-1] + [lines[-1].replace(b"DEL", b"PRE")])
+
+    assert [row['status'] for row in PageJournal(str(tmp_path)).replay("20", rows, BASE)] == ["PUBLIC", "EDIT"]
+
+
+def test_compaction_after_threshold(tmp_path):
+    os.makedirs(tmp_path / "pages")
+    config = TempConfig(str(tmp_path))
+    config.values['storage.journal_compact_after'] = 3
+    dm = DocumentManager(config)
+    dm.store_pages([("20", page_rows("20", 4))])
+
+    statuses = ["EDIT", "PRE"]
+    for i, status in enumerate(statuses, start=1):
+        rows = dm.read_document("20")['elements']
+        dm.apply_changes("20", 'status', [dict(rows[i], status=status)])
+    assert dm.journal.entry_count("20") == 2
+
+    # A küszöb elérésekor a napló az alapfájlba kerül, és törlődik
+    rows = dm.read_document("20")['elements']
+    dm.apply_changes("20", 'status', [dict(rows[3], status="DEL")])
+    assert dm.journal.entry_count("20") == 0
+    assert not os.path.exists(dm.journal.path("20"))
+    assert [row['status'] for row in dm.page_store.read_rows("20")] == ["PUBLIC", "EDIT", "PRE", "DEL"]
@@ -0,0 +1,35 @@
+"""
+Oldal tárolók: tárolási mód váltás (copy_pages) a még össze nem vont naplóval
+"""
+import os
+
+import pytest
+
+from document_manager import DocumentManager
+from page_store import copy_pages
+from test_document_manager import TempConfig, element_order, page_rows
+
+MODES = ["csv", "columnar", "sqlite"]
+
+
+@pytest.mark.parametrize("source_mode, target_mode", [
+    (source_mode, target_mode) for source_mode in MODES for target_mode in MODES if source_mode != target_mode
+])
+def test_copy_pages_keeps_journaled_changes(tmp_path, source_mode, target_mode):
+    os.makedirs(tmp_path / "pages")
+    source = DocumentManager(TempConfig(str(tmp_path), source_mode))
+    source.store_pages([("20", page_rows("20", 4))])
+    rows = source.read_document("20")['elements']
+    rows[1]['status'] = "EDIT"
+    source.apply_changes("20", 'status', [rows[1]])
+    rows[3]['position'] = "512"
+    source.apply_changes("20", 'move', [rows[3]])
+    assert source.journal.entry_count("20") == 2
+
+    target = DocumentManager(TempConfig(str(tmp_path), target_mode))
+    assert copy_pages(source.page_store, target.page_store, journal=source.journal) == 1
+    assert source.journal.entry_count("20") == 0
+
+    target.page_cache.clear()
+    assert element_order(target, "20") == ["203", "20", "201", "202"]
+    assert [row['status'] for row in target.read_document("20")['elements']] == ["PUBLIC", "PUBLIC", "EDIT", "PUBLIC"]
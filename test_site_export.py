@@ -0,0 +1,58 @@
+"""
+restore_export: a manifest kulcsaiból képzett célfájlok nem kerülhetnek a célkönyvtáron kívülre
+"""
+import hashlib
+import json
+import zipfile
+
+import pytest
+
+from site_export import MANIFEST_NAME, restore_export
+
+
+def write_export(path, members, pages=None, pictures=None, base=None):
+    """Kézzel összeállított export archívum a megadott manifesttel"""
+    digests = {name: hashlib.sha256(data).hexdigest() for name, data in members.items()}
+    manifest = {
+        'created': "2026-10-17T00:00:00",
+        'base': base,
+        'pages': {page: digests[name] for page, name in (pages or {}).items()},
+        'pictures': {picture: digests[name] for picture, name in (pictures or {}).items()},
+    }
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest))
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+
+def test_restore_writes_pages_and_pictures(tmp_path):
+    archive = tmp_path / "save1.zip"
+    write_export(archive, {"pages/doc20.csv": b"oldal", "pictures/kep.png": b"kep"},
+                 pages={"20": "pages/doc20.csv"}, pictures={"kep.png": "pictures/kep.png"})
+    target = tmp_path / "restored"
+    assert restore_export(str(archive), str(target)) == {'pages': 1, 'pictures': 1, 'archives': 1}
+    assert (target / "pages" / "doc20.csv").read_bytes() == b"oldal"
+    assert (target / "pictures" / "kep.png").read_bytes() == b"kep"
+
+
+@pytest.mark.parametrize("pages, pictures", [
+    ({"/../../kulso": "pages/doc/../../kulso.csv"}, {}),
+    ({}, {"../kulso.png": "pictures/../kulso.png"}),
+    ({}, {"..\\kulso.png": "pictures/..\\kulso.png"}),
+])
+def test_restore_rejects_paths_outside_target(tmp_path, pages, pictures):
+    archive = tmp_path / "save1.zip"
+    write_export(archive, {name: b"rossz" for name in list(pages.values()) + list(pictures.values())},
+                 pages=pages, pictures=pictures)
+    target = tmp_path / "a" / "b" / "restored"
+    with pytest.raises(ValueError):
+        restore_export(str(archive), str(target))
+    # Semmi nem íródott ki, a célkönyvtáron kívül sem
+    assert [path.name for path in tmp_path.rglob("*")] == ["save1.zip"]
+
+
+def test_restore_rejects_base_outside_directory(tmp_path):
+    archive = tmp_path / "save2.zip"
+    write_export(archive, {}, base="../save1.zip")
+    with pytest.raises(ValueError):
+        restore_export(str(archive), str(tmp_path / "restored"))
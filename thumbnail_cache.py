@@ -0,0 +1,140 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from picture_store import file_digest, parse_reference
+
+# Egy bélyegkép kulcsa: (a kép fájl hash értéke, szélesség, magasság)
+ThumbnailKey = Tuple[str, int, int]
+
+
+class ThumbnailCache:
+    """Méretkorlátos bélyegkép gyorsítótár a memóriában és a lemezen.
+
+    A kulcs a kép tartalmának hash értéke és a célméret, így a kép
+    átnevezése vagy több helyen való használata nem készít új bélyegképet.
+    Az értékek kódolt (PNG) bájtok; a Qt-s átalakítás a hívó dolga, így a
+    modul Qt nélkül is használható. Mindkét szint a legrégebben használt
+    elemeket dobja el; a metódusok több szálból is hívhatók."""
+
+    def __init__(self, cache_dir: str, max_disk_bytes: int = 64 * 1024 * 1024,
+                 max_memory_bytes: int = 16 * 1024 * 1024):
+        """
+        :param cache_dir: A lemezes gyorsítótár könyvtára
+        :param max_disk_bytes: A lemezen tárolt bélyegképek legnagyobb összmérete
+        :param max_memory_bytes: A memóriában tartott bélyegképek legnagyobb összmérete
+        """
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[ThumbnailKey, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._digests = {}  # (útvonal, mtime, méret) -> hash a nem képtárbeli fájlokhoz
+        self._disk_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(cache_dir)
+            if entry.is_file() and entry.name.endswith(".png")
+        )
+
+    def key_for(self, path: str, width: int, height: int) -> ThumbnailKey:
+        """
+        A bélyegkép kulcsa egy kép fájlhoz
+
+        A képtárbeli képeknél a hash a fájlnévben van; egyébként a tartalomból
+        számoljuk (ezért a hívás lassú lehet, ne a felhasználói felület szálán
+        fusson).
+        """
+        parsed = parse_reference("pictures/" + os.path.basename(path))
+        if parsed is not None:
+            return parsed[0], width, height
+        stat = os.stat(path)
+        identity = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._digests.get(identity)
+        if digest is None:
+            digest = file_digest(path)
+            with self._lock:
+                self._digests[identity] = digest
+        return digest, width, height
+
+    def _disk_path(self, key: ThumbnailKey) -> str:
+        digest, width, height = key
+        return os.path.join(self.cache_dir, f"{digest}_{width}x{height}.png")
+
+    def _remember(self, key: ThumbnailKey, data: bytes):
+        """Felvétel a memóriabeli LRU-ba (a zárat a hívó tartja)"""
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def get_memory(self, key: ThumbnailKey) -> Optional[bytes]:
+        """Bélyegkép a memóriából (gyors, a felhasználói felület szálán is hívható)"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+            return data
+
+    def get(self, key: ThumbnailKey) -> Optional[bytes]:
+        """Bélyegkép a memóriából, vagy a lemezről (ilyenkor a memóriába is bekerül)"""
+        data = self.get_memory(key)
+        if data is not None:
+            return data
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # A módosítási idő a lemezes LRU sorrend alapja
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def put(self, key: ThumbnailKey, data: bytes):
+        """Bélyegkép mentése mindkét szintre"""
+        with self._lock:
+            self._remember(key, data)
+
+        path = self._disk_path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            previous_size = os.path.getsize(path)
+        except FileNotFoundError:
+            previous_size = 0
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._disk_bytes += len(data) - previous_size
+            over_limit = self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._trim_disk()
+
+    def _trim_disk(self):
+        """A legrégebben használt lemezes bélyegképek törlése a korlát alá"""
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.is_file() and entry.name.endswith(".png")),
+            key=lambda entry: entry.stat().st_mtime_ns
+        )
+        total = sum(entry.stat().st_size for entry in entries)
+        # Hiszterézis: a korlát 90%-áig takarítunk, hogy ne fusson minden mentéskor
+        target = self.max_disk_bytes * 0.9
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
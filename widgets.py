@@ -0,0 +1,496 @@
+# Qt megjelenítő elemek a dokumentum elemekhez.
+# A models és a document_manager modul Qt nélkül is használható; minden,
+# ami PyQt5-öt igényel, ide kerül, és csak a gui.py tölti be.
+import os
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QLabel, QWidget, QSizePolicy, QStyle, QStyledItemDelegate, QStyleOptionButton
+from PyQt5.QtCore import (
+    Qt, QAbstractTableModel, QBuffer, QByteArray, QEvent, QIODevice, QModelIndex, QObject, QRect,
+    QRunnable, QSize, QThreadPool, QTimer, pyqtSignal, pyqtSlot
+)
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QImage, QImageReader, QPixmap
+
+from picture_store import parse_reference
+
+class ShowActiveElement:
+    """Aktív elemek megjelenítésének kezelése"""
+    
+    @staticmethod
+    def signature_display(content: str, doc_manager):
+        """
+        SIGNATURE típusú elem megjelenítendő szövege és vízszintes igazítása
+
+        :return: (szöveg, Qt igazítás)
+        """
+        # Content feldolgozása
+        values = doc_manager.get_schema("SIGNATURE").as_dict(content)
+        halign = values['HALIGN'].strip("'")  # Idézőjelek eltávolítása
+        textcontent = values['TEXT']
+        
+        # Horizontális igazítás keresése
+        halign_item = None
+        list_items = doc_manager.show_list("HALIGN")
+        
+        # Keresés a megadott halign értékkel
+        for item in list_items:
+            if item['elementID'] == halign:
+                halign_item = item
+                break
+        
+        # Ha nincs találat, keressük az alapértelmezett elemet
+        if not halign_item:
+            for item in list_items:
+                if item.get('isdefelement') == '1':
+                    halign_item = item
+                    break
+        
+        # Horizontális igazítás
+        alignment = Qt.AlignLeft
+        if halign_item:
+            if halign_item['elementname'] == 'Center':
+                alignment = Qt.AlignCenter
+            elif halign_item['elementname'] == 'Right':
+                alignment = Qt.AlignRight
+        
+        return textcontent, alignment
+
+    @staticmethod
+    def create_signature_widget(content: str, doc_manager) -> QLabel:
+        """SIGNATURE típusú elem widget létrehozása"""
+        textcontent, alignment = ShowActiveElement.signature_display(content, doc_manager)
+        
+        # Label létrehozása
+        label = QLabel(textcontent)
+        label.setWordWrap(True)
+        label.setStyleSheet("margin: 5px; padding: 5px; width: 100%;")
+        label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
+        label.setAlignment(alignment)
+        
+        return label
+        
+    @staticmethod
+    def create_widget(element_type: str, content: str, doc_manager) -> QWidget:
+        """Widget létrehozása az elem típusa alapján"""
+        if element_type == 'SIGNATURE':
+            return ShowActiveElement.create_signature_widget(content, doc_manager)
+        return None
+
+
+class ThumbnailSignals(QObject):
+    """A háttérszál jelzései (a QRunnable nem QObject, nem küldhet jelet)"""
+    loaded = pyqtSignal(QImage)
+    failed = pyqtSignal(str)
+    # Ugyanezek a kép útvonalával, a több képet kezelő fogadóknak (pl. ElementDelegate)
+    path_loaded = pyqtSignal(str, QImage)
+    path_failed = pyqtSignal(str, str)
+
+
+class ThumbnailTask(QRunnable):
+    """Kép dekódolása és méretezése a QThreadPool egyik szálán.
+
+    A QImage szálbiztos, a QPixmap nem, ezért a szál QImage-et ad vissza;
+    a QPixmap a felhasználói felület szálán készül belőle."""
+
+    def __init__(self, path: str, size: QSize, cache):
+        """
+        :param path: A kép fájl elérési útja
+        :param size: A bélyegkép legnagyobb mérete (a méretarány megmarad)
+        :param cache: ThumbnailCache példány
+        """
+        super().__init__()
+        self.path = path
+        self.size = size
+        self.cache = cache
+        self.signals = ThumbnailSignals()
+
+    def run(self):
+        try:
+            key = self.cache.key_for(self.path, self.size.width(), self.size.height())
+            data = self.cache.get(key)
+            if data is not None:
+                image = QImage.fromData(data, "PNG")
+            else:
+                # A QImageReader már olvasás közben méretez (JPEG-nél töredék idő)
+                reader = QImageReader(self.path)
+                reader.setAutoTransform(True)
+                original = reader.size()
+                if original.isValid():
+                    reader.setScaledSize(original.scaled(self.size, Qt.KeepAspectRatio))
+                image = reader.read()
+                if image.isNull():
+                    self.signals.failed.emit(reader.errorString())
+                    self.signals.path_failed.emit(self.path, reader.errorString())
+                    return
+                if image.width() > self.size.width() or image.height() > self.size.height():
+                    image = image.scaled(self.size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                buffer = QByteArray()
+                device = QBuffer(buffer)
+                device.open(QIODevice.WriteOnly)
+                image.save(device, "PNG")
+                self.cache.put(key, bytes(buffer))
+            self.signals.loaded.emit(image)
+            self.signals.path_loaded.emit(self.path, image)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            self.signals.path_failed.emit(self.path, str(e))
+
+
+class PictureLabel(QLabel):
+    """PICTURE elem megjelenítése: helyőrző, majd a háttérben betöltött bélyegkép"""
+
+    def __init__(self, path: str, size: int, cache, pool: QThreadPool = None):
+        """
+        :param path: A kép fájl elérési útja
+        :param size: A bélyegkép befoglaló négyzetének mérete (pixel)
+        :param cache: ThumbnailCache példány
+        :param pool: A betöltést végző szálkészlet (alapértelmezett: a globális)
+        """
+        super().__init__("…")
+        self.path = path
+        # Rögzített méret: a kép megérkezésekor nem kell a táblázat sorát újraméretezni
+        self.setFixedSize(size, size)
+        self.setAlignment(Qt.AlignCenter)
+        self.setStyleSheet("background-color: #eeeeee; color: #888888;")
+        self.setToolTip(path)
+
+        # Képtárbeli kép már memóriában lévő bélyegképe: azonnal, szál nélkül
+        parsed = parse_reference("pictures/" + os.path.basename(path))
+        data = cache.get_memory((parsed[0], size, size)) if parsed else None
+        if data is not None:
+            self.show_image(QImage.fromData(data, "PNG"))
+            return
+
+        # A szálkészlet átveszi a feladatot, és a futás után törli
+        task = ThumbnailTask(path, QSize(size, size), cache)
+        task.signals.loaded.connect(self.show_image)
+        task.signals.failed.connect(self.show_error)
+        (pool or QThreadPool.globalInstance()).start(task)
+
+    @pyqtSlot(QImage)
+    def show_image(self, image: QImage):
+        self.setStyleSheet("")
+        self.setPixmap(QPixmap.fromImage(image))
+
+    @pyqtSlot(str)
+    def show_error(self, message: str):
+        self.setText("✕")
+        self.setToolTip(f"{self.path}: {message}")
+
+
+class ElementTableModel(QAbstractTableModel):
+    """Az oldal elemei táblázat modellként (0. oszlop: tartalom, 1. oszlop: gombok).
+
+    Widgeteket nem hoz létre: a sorokat az ElementDelegate és az
+    ElementButtonDelegate rajzolja, és csak a látható sorokat, így a
+    megnyitás ideje és memóriája nem nő az oldal méretével."""
+
+    ElementRole = Qt.UserRole + 1
+    CONTENT_COLUMN = 0
+    BUTTONS_COLUMN = 1
+
+    def __init__(self, status_colors: dict, disabled_positions: dict, parent=None):
+        """
+        :param status_colors: Státusz -> háttérszín ('#rrggbb')
+        :param disabled_positions: Gomb típus ('up', 'new', 'down') -> ideiglenesen tiltott pozíciók
+        """
+        super().__init__(parent)
+        self.elements = []
+        self.status_colors = {status: QColor(color) for status, color in status_colors.items()}
+        self.default_color = QColor('#ffffff')
+        self.disabled_positions = disabled_positions
+
+    def set_elements(self, elements):
+        """Az elemek cseréje (pl. oldal betöltésekor)"""
+        self.beginResetModel()
+        self.elements = list(elements)
+        self.endResetModel()
+
+    def element(self, row: int) -> dict:
+        """A sor eleme (a read_document szótára)"""
+        return self.elements[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.elements)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        element = self.elements[index.row()]
+        if role == self.ElementRole:
+            return element
+        if index.column() != self.CONTENT_COLUMN:
+            return None
+        if role == Qt.DisplayRole:
+            return str(element['content'])
+        if role == Qt.BackgroundRole:
+            return self.status_colors.get(element['status'], self.default_color)
+        if role == Qt.ToolTipRole and element['type'] == 'PICTURE':
+            return str(element['content'])
+        return None
+
+    def button_states(self, row: int):
+        """
+        A sor fel, új és le gombjának engedélyezettsége
+
+        :return: (fel, új, le)
+        """
+        position = str(self.elements[row].get('position', ''))
+        return (
+            row > 0 and position not in self.disabled_positions['up'],
+            position not in self.disabled_positions['new'],
+            row < len(self.elements) - 1 and position not in self.disabled_positions['down']
+        )
+
+    def refresh_buttons(self):
+        """A gomb oszlop újrarajzolása (pl. a tiltott pozíciók változásakor)"""
+        if self.elements:
+            self.dataChanged.emit(
+                self.index(0, self.BUTTONS_COLUMN), self.index(len(self.elements) - 1, self.BUTTONS_COLUMN)
+            )
+
+
+class ElementDelegate(QStyledItemDelegate):
+    """Az elem tartalmának rajzolása: keret a státusz színével, fejléc
+    ("oid: név (típus)"), alatta a tartalom tördelt szövegként, SIGNATURE
+    elemnél igazítva, PICTURE elemnél a háttérben betöltött bélyegkép."""
+
+    MARGIN = 6
+    # Ennyi bélyegkép marad rajzolható formában (QPixmap) a memóriában
+    PIXMAP_LIMIT = 256
+
+    def __init__(self, doc_manager, thumbnail_size: int, thumbnail_cache, view, pool: QThreadPool = None):
+        """
+        :param doc_manager: DocumentManager példány (SIGNATURE elemekhez)
+        :param thumbnail_size: A bélyegkép befoglaló négyzetének mérete (pixel)
+        :param thumbnail_cache: ThumbnailCache példány
+        :param view: A táblázat nézet (szülő, és a betöltött képek után frissül)
+        :param pool: A képbetöltést végző szálkészlet (alapértelmezett: a globális)
+        """
+        super().__init__(view)
+        self.view = view
+        self.doc_manager = doc_manager
+        self.thumbnail_size = thumbnail_size
+        self.thumbnail_cache = thumbnail_cache
+        self.pool = pool or QThreadPool.globalInstance()
+        self.pixmaps = OrderedDict()  # kép útvonal -> QPixmap, a legutóbb használt a végén
+        self.pending = set()
+        self.errors = {}  # kép útvonal -> hibaüzenet
+
+    def _picture_path(self, element) -> str:
+        picture_path = str(element['content'])
+        if not os.path.isabs(picture_path):
+            picture_path = os.path.join(self.doc_manager.base_path, picture_path)
+        return picture_path
+
+    def _text(self, element):
+        """A megjelenítendő szöveg és igazítás"""
+        if element['type'] == 'SIGNATURE':
+            try:
+                return ShowActiveElement.signature_display(
+                    self.doc_manager.unescape_content(str(element['content'])), self.doc_manager
+                )
+            except Exception:
+                pass
+        return str(element['content']), Qt.AlignLeft
+
+    @staticmethod
+    def _title(element) -> str:
+        return f"{element['oid']}: {element['name']} ({element['type']})"
+
+    def _content_width(self, option, index) -> int:
+        width = option.rect.width() or self.view.columnWidth(index.column())
+        return max(1, width - 2 * self.MARGIN)
+
+    def sizeHint(self, option, index):
+        element = index.data(ElementTableModel.ElementRole)
+        if element is None:
+            return super().sizeHint(option, index)
+        width = self._content_width(option, index)
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        title_height = QFontMetrics(title_font).height()
+        if element['type'] == 'PICTURE':
+            content_height = self.thumbnail_size
+        else:
+            text, alignment = self._text(element)
+            content_height = option.fontMetrics.boundingRect(
+                QRect(0, 0, width, 1 << 20), int(alignment | Qt.TextWordWrap), text
+            ).height()
+        return QSize(width + 2 * self.MARGIN, title_height + content_height + 3 * self.MARGIN)
+
+    def paint(self, painter, option, index):
+        element = index.data(ElementTableModel.ElementRole)
+        if element is None:
+            return
+        painter.save()
+        frame = option.rect.adjusted(2, 2, -2, -2)
+        painter.setPen(QColor('#aaaaaa'))
+        painter.setBrush(index.data(Qt.BackgroundRole))
+        painter.drawRoundedRect(frame, 3, 3)
+        
+        # Fejléc
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        painter.setPen(option.palette.color(option.palette.Text))
+        title_rect = frame.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, 0)
+        title_rect.setHeight(painter.fontMetrics().height())
+        painter.drawText(title_rect, int(Qt.AlignLeft | Qt.AlignVCenter),
+                         painter.fontMetrics().elidedText(self._title(element), Qt.ElideRight, title_rect.width()))
+        
+        # Tartalom
+        painter.setFont(option.font)
+        content_rect = frame.adjusted(self.MARGIN, 0, -self.MARGIN, -self.MARGIN)
+        content_rect.setTop(title_rect.bottom() + self.MARGIN)
+        if element['type'] == 'PICTURE':
+            self._paint_picture(painter, content_rect, self._picture_path(element))
+        else:
+            text, alignment = self._text(element)
+            painter.drawText(content_rect, int(alignment | Qt.AlignTop | Qt.TextWordWrap), text)
+        painter.restore()
+
+    def _paint_picture(self, painter, rect, path):
+        """Bélyegkép, vagy amíg nincs kész, helyőrző (a betöltés a háttérben indul)"""
+        box = QRect(rect.left(), rect.top(), self.thumbnail_size, self.thumbnail_size)
+        pixmap = self.thumbnail(path)
+        if pixmap is not None:
+            target = QRect(0, 0, pixmap.width(), pixmap.height())
+            target.moveCenter(box.center())
+            painter.drawPixmap(target, pixmap)
+            return
+        painter.fillRect(box, QColor('#eeeeee'))
+        painter.setPen(QColor('#888888'))
+        painter.drawText(box, int(Qt.AlignCenter), "✕" if path in self.errors else "…")
+
+    def thumbnail(self, path: str):
+        """
+        A kép bélyegképe, ha már elkészült; különben elindítja a betöltését
+
+        :return: QPixmap vagy None
+        """
+        pixmap = self.pixmaps.get(path)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(path)
+            return pixmap
+        if path in self.pending or path in self.errors:
+            return None
+        
+        # Képtárbeli kép már memóriában lévő bélyegképe: azonnal, szál nélkül
+        parsed = parse_reference("pictures/" + os.path.basename(path))
+        data = self.thumbnail_cache.get_memory((parsed[0], self.thumbnail_size, self.thumbnail_size)) if parsed else None
+        if data is not None:
+            return self._remember(path, QImage.fromData(data, "PNG"))
+        
+        self.pending.add(path)
+        task = ThumbnailTask(path, QSize(self.thumbnail_size, self.thumbnail_size), self.thumbnail_cache)
+        task.signals.path_loaded.connect(self.thumbnail_loaded)
+        task.signals.path_failed.connect(self.thumbnail_failed)
+        self.pool.start(task)
+        return None
+
+    def _remember(self, path: str, image: QImage) -> QPixmap:
+        pixmap = QPixmap.fromImage(image)
+        self.pixmaps[path] = pixmap
+        while len(self.pixmaps) > self.PIXMAP_LIMIT:
+            self.pixmaps.popitem(last=False)
+        return pixmap
+
+    @pyqtSlot(str, QImage)
+    def thumbnail_loaded(self, path: str, image: QImage):
+        self.pending.discard(path)
+        self._remember(path, image)
+        self.view.viewport().update()
+
+    @pyqtSlot(str, str)
+    def thumbnail_failed(self, path: str, message: str):
+        self.pending.discard(path)
+        self.errors[path] = message
+        self.view.viewport().update()
+
+
+class ElementButtonDelegate(QStyledItemDelegate):
+    """A fel, új és le gombok rajzolása és kattintásuk kezelése, gomb widgetek nélkül"""
+
+    BUTTONS = ('up', 'new', 'down')
+    SPACING = 2
+
+    clicked = pyqtSignal(str, int)  # gomb ('up', 'new' vagy 'down'), sor
+
+    def __init__(self, model: ElementTableModel, texts: dict, view):
+        """
+        :param model: Az elemek modellje (a gombok állapotához)
+        :param texts: Gomb -> felirat
+        :param view: A táblázat nézet (szülő)
+        """
+        super().__init__(view)
+        self.model = model
+        self.view = view
+        self.texts = dict(texts)
+        self.pressed = None  # (sor, gomb) amíg az egér gomb lenyomva van
+
+    def set_texts(self, texts: dict):
+        """Feliratok cseréje (nyelvváltáskor)"""
+        self.texts = dict(texts)
+        self.view.viewport().update()
+
+    def _button_height(self, option) -> int:
+        return option.fontMetrics.height() + 10
+
+    def _button_rects(self, option):
+        height = self._button_height(option)
+        rect = option.rect.adjusted(self.SPACING, self.SPACING, -self.SPACING, -self.SPACING)
+        top = rect.top() + max(0, (rect.height() - 3 * height - 2 * self.SPACING) // 2)
+        return {
+            button: QRect(rect.left(), top + i * (height + self.SPACING), rect.width(), height)
+            for i, button in enumerate(self.BUTTONS)
+        }
+
+    def row_height(self) -> int:
+        """A gombok által igényelt sormagasság (a még nem mért sorok alapértelmezett magassága)"""
+        return 3 * (self.view.fontMetrics().height() + 10) + 4 * self.SPACING
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), 3 * self._button_height(option) + 4 * self.SPACING)
+
+    def paint(self, painter, option, index):
+        states = dict(zip(self.BUTTONS, self.model.button_states(index.row())))
+        style = self.view.style()
+        for button, rect in self._button_rects(option).items():
+            button_option = QStyleOptionButton()
+            button_option.rect = rect
+            button_option.text = self.texts.get(button, button)
+            button_option.palette = option.palette
+            button_option.fontMetrics = option.fontMetrics
+            button_option.state = QStyle.State_Raised
+            if states[button]:
+                button_option.state |= QStyle.State_Enabled
+                if self.pressed == (index.row(), button):
+                    button_option.state |= QStyle.State_Sunken
+            style.drawControl(QStyle.CE_PushButton, button_option, painter, self.view)
+
+    def _button_at(self, option, index, pos):
+        states = dict(zip(self.BUTTONS, self.model.button_states(index.row())))
+        for button, rect in self._button_rects(option).items():
+            if rect.contains(pos):
+                return button if states[button] else None
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            button = self._button_at(option, index, event.pos())
+            self.pressed = (index.row(), button) if button else None
+            self.view.viewport().update(option.rect)
+            return button is not None
+        if event.type() == QEvent.MouseButtonRelease and self.pressed is not None:
+            row, button = self.pressed
+            self.pressed = None
+            self.view.viewport().update(option.rect)
+            if row == index.row() and self._button_at(option, index, event.pos()) == button:
+                # A kezelő a modellt is újratöltheti: az eseménykezelés után fut
+                QTimer.singleShot(0, lambda: self.clicked.emit(button, row))
+            return True
+        return False
@@ -0,0 +1,166 @@
+import struct
+import time
+import zlib
+from typing import BinaryIO, Iterable, List, Optional, Tuple
+
+# Tömörítési módok (a zip formátum kódjai)
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+# E fölött a méretek és eltolások csak ZIP64 kiterjesztéssel írhatók
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_MAX_ENTRIES = 0xFFFF
+
+# A fejlécben ez az érték jelzi, hogy a valódi érték a ZIP64 mezőben van
+_ZIP64_MARKER = 0xFFFFFFFF
+_ENTRIES_MARKER = 0xFFFF
+
+_LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<4sHHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<4sHHHHIIH")
+_ZIP64_END_RECORD = struct.Struct("<4sQHHIIQQQQ")
+_ZIP64_LOCATOR = struct.Struct("<4sIQI")
+
+_FLAG_UTF8 = 0x800
+_VERSION_DEFAULT = 20
+_VERSION_ZIP64 = 45
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def deflate_bytes(data: bytes, level: int = 6) -> Tuple[bytes, int]:
+    """
+    Adat tömörítése nyers deflate formátumban (a zlib a GIL-t elengedi,
+    így több szálon párhuzamosan futtatható)
+
+    :return: (tömörített adat, CRC32)
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(), zlib.crc32(data)
+
+
+def file_crc(path: str, hasher=None) -> Tuple[int, int]:
+    """
+    Fájl CRC32 értékének számítása darabonkénti olvasással
+
+    :param path: A fájl elérési útja
+    :param hasher: Opcionális hashlib objektum, amely ugyanabban a menetben frissül
+    :return: (CRC32, méret)
+    """
+    crc = 0
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            if hasher is not None:
+                hasher.update(chunk)
+    return crc, size
+
+
+def iter_file_chunks(path: str) -> Iterable[bytes]:
+    """Fájl tartalma darabokban, korlátozott memóriahasználattal"""
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(CHUNK_SIZE), b"")
+
+
+class StreamingZipWriter:
+    """Zip archívum folyamatos írása előre tömörített tagokból.
+
+    A tagokat a hívó készíti elő (CRC, méretek, tömörített adat), így a
+    tömörítés más szálakon futhat; az író csak sorban kiírja a fejléceket
+    és az adatot. A kimenetnek nem kell kereshetőnek (seekable) lennie.
+    A 4 GB feletti méretekhez és eltolásokhoz, illetve 65535 tag fölött
+    ZIP64 rekordokat ír."""
+
+    def __init__(self, fileobj: BinaryIO, date_time: Optional[Tuple[int, ...]] = None):
+        """
+        :param fileobj: Bináris, írható kimenet
+        :param date_time: A tagok módosítási ideje (év, hó, nap, óra, perc, mp); alapértelmezett: most
+        """
+        self.fileobj = fileobj
+        year, month, day, hour, minute, second = (date_time or time.localtime())[:6]
+        self._dos_date = (max(year, 1980) - 1980) << 9 | month << 5 | day
+        self._dos_time = hour << 11 | minute << 5 | second // 2
+        self._offset = 0
+        self._entries: List[Tuple[bytes, int, int, int, int, int]] = []
+        self._names = set()
+
+    def _write(self, data: bytes):
+        self.fileobj.write(data)
+        self._offset += len(data)
+
+    def write_member(self, name: str, chunks: Iterable[bytes], crc: int, size: int,
+                     compressed_size: int, method: int = ZIP_DEFLATED):
+        """
+        Egy előkészített tag kiírása
+
+        :param name: A tag neve az archívumban ("/" elválasztóval)
+        :param chunks: A (tömörített) adat darabjai
+        :param crc: A tömörítetlen adat CRC32 értéke
+        :param size: A tömörítetlen méret
+        :param compressed_size: A kiírandó adat mérete
+        :param method: ZIP_STORED vagy ZIP_DEFLATED
+        :raises ValueError: Ismétlődő név vagy eltérő adatméret esetén
+        """
+        if name in self._names:
+            raise ValueError(f"Ismétlődő tag az archívumban: {name}")
+        self._names.add(name)
+        encoded_name = name.encode('utf-8')
+        offset = self._offset
+
+        zip64 = size >= ZIP64_LIMIT or compressed_size >= ZIP64_LIMIT
+        extra = struct.pack("<HHQQ", 1, 16, size, compressed_size) if zip64 else b""
+        self._write(_LOCAL_HEADER.pack(
+            b"PK\x03\x04", _VERSION_ZIP64 if zip64 else _VERSION_DEFAULT, _FLAG_UTF8, method,
+            self._dos_time, self._dos_date, crc,
+            _ZIP64_MARKER if zip64 else compressed_size, _ZIP64_MARKER if zip64 else size,
+            len(encoded_name), len(extra)
+        ) + encoded_name + extra)
+
+        written = 0
+        for chunk in chunks:
+            self._write(chunk)
+            written += len(chunk)
+        if written != compressed_size:
+            raise ValueError(f"A(z) {name} tag mérete eltér: {written} != {compressed_size}")
+
+        self._entries.append((encoded_name, method, crc, size, compressed_size, offset))
+
+    def close(self):
+        """A központi könyvtár és a záró rekordok kiírása (a kimenetet nem zárja le)"""
+        directory_offset = self._offset
+        for encoded_name, method, crc, size, compressed_size, offset in self._entries:
+            # A ZIP64 mezők sorrendje kötött (méret, tömörített méret, eltolás);
+            # csak a fejlécben 0xFFFFFFFF értékkel jelölt mezők szerepelnek
+            zip64_sizes = size >= ZIP64_LIMIT or compressed_size >= ZIP64_LIMIT
+            zip64_fields = [size, compressed_size] if zip64_sizes else []
+            if offset >= ZIP64_LIMIT:
+                zip64_fields.append(offset)
+            extra = b""
+            if zip64_fields:
+                extra = struct.pack(f"<HH{len(zip64_fields)}Q", 1, 8 * len(zip64_fields), *zip64_fields)
+            version = _VERSION_ZIP64 if zip64_fields else _VERSION_DEFAULT
+            self._write(_CENTRAL_HEADER.pack(
+                b"PK\x01\x02", version, version, _FLAG_UTF8, method,
+                self._dos_time, self._dos_date, crc,
+                _ZIP64_MARKER if zip64_sizes else compressed_size, _ZIP64_MARKER if zip64_sizes else size,
+                len(encoded_name), len(extra), 0, 0, 0, 0o644 << 16,
+                _ZIP64_MARKER if offset >= ZIP64_LIMIT else offset
+            ) + encoded_name + extra)
+
+        directory_size = self._offset - directory_offset
+        count = len(self._entries)
+        zip64_end = count >= ZIP_MAX_ENTRIES or directory_offset >= ZIP64_LIMIT or directory_size >= ZIP64_LIMIT
+        if zip64_end:
+            zip64_end_offset = self._offset
+            self._write(_ZIP64_END_RECORD.pack(
+                b"PK\x06\x06", _ZIP64_END_RECORD.size - 12, _VERSION_ZIP64, _VERSION_ZIP64, 0, 0,
+                count, count, directory_size, directory_offset
+            ))
+            self._write(_ZIP64_LOCATOR.pack(b"PK\x06\x07", 0, zip64_end_offset, 1))
+        self._write(_END_RECORD.pack(
+            b"PK\x05\x06", 0, 0,
+            _ENTRIES_MARKER if zip64_end else count, _ENTRIES_MARKER if zip64_end else count,
+            _ZIP64_MARKER if zip64_end else directory_size, _ZIP64_MARKER if zip64_end else directory_offset, 0
+        ))